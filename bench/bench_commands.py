@@ -0,0 +1,390 @@
+# run `tree` and `add` of uppair against a local CRAN stand-in, first with an empty cache then again with it warm,
+# and report wall time, requests, bytes transferred, peak RSS and time spent parsing
+#
+# usage:
+#   python bench/bench_commands.py [--latency=ms] [--bandwidth=MB/s] [--extra-packages=N] [--rounds=N] [--drop=bytes] [--json=path]
+#
+# the corpus (see `corpus.py`) is served by a child process with the latency and bandwidth given,
+# uppair runs in another child process from a temporary directory, with `bench/fake_R` first in `PATH`;
+# `resolve__many` is checked to resolve what `tree` does with uppair imported as a library, nothing of the command line set up;
+# `add` is then run once more against a server cutting off the first transfer of each tarball after `--drop` bytes,
+# to check that the downloads are resumed and the resumed tarballs pass the MD5sum / gzip check
+
+import email.utils
+import functools
+import hashlib
+import http.server
+import inspect
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+PATH_BENCH = os.path.dirname(os.path.abspath(__file__))
+PATH_UPPAIR = os.path.dirname(PATH_BENCH)
+PATH_FAKE_R = os.path.join(PATH_BENCH, "fake_R")
+
+sys.path.insert(0, PATH_UPPAIR)
+
+from corpus import LIST__ROOTS, load__corpus
+
+STR__R_VERSION = "4.2.1"
+
+LIST__PARSERS = [
+  "read__RDS",
+  "parse__archive_rds",
+  "parse__PACKAGES_index",
+  "parse__DCF",
+  "read__DESCRIPTION__from__tar_stream",
+  "parse__latest_index",
+  "parse__archive_index",
+  "parse__contrib_listing",
+  "parse__archive_package_version",
+  "parse__latest_package_metadata"
+]
+"""functions of uppair timed as parsing; CPU time of the calling thread is counted, so waiting for the network is not"""
+
+LIST__CACHES = [
+  # (name, options), run in this order in the same directory
+  ("cold", []),
+  ("warm", []),
+  ("fresh", ["--fresh"])
+]
+"""`warm` starts from the lockfile left by `cold`, `fresh` ignores it but still has the cache and the metadata store"""
+
+LIST__METRICS = [
+  # (key, title, format)
+  ("wall", "wall", lambda value: f"{value:.2f}s"),
+  ("requests", "requests", lambda value: f"{value:.0f}"),
+  ("not_modified", "304", lambda value: f"{value:.0f}"),
+  ("bytes", "bytes", lambda value: f"{value / 1024:.0f}KB"),
+  ("peak_RSS", "peak RSS", lambda value: f"{value / 1024:.1f}MB"),
+  ("parse", "parse", lambda value: f"{value * 1000:.0f}ms")
+]
+
+# -------- server
+
+def serve__corpus(path__corpus, float__latency, float__bandwidth, int__drop_after=0):
+  # serve the corpus as a static CRAN mirror: `ETag`, `Last-Modified`, conditional and `Range` requests,
+  # each response after `float__latency` seconds, each connection at `float__bandwidth` bytes per second (0 for no limit);
+  # with `int__drop_after`, the first whole transfer of each tarball (a download, not the ranged head read for DESCRIPTION)
+  # is cut off after that many bytes, as a dropped connection;
+  # `GET /__stats__` returns (then resets) the requests and bytes served, without being counted; the port is printed once listening
+  lock = threading.Lock()
+  dict__stats = {"requests": 0, "not_modified": 0, "bytes": 0, "dropped": 0, "resumed": 0}
+  set__dropped = set()
+  int__chunk_size = 16 * 1024
+
+  class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def send__body(self, int__status, dict__headers, bytes__body, int__limit=None):
+      # with `int__limit`, the full length is announced but only that many bytes are sent before the connection is closed
+      self.send_response(int__status)
+      for key, value in dict__headers.items():
+        self.send_header(key, value)
+      self.send_header("Content-Length", str(len(bytes__body)))
+      self.end_headers()
+      bytes__sent = bytes__body if (int__limit == None) else bytes__body[:int__limit]
+      for index in range(0, len(bytes__sent), int__chunk_size):
+        self.wfile.write(bytes__sent[index:index + int__chunk_size])
+        if float__bandwidth > 0:
+          time.sleep(min(int__chunk_size, len(bytes__sent) - index) / float__bandwidth)
+      with lock:
+        dict__stats["bytes"] += len(bytes__sent)
+        if len(bytes__sent) < len(bytes__body):
+          dict__stats["dropped"] += 1
+      if len(bytes__sent) < len(bytes__body):
+        self.close_connection = True
+
+    def get__limit(self, path__file, int__size):
+      # -> bytes to send before dropping the connection, None to send all
+      if (int__drop_after <= 0) or (not path__file.endswith(".tar.gz")) or (int__size <= int__drop_after):
+        return None
+      with lock:
+        if path__file in set__dropped:
+          return None
+        set__dropped.add(path__file)
+      return int__drop_after
+
+    def do_GET(self):
+      if self.path == "/__stats__":
+        with lock:
+          bytes__stats = json.dumps(dict__stats).encode("utf-8")
+          dict__stats.update(requests=0, not_modified=0, bytes=0, dropped=0, resumed=0)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(bytes__stats)))
+        self.end_headers()
+        self.wfile.write(bytes__stats)
+        return
+
+      with lock:
+        dict__stats["requests"] += 1
+      time.sleep(float__latency)
+
+      path__file = os.path.join(path__corpus, urllib.request.url2pathname(self.path.split("?")[0]).lstrip("/\\"))
+      if os.path.isdir(path__file):
+        path__file = os.path.join(path__file, "index.html")
+      if not os.path.isfile(path__file):
+        self.send__body(404, {"Content-Type": "text/plain"}, b"not found")
+        return
+
+      stat = os.stat(path__file)
+      dict__headers = {
+        "ETag": f"\"{stat.st_mtime_ns:x}-{stat.st_size:x}\"",
+        "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Content-Type": "text/html" if path__file.endswith(".html") else "application/octet-stream"
+      }
+      if (self.headers.get("If-None-Match") == dict__headers["ETag"]) or (self.headers.get("If-Modified-Since") == dict__headers["Last-Modified"]):
+        with lock:
+          dict__stats["not_modified"] += 1
+        self.send_response(304)
+        self.send_header("ETag", dict__headers["ETag"])
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return
+
+      with open(path__file, "rb") as f:
+        bytes__content = f.read()
+      str__range = self.headers.get("Range", "")
+      if str__range.startswith("bytes="):
+        str__start, _, str__end = str__range[len("bytes="):].partition("-")
+        int__start = int(str__start)
+        int__end = min(int(str__end), len(bytes__content) - 1) if str__end != "" else len(bytes__content) - 1
+        if int__start >= len(bytes__content):
+          self.send__body(416, {"Content-Range": f"bytes */{len(bytes__content)}"}, b"")
+          return
+        dict__headers["Content-Range"] = f"bytes {int__start}-{int__end}/{len(bytes__content)}"
+        if (int__start > 0) and (str__end == ""): # the rest of the file, as a resumed download asks
+          with lock:
+            dict__stats["resumed"] += 1
+        self.send__body(206, dict__headers, bytes__content[int__start:int__end + 1])
+        return
+      self.send__body(200, dict__headers, bytes__content, self.get__limit(path__file, len(bytes__content)))
+
+    def log_message(self, *args):
+      pass
+
+  server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+  server.daemon_threads = True
+  print(server.server_address[1], flush=True)
+  server.serve_forever()
+
+def start__server(path__corpus, float__latency, float__bandwidth, int__drop_after=0):
+  # -> server process, URL of the repository
+  process__server = subprocess.Popen(
+    [sys.executable, os.path.abspath(__file__), "serve", path__corpus, str(float__latency), str(float__bandwidth), str(int__drop_after)],
+    stdout=subprocess.PIPE, text=True
+  )
+  int__port = int(process__server.stdout.readline())
+  return process__server, f"http://127.0.0.1:{int__port}/"
+
+def get__server_stats(str__repository):
+  with urllib.request.urlopen(urllib.parse.urljoin(str__repository, "__stats__")) as response:
+    return json.loads(response.read())
+
+# -------- uppair
+
+def run__uppair(path__stats, list__args):
+  # uppair as `python uppair.py <args>` would run it, with its parsers timed, then stats written to `path__stats`
+  import uppair
+
+  lock = threading.Lock()
+  dict__stats = {"parse": 0.0}
+  local = threading.local()
+
+  def time__parser(func):
+    # nested parsers are counted once, by the outermost one
+    def enter():
+      local.int__depth = getattr(local, "int__depth", 0) + 1
+      return time.thread_time()
+    def leave(float__start):
+      local.int__depth -= 1
+      if local.int__depth == 0:
+        with lock:
+          dict__stats["parse"] += time.thread_time() - float__start
+
+    if inspect.isgeneratorfunction(func):
+      @functools.wraps(func)
+      def wrapper(*args, **kwargs):
+        generator = func(*args, **kwargs)
+        while True:
+          float__start = enter()
+          try:
+            item = next(generator)
+          except StopIteration:
+            return
+          finally:
+            leave(float__start)
+          yield item
+    else:
+      @functools.wraps(func)
+      def wrapper(*args, **kwargs):
+        float__start = enter()
+        try:
+          return func(*args, **kwargs)
+        finally:
+          leave(float__start)
+    return wrapper
+
+  for name in LIST__PARSERS:
+    setattr(uppair, name, time__parser(getattr(uppair, name)))
+  # every prompt takes its default: tasks are confirmed, unexpired caches used, an existing lockfile overwritten
+  uppair.ask__user_confirm = lambda prompt, str__default_input="y": str__default_input == "y"
+
+  try:
+    os.makedirs(uppair.PATH_CACHE, exist_ok=True)
+    os.makedirs(uppair.PATH_STORAGE, exist_ok=True)
+    uppair.formatted_date__when_start = uppair.get__fotmatted_date()
+    uppair.initialize__RE()
+    list__args = uppair.parse__options(list__args)
+    uppair.route__command(list__args[0], list__args[1:])
+  finally:
+    dict__stats["peak_RSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KB on Linux
+    with open(path__stats, "w", encoding="utf-8") as f:
+      json.dump(dict__stats, f)
+
+def measure(path__work, str__repository, list__args):
+  # -> metrics of one run of uppair in `path__work`
+  path__stats = os.path.join(path__work, "bench_stats.json")
+  dict__environment = dict(os.environ, PATH=PATH_FAKE_R + os.pathsep + os.environ.get("PATH", ""))
+  get__server_stats(str__repository) # reset
+  float__start = time.perf_counter()
+  process = subprocess.run(
+    [sys.executable, os.path.abspath(__file__), "run", path__stats] + list__args + [f"--repository={str__repository}"],
+    cwd=path__work, env=dict__environment, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+  )
+  float__wall = time.perf_counter() - float__start
+  if process.returncode != 0:
+    print(process.stdout[-4000:])
+    raise RuntimeError(f"uppair exited with {process.returncode}: {list__args}")
+  with open(path__stats, "r", encoding="utf-8") as f:
+    dict__stats = json.load(f)
+  return dict(get__server_stats(str__repository), wall=float__wall, **dict__stats)
+
+def measure__resume(path__corpus, float__latency, float__bandwidth, int__drop_after):
+  # -> metrics of a cold `add` against a server dropping the first transfer of each tarball, with the tarballs checked
+  process__server, str__repository = start__server(path__corpus, float__latency, float__bandwidth, int__drop_after)
+  path__work = tempfile.mkdtemp()
+  try:
+    dict__metrics = measure(path__work, str__repository, ["add", STR__R_VERSION] + LIST__ROOTS)
+    # every tarball kept must be byte for byte one of the corpus
+    set__MD5sums = set()
+    for path__directory, _, list__file_names in os.walk(path__corpus):
+      for file_name in list__file_names:
+        if file_name.endswith(".tar.gz"):
+          set__MD5sums.add(get__MD5(os.path.join(path__directory, file_name)))
+    path__storage = os.path.join(path__work, "r_packages")
+    list__tarballs = [file_name for file_name in os.listdir(path__storage) if file_name.endswith(".tar.gz")]
+    list__mismatched = [file_name for file_name in list__tarballs if get__MD5(os.path.join(path__storage, file_name)) not in set__MD5sums]
+  finally:
+    shutil.rmtree(path__work)
+    process__server.kill()
+
+  if dict__metrics["dropped"] == 0:
+    raise RuntimeError(f"no transfer dropped after {int__drop_after} bytes, use a smaller `--drop`")
+  if dict__metrics["resumed"] < dict__metrics["dropped"]:
+    raise RuntimeError(f"{dict__metrics['dropped']} transfers dropped but only {dict__metrics['resumed']} resumed")
+  if list__mismatched:
+    raise RuntimeError(f"tarballs resumed but not intact: {list__mismatched}")
+  return dict(dict__metrics, tarballs=len(list__tarballs))
+
+def run__library(path__result, str__repository):
+  # uppair as a library: imported and resolved with, nothing of the command line set up, the versions resolved written to `path__result`
+  import uppair
+
+  dict__result, = uppair.resolve__many([(STR__R_VERSION, LIST__ROOTS, None)], uppair.Backend__repository(str__repository))
+  if isinstance(dict__result, Exception):
+    raise dict__result
+  with open(path__result, "w", encoding="utf-8") as f:
+    json.dump({package_name: dict__record["Version"] for package_name, dict__record in dict__result["lockfile"]["Packages"].items()}, f)
+
+def check__library(str__repository):
+  # `resolve__many` in a fresh process has to resolve the same versions as `tree`
+  path__work = tempfile.mkdtemp()
+  try:
+    path__result = os.path.join(path__work, "library.json")
+    process = subprocess.run(
+      [sys.executable, os.path.abspath(__file__), "library", path__result, str__repository],
+      cwd=path__work, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    if process.returncode != 0:
+      print(process.stdout[-4000:])
+      raise RuntimeError("resolve__many failed when uppair is imported as a library")
+    with open(path__result, "r", encoding="utf-8") as f:
+      dict__library = json.load(f)
+    measure(path__work, str__repository, ["tree", STR__R_VERSION] + LIST__ROOTS)
+    with open(os.path.join(path__work, "renv.lock"), "r", encoding="utf-8") as f:
+      dict__tree = {package_name: dict__record["Version"] for package_name, dict__record in json.load(f)["Packages"].items()}
+  finally:
+    shutil.rmtree(path__work)
+  if dict__library != dict__tree:
+    raise RuntimeError(f"resolve__many and tree differ: {dict__library} != {dict__tree}")
+  return len(dict__library)
+
+def get__MD5(path__file):
+  with open(path__file, "rb") as f:
+    return hashlib.md5(f.read()).hexdigest()
+
+if __name__ == "__main__":
+  if (len(sys.argv) > 1) and (sys.argv[1] == "serve"):
+    serve__corpus(sys.argv[2], float(sys.argv[3]), float(sys.argv[4]), int(sys.argv[5]))
+    sys.exit(0)
+  if (len(sys.argv) > 1) and (sys.argv[1] == "run"):
+    run__uppair(sys.argv[2], sys.argv[3:])
+    sys.exit(0)
+  if (len(sys.argv) > 1) and (sys.argv[1] == "library"):
+    run__library(sys.argv[2], sys.argv[3])
+    sys.exit(0)
+
+  dict__options = {"latency": "0", "bandwidth": "0", "extra-packages": "0", "rounds": "1", "drop": "1024", "json": ""}
+  for arg in sys.argv[1:]:
+    option, _, value = arg.lstrip("-").partition("=")
+    if option not in dict__options:
+      print(f"unknown option: {arg}")
+      sys.exit(1)
+    dict__options[option] = value
+
+  path__corpus = load__corpus(int(dict__options["extra-packages"]))
+  process__server, str__repository = start__server(path__corpus, float(dict__options["latency"]) / 1000, float(dict__options["bandwidth"]) * 1024 * 1024)
+
+  dict__results = {}
+  try:
+    int__library_packages = check__library(str__repository)
+    for command in ["tree", "add"]:
+      for _ in range(int(dict__options["rounds"])):
+        path__work = tempfile.mkdtemp()
+        try:
+          for cache, list__options in LIST__CACHES:
+            dict__results.setdefault(f"{command} {cache}", []).append(measure(path__work, str__repository, [command, STR__R_VERSION] + LIST__ROOTS + list__options))
+        finally:
+          shutil.rmtree(path__work)
+  finally:
+    process__server.kill()
+  dict__resume = measure__resume(path__corpus, float(dict__options["latency"]) / 1000, float(dict__options["bandwidth"]) * 1024 * 1024, int(dict__options["drop"]))
+
+  # medians over rounds
+  dict__medians = {
+    scenario: {key: statistics.median(dict__run[key] for dict__run in list__runs) for key, _, _ in LIST__METRICS}
+    for scenario, list__runs in dict__results.items()
+  }
+  print(f"\ncorpus: {path__corpus}, latency {dict__options['latency']}ms, bandwidth {dict__options['bandwidth'] if float(dict__options['bandwidth']) > 0 else 'unlimited'}{'MB/s' if float(dict__options['bandwidth']) > 0 else ''}, {dict__options['rounds']} round(s)")
+  print(f"\n{'':<14}" + "".join(f"{title:>12}" for _, title, _ in LIST__METRICS))
+  for scenario, dict__metrics in dict__medians.items():
+    print(f"{scenario:<14}" + "".join(f"{func__format(dict__metrics[key]):>12}" for key, _, func__format in LIST__METRICS))
+  print(f"{'add resume':<14}" + "".join(f"{func__format(dict__resume[key]):>12}" for key, _, func__format in LIST__METRICS))
+  print(f"\nresolve__many imported as a library: the same {int__library_packages} packages as tree")
+  print(f"add resume: {dict__resume['dropped']} transfers dropped after {dict__options['drop']} bytes, {dict__resume['resumed']} resumed, {dict__resume['tarballs']} tarballs intact")
+
+  if dict__options["json"] != "":
+    with open(dict__options["json"], "w", encoding="utf-8") as f:
+      json.dump({"options": dict__options, "results": dict__medians, "resume": dict__resume}, f, indent=2)
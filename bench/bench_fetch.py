@@ -0,0 +1,107 @@
+# compare fetching then parsing an index page in sequence with the pipelined fetch-and-parse of uppair,
+# on a fixture page served locally at a throttled rate
+#
+# usage:
+#   python bench/bench_fetch.py [MB per second]
+#
+# the page is served by a child process, so the server does not compete with the fetching process for the GIL
+
+import contextlib
+import http.server
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uppair
+from fixtures import FILE_NAME__LATEST_INDEX, load__fixture
+
+def serve__fixture(float__rate):
+  # serve the page in chunks at `float__rate` bytes per second, the port is printed once listening
+  bytes__page = load__fixture(FILE_NAME__LATEST_INDEX).encode("utf-8")
+
+  class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+      self.send_response(200)
+      self.send_header("Content-Type", "text/html; charset=utf-8")
+      self.send_header("Content-Length", str(len(bytes__page)))
+      self.end_headers()
+      for index in range(0, len(bytes__page), uppair.FETCH_CHUNK_SIZE):
+        self.wfile.write(bytes__page[index:index + uppair.FETCH_CHUNK_SIZE])
+        time.sleep(uppair.FETCH_CHUNK_SIZE / float__rate)
+
+    def log_message(self, *args):
+      pass
+
+  server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+  print(server.server_address[1], flush=True)
+  server.serve_forever()
+
+def start__server(float__rate):
+  # -> server process, URL of the page
+  process__server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", str(float__rate)], stdout=subprocess.PIPE, text=True)
+  int__port = int(process__server.stdout.readline())
+  return process__server, f"http://127.0.0.1:{int__port}/{FILE_NAME__LATEST_INDEX}"
+
+def download(str__URL):
+  with urllib.request.urlopen(str__URL) as response:
+    return response.read()
+
+def fetch__then_parse__in_sequence(str__URL):
+  # read the whole page, decode it, parse it, then store it, as before the pipeline
+  bytes__HTML = download(str__URL)
+  str__HTML = bytes__HTML.decode("utf-8")
+  dict__content = uppair.parse__latest_index([str__HTML])
+  uppair.store__put(f"HTML:{str__URL}", str__HTML.encode("utf-8"), None)
+  return dict__content
+
+def fetch__then_parse__pipelined(str__URL):
+  return uppair.fetch__HTML__then_parse(str__URL, uppair.parse__latest_index, f"HTML:{str__URL}", None)
+
+def measure(func, str__URL):
+  # -> (seconds, peak bytes allocated, result), the peak is measured in a second run as tracing slows it down
+  with contextlib.redirect_stdout(io.StringIO()):
+    float__start = time.perf_counter()
+    result = func(str__URL)
+    float__elapsed = time.perf_counter() - float__start
+    tracemalloc.start()
+    func(str__URL)
+    _, int__peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+  return float__elapsed, int__peak, result
+
+if __name__ == "__main__":
+  if (len(sys.argv) > 2) and (sys.argv[1] == "serve"):
+    serve__fixture(float(sys.argv[2]))
+
+  float__rate = float(sys.argv[1]) * 1024 * 1024 if len(sys.argv) > 1 else 8 * 1024 * 1024
+  uppair.initialize__RE()
+
+  path__store = tempfile.mkdtemp()
+  uppair.PATH_STORE = os.path.join(path__store, "metadata.sqlite3")
+  uppair.PATH_STORE_BLOBS = os.path.join(path__store, "blobs")
+
+  bytes__page = load__fixture(FILE_NAME__LATEST_INDEX).encode("utf-8")
+  process__server, str__URL = start__server(float__rate)
+
+  try:
+    float__download, _, _ = measure(download, str__URL)
+    float__parse, _, _ = measure(lambda _: uppair.parse__latest_index([bytes__page.decode("utf-8")]), str__URL)
+    print(f"\npage: {len(bytes__page) // 1024}KB at {float__rate / 1024 / 1024:.1f}MB/s, download only {float__download * 1000:.0f}ms, parse only {float__parse * 1000:.0f}ms")
+
+    print(f"\n{'':<16}{'wall':>10}{'peak':>12}")
+    float__sequence, int__sequence_peak, result__sequence = measure(fetch__then_parse__in_sequence, str__URL)
+    print(f"{'in sequence':<16}{float__sequence * 1000:>8.0f}ms{int__sequence_peak // 1024:>10}KB")
+    float__pipeline, int__pipeline_peak, result__pipeline = measure(fetch__then_parse__pipelined, str__URL)
+    print(f"{'pipelined':<16}{float__pipeline * 1000:>8.0f}ms{int__pipeline_peak // 1024:>10}KB")
+    print(f"\nsame output: {result__sequence == result__pipeline}")
+  finally:
+    process__server.kill()
+    shutil.rmtree(path__store)
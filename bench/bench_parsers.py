@@ -0,0 +1,161 @@
+# compare the HTML parsers of uppair with the regex path they replaced, on fixture pages:
+# on well-formed pages the parsers take a few times as long (one Python step per token), on pages the lazy regexes
+# scan to the end for each row (rows without links) they stay linear while the regexes do not
+#
+# usage:
+#   python bench/bench_parsers.py [rounds]
+
+import contextlib
+import html
+import io
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uppair
+from fixtures import FILE_NAME__ARCHIVE_INDEX, FILE_NAME__ARCHIVE_VERSION_INDEX, FILE_NAME__CONTRIB_LISTING, FILE_NAME__LATEST_INDEX, FILE_NAME__LATEST_PACKAGE_METADATA, load__fixture
+
+# -------- regex path, as it was in uppair before the HTML parsers,
+# with version constraints of dependencies kept and their operators normalized, as uppair does since it solves them
+
+RE = {key: re.compile(value, re.IGNORECASE | re.DOTALL) for key, value in {
+  "LATEST_INDEX__ALL_TD": r'<td.*?<a(.*?)</td>',
+  "LATEST_INDEX__PACKAGE_NAME": r'<span.*?>(.*?)</span>',
+  "LATEST_INDEX__URL": r'href.*?=.*?"(.*?)"',
+  "ARCHIVE_INDEX__ALL_TR": r'<tr.*?<td.*?<a(.*?)</a>.*?</tr>',
+  "ARCHIVE_INDEX__URL": r'href.*?=.*?"(.*?)"',
+  "ARCHIVE_INDEX__PACKAGE_NAME": r'>(.*?)[/]?$',
+  "LATEST_META__TABLE": r'<table(.*?)</table>',
+  "LATEST_META__VERSION": r'<tr.*?<td.*?version.*?</td>.*?<td>(.*?)</td>.*?</tr>',
+  "LATEST_META__DATE": r'<tr.*?<td.*?published.*?</td>.*?<td>(.*?)</td>.*?</tr>',
+  "LATEST_META__DEPENDENCIES": r'<tr.*?<td.*?depend.*?</td>.*?<td>(.*?)</td>.*?</tr>',
+  "LATEST_META__DEPENDENCY_R": r'R.*?(=|<|>|>=|<=|≥|≤).*?(\d+(?:[.]\d+)*)',
+  "LATEST_META__SPAN_ITEM": r'<span.*?>(.*?)</span>.*?(?:\(\s*([<>=!≥≤]+)\s*([^)\s]+)\s*\))?$',
+  "LATEST_META__IMPORTS": r'<tr.*?<td.*?import.*?</td>.*?<td>(.*?)</td>.*?</tr>',
+  "LATEST_META__LINKS": r'<tr.*?<td.*?linking.*?</td>.*?<td>(.*?)</td>.*?</tr>',
+  "ARCHIVE__VERSION_INDEX__ALL_TR": r'<tr.*?<a.*?href.*?=.*?"([^"]*?[.]tar[.]gz)".*?<td.*?>(.*?)</td>.*?</tr>',
+  "ARCHIVE__VERSION_INDEX__VERSION": r'.*?_(.*?).tar.gz'
+}.items()}
+
+DICT__OPERATORS = {"≥": ">=", "≤": "<=", "=": "=="}
+
+def regex__parse__latest_index(str__HTML):
+  dict__latest_index = {}
+  for td_item in RE["LATEST_INDEX__ALL_TD"].findall(str__HTML):
+    package_name = RE["LATEST_INDEX__PACKAGE_NAME"].findall(td_item)
+    relative_URL = RE["LATEST_INDEX__URL"].findall(td_item)
+    if package_name and relative_URL:
+      dict__latest_index[package_name[0]] = relative_URL[0]
+  return dict__latest_index
+
+def regex__parse__archive_index(str__HTML):
+  dict__archive_index = {}
+  for tr_item in RE["ARCHIVE_INDEX__ALL_TR"].findall(str__HTML):
+    relative_URL = RE["ARCHIVE_INDEX__URL"].findall(tr_item)
+    package_name = RE["ARCHIVE_INDEX__PACKAGE_NAME"].findall(tr_item)
+    if relative_URL and package_name:
+      dict__archive_index[package_name[0]] = relative_URL[0]
+  return dict__archive_index
+
+def regex__parse__archive_package_version(str__HTML):
+  dict__archive_package_version = {}
+  for tr_item in RE["ARCHIVE__VERSION_INDEX__ALL_TR"].findall(str__HTML):
+    str__version = RE["ARCHIVE__VERSION_INDEX__VERSION"].findall(tr_item[0])[0]
+    dict__archive_package_version[str__version] = {
+      "date": tr_item[1].strip().split(" ")[0],
+      "relative_URL": tr_item[0]
+    }
+  return dict__archive_package_version
+
+def regex__parse__contrib_listing(str__HTML):
+  dict__contrib_listing = {}
+  for tr_item in RE["ARCHIVE__VERSION_INDEX__ALL_TR"].findall(str__HTML):
+    package_name, _, str__version = os.path.basename(tr_item[0])[:-len(".tar.gz")].partition("_")
+    dict__contrib_listing[package_name] = {
+      "version": str__version,
+      "date": tr_item[1].strip().split(" ")[0]
+    }
+  return dict__contrib_listing
+
+def regex__parse__latest_package_metadata(str__HTML):
+  table__info = RE["LATEST_META__TABLE"].findall(str__HTML)[0]
+  limitation_of_R_version = None
+  def items(key, if__check_R):
+    nonlocal limitation_of_R_version
+    list__items = []
+    list__raw = RE[key].findall(table__info)
+    if len(list__raw) > 0:
+      for tmp_item in list__raw[0].split(","):
+        tmp_item = tmp_item.strip()
+        if if__check_R and (len(RE["LATEST_META__DEPENDENCY_R"].findall(tmp_item)) > 0):
+          str__operator, str__version = RE["LATEST_META__DEPENDENCY_R"].findall(tmp_item)[0]
+          limitation_of_R_version = (DICT__OPERATORS.get(str__operator, str__operator), str__version)
+          continue
+        item = RE["LATEST_META__SPAN_ITEM"].findall(tmp_item)
+        if len(item) > 0:
+          package_name, str__operator, str__version = item[0]
+          list__items.append(package_name if str__operator == "" else f"{package_name} ({DICT__OPERATORS.get(str__operator, str__operator)} {str__version})")
+    return list__items
+  list__dependencies = items("LATEST_META__DEPENDENCIES", True)
+  return {
+    "version": RE["LATEST_META__VERSION"].findall(table__info)[0],
+    "date": RE["LATEST_META__DATE"].findall(table__info)[0],
+    "limitation_of_R_version": limitation_of_R_version,
+    "dependencies": list__dependencies,
+    "imports": items("LATEST_META__IMPORTS", False),
+    "links": items("LATEST_META__LINKS", False)
+  }
+
+# -------- benchmark
+
+LIST__CASES = [
+  (FILE_NAME__LATEST_INDEX, regex__parse__latest_index, uppair.parse__latest_index),
+  (FILE_NAME__ARCHIVE_INDEX, regex__parse__archive_index, uppair.parse__archive_index),
+  (FILE_NAME__CONTRIB_LISTING, regex__parse__contrib_listing, uppair.parse__contrib_listing),
+  (FILE_NAME__ARCHIVE_VERSION_INDEX, regex__parse__archive_package_version, uppair.parse__archive_package_version),
+  (FILE_NAME__LATEST_PACKAGE_METADATA, regex__parse__latest_package_metadata, uppair.parse__latest_package_metadata)
+]
+
+def render__rows_without_links(int__rows):
+  # an index page whose rows carry no link (e.g. a listing being rewritten, or an error page made of a table):
+  # every `<tr` makes the lazy regex scan to the end of the page before giving up
+  return "<html><body><table>\n" + "".join([f"<tr><td>row {index}</td><td>2024-01-01 00:00</td></tr>\n" for index in range(int__rows)]) + "</table></body></html>\n"
+
+def measure(func__parse, str__HTML, int__rounds):
+  # -> (best seconds, peak bytes allocated, result)
+  float__best = None
+  with contextlib.redirect_stdout(io.StringIO()):
+    for _ in range(int__rounds):
+      float__start = time.perf_counter()
+      result = func__parse(str__HTML)
+      float__elapsed = time.perf_counter() - float__start
+      if (float__best == None) or (float__elapsed < float__best):
+        float__best = float__elapsed
+    tracemalloc.start()
+    func__parse(str__HTML)
+    _, int__peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+  return float__best, int__peak, result
+
+if __name__ == "__main__":
+  int__rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+  uppair.initialize__RE()
+
+  print(f"\n{'page':<32}{'size':>10}{'regex':>12}{'parser':>12}{'regex peak':>14}{'parser peak':>14}  same output")
+  for file_name, func__regex, func__parser in LIST__CASES:
+    str__HTML = load__fixture(file_name)
+    # the regex path parsed pages after `html.unescape` of the whole page
+    float__regex, int__regex_peak, result__regex = measure(lambda str__HTML: func__regex(html.unescape(str__HTML)), str__HTML, int__rounds)
+    float__parser, int__parser_peak, result__parser = measure(lambda str__HTML: func__parser([str__HTML]), str__HTML, int__rounds)
+    print(f"{file_name:<32}{len(str__HTML) // 1024:>8}KB{float__regex * 1000:>10.1f}ms{float__parser * 1000:>10.1f}ms{int__regex_peak // 1024:>12}KB{int__parser_peak // 1024:>12}KB  {result__regex == result__parser}")
+
+  print(f"\n{'rows without links':<32}{'size':>10}{'regex':>12}{'parser':>12}")
+  for int__rows in [100, 200, 400]:
+    str__HTML = render__rows_without_links(int__rows)
+    float__regex, _, _ = measure(lambda str__HTML: regex__parse__archive_index(html.unescape(str__HTML)), str__HTML, 1)
+    float__parser, _, _ = measure(lambda str__HTML: uppair.parse__archive_index([str__HTML]), str__HTML, 1)
+    print(f"{int__rows:<32}{len(str__HTML) // 1024:>8}KB{float__regex * 1000:>10.1f}ms{float__parser * 1000:>10.1f}ms")
@@ -0,0 +1,473 @@
+# a CRAN stand-in for benchmarks: the versions, dates and dependencies of the packages `NPCD`, `CDM` and `GDINA` depend on,
+# laid out as CRAN with package pages, archive listings, `PACKAGES(.gz)`, `Meta/archive.rds` and small synthetic tarballs
+#
+# generated into `bench/fixtures/cran/` on first use, the same on every run for the same arguments
+
+import calendar
+import gzip
+import hashlib
+import io
+import os
+import random
+import shutil
+import struct
+import tarfile
+import time
+from datetime import date
+
+from fixtures import PATH_FIXTURES, render__listing
+
+PATH_CORPUS = os.path.join(PATH_FIXTURES, "cran")
+
+LIST__ROOTS = ["NPCD@1.0-11", "CDM@7.5-15", "GDINA@2.8.8"]
+"""roots resolved by the benchmarks"""
+
+DICT__PACKAGES = {
+  "NPCD": [
+    ("1.0-10", "2016-05-01", "R (>= 3.0.0)", "Rcpp, MASS, stats, utils, graphics", ""),
+    ("1.0-11", "2017-02-20", "R (>= 3.0.0)", "Rcpp (>= 0.12.0), MASS, stats, utils, graphics, R.methodsS3", "")
+  ],
+  "CDM": [
+    ("7.4-19", "2019-10-01", "mvtnorm, polycor", "graphics, methods, Rcpp, stats, utils", "Rcpp, RcppArmadillo"),
+    ("7.5-15", "2020-03-10", "mvtnorm, polycor", "graphics, methods, Rcpp, stats, utils", "Rcpp, RcppArmadillo")
+  ],
+  "GDINA": [
+    ("2.8.0", "2020-06-01", "", "alabama, graphics, MASS, nloptr, numDeriv, Rcpp, Rsolnp, stats, utils, ggplot2", "Rcpp, RcppArmadillo"),
+    ("2.8.8", "2021-01-15", "", "alabama, graphics, ggplot2, MASS, nloptr, numDeriv, Rcpp, Rsolnp, stats, utils, rlang (>= 0.4.10)", "Rcpp, RcppArmadillo")
+  ],
+  "Rcpp": [
+    ("0.12.0", "2015-07-25", "", "methods, utils", ""),
+    ("0.12.19", "2018-10-01", "", "methods, utils", ""),
+    ("1.0.5", "2020-07-06", "", "methods, utils", ""),
+    ("1.0.11", "2023-07-06", "", "methods, utils", "")
+  ],
+  "RcppArmadillo": [
+    ("0.9.100.5.0", "2018-08-01", "", "Rcpp (>= 0.11.0), stats, utils, methods", "Rcpp"),
+    ("0.10.1.2.0", "2020-11-16", "", "Rcpp (>= 0.11.0), stats, utils, methods", "Rcpp")
+  ],
+  "MASS": [
+    ("7.3-45", "2016-04-21", "R (>= 3.1.0), grDevices, graphics, stats, utils", "methods", ""),
+    ("7.3-53", "2020-09-09", "R (>= 3.3.0), grDevices, graphics, stats, utils", "methods", ""),
+    ("7.3-60", "2023-05-04", "R (>= 4.0), grDevices, graphics, stats, utils", "methods", "")
+  ],
+  "R.methodsS3": [
+    ("1.7.1", "2016-02-16", "R (>= 2.13.0)", "utils", ""),
+    ("1.8.2", "2022-06-13", "R (>= 2.13.0)", "utils", "")
+  ],
+  "mvtnorm": [
+    ("1.0-5", "2016-02-02", "R(>= 1.9.0)", "stats, methods", ""),
+    ("1.1-1", "2020-06-09", "R(>= 3.5.0)", "stats, methods", ""),
+    ("1.2-3", "2023-08-25", "R(>= 3.5.0)", "stats", "")
+  ],
+  "polycor": [
+    ("0.7-8", "2010-04-03", "", "mvtnorm, stats", ""),
+    ("0.7-10", "2019-08-05", "", "stats, mvtnorm, admisc", "")
+  ],
+  "admisc": [
+    ("0.1", "2019-07-01", "R (>= 3.5.0)", "methods", ""),
+    ("0.33", "2023-07-10", "R (>= 3.5.0)", "methods", "")
+  ],
+  "alabama": [
+    ("2015.3-1", "2015-03-06", "R (>= 2.10.1), numDeriv", "", "")
+  ],
+  "numDeriv": [
+    ("2014.2-1", "2014-02-05", "R (>= 2.11.1)", "", ""),
+    ("2016.8-1.1", "2019-06-06", "R (>= 2.11.1)", "", "")
+  ],
+  "nloptr": [
+    ("1.0.4", "2014-08-04", "", "", ""),
+    ("1.2.2.2", "2020-07-02", "", "testthat", ""),
+    ("2.0.3", "2022-05-26", "", "testthat", "testthat")
+  ],
+  "testthat": [
+    ("2.0.0", "2017-12-13", "R (>= 3.1)", "cli, digest, methods, rlang (>= 0.1.0), withr (>= 2.0.0)", ""),
+    ("3.0.0", "2020-10-31", "R (>= 3.1)", "cli, digest, methods, rlang (>= 0.4.9), withr (>= 2.3.0)", "")
+  ],
+  "Rsolnp": [
+    ("1.16", "2015-12-28", "R (>= 2.10.0)", "truncnorm, parallel, stats", "")
+  ],
+  "truncnorm": [
+    ("1.0-7", "2014-01-21", "R (>= 3.0.0)", "", ""),
+    ("1.0-9", "2023-03-20", "R (>= 3.4.0)", "", "")
+  ],
+  "ggplot2": [
+    ("2.2.1", "2016-12-30", "R (>= 3.1)", "digest, grid, gtable (>= 0.1.1), MASS, plyr (>= 1.7.1), reshape2, scales (>= 0.4.1), stats, tibble, lazyeval", ""),
+    ("3.3.3", "2020-12-30", "R (>= 3.3)", "digest, glue, grDevices, grid, gtable (>= 0.1.1), isoband, MASS, mgcv, rlang (>= 0.4.10), scales (>= 0.5.0), stats, tibble, withr (>= 2.0.0)", ""),
+    ("3.4.4", "2023-10-12", "R (>= 3.3)", "cli, glue, grDevices, grid, gtable (>= 0.1.1), isoband, lifecycle (> 1.0.1), MASS, mgcv, rlang (>= 1.1.0), scales (>= 1.2.0), stats, tibble, vctrs (>= 0.5.0), withr (>= 2.5.0)", "")
+  ],
+  "digest": [
+    ("0.6.10", "2016-08-02", "R (>= 2.4.1)", "", ""),
+    ("0.6.27", "2020-10-17", "R (>= 3.1.0)", "utils", ""),
+    ("0.6.33", "2023-07-07", "R (>= 3.3.0)", "utils", "")
+  ],
+  "glue": [
+    ("1.4.2", "2020-08-27", "R (>= 3.2)", "methods", ""),
+    ("1.6.2", "2022-02-24", "R (>= 3.4)", "methods", "")
+  ],
+  "gtable": [
+    ("0.2.0", "2016-02-26", "R (>= 2.14)", "grid", ""),
+    ("0.3.0", "2019-03-25", "R (>= 3.0)", "grid", ""),
+    ("0.3.4", "2023-08-21", "R (>= 3.5)", "cli, glue, grid, lifecycle, rlang (>= 1.1.0)", "")
+  ],
+  "isoband": [
+    ("0.2.3", "2020-12-01", "", "grid, utils", ""),
+    ("0.2.7", "2022-12-20", "", "grid, utils", "")
+  ],
+  "mgcv": [
+    ("1.8-33", "2020-08-27", "R (>= 2.14.0), nlme (>= 3.1-64)", "methods, stats, graphics, Matrix, splines, utils", ""),
+    ("1.9-0", "2023-07-11", "R (>= 3.6.0), nlme (>= 3.1-64)", "methods, stats, graphics, Matrix, splines, utils", "")
+  ],
+  "nlme": [
+    ("3.1-151", "2020-12-10", "R (>= 3.4.0)", "graphics, stats, utils, lattice", ""),
+    ("3.1-163", "2023-08-09", "R (>= 3.5.0)", "graphics, stats, utils, lattice", "")
+  ],
+  "Matrix": [
+    ("1.2-18", "2019-11-27", "R (>= 3.2.0)", "methods, graphics, grid, stats, utils, lattice", ""),
+    ("1.6-1", "2023-08-14", "R (>= 3.5.0)", "methods, graphics, grid, stats, utils, lattice", "")
+  ],
+  "lattice": [
+    ("0.20-41", "2020-04-02", "R (>= 3.0.0)", "grid, grDevices, graphics, stats, utils", ""),
+    ("0.21-8", "2023-04-05", "R (>= 4.0.0)", "grid, grDevices, graphics, stats, utils", "")
+  ],
+  "rlang": [
+    ("0.1.0", "2017-05-06", "R (>= 3.1.0)", "", ""),
+    ("0.4.10", "2020-12-30", "R (>= 3.3.0)", "utils", ""),
+    ("1.1.1", "2023-04-28", "R (>= 3.5.0)", "utils", "")
+  ],
+  "scales": [
+    ("0.4.1", "2016-11-09", "R (>= 2.13)", "RColorBrewer, dichromat, plyr, munsell (>= 0.2), labeling, Rcpp", "Rcpp"),
+    ("1.1.1", "2020-05-11", "R (>= 3.2)", "farver (>= 2.0.3), labeling, lifecycle, munsell (>= 0.5), R6, RColorBrewer, viridisLite", ""),
+    ("1.2.1", "2022-08-20", "R (>= 3.2)", "farver (>= 2.0.3), labeling, lifecycle, munsell (>= 0.5), R6, RColorBrewer, rlang (>= 1.0.0), viridisLite", "")
+  ],
+  "tibble": [
+    ("1.2", "2016-08-26", "R (>= 3.1.2)", "methods, assertthat, utils, lazyeval (>= 0.1.10), Rcpp", "Rcpp"),
+    ("3.0.4", "2020-10-12", "R (>= 3.1.0)", "cli, crayon (>= 1.3.4), ellipsis (>= 0.2.0), fansi (>= 0.4.0), lifecycle (>= 0.2.0), magrittr, methods, pillar (>= 1.4.3), pkgconfig, rlang (>= 0.4.3), utils, vctrs (>= 0.3.2)", ""),
+    ("3.2.1", "2023-03-20", "R (>= 3.4.0)", "fansi (>= 0.4.0), lifecycle (>= 1.0.0), magrittr, methods, pillar (>= 1.8.1), pkgconfig, rlang (>= 1.0.2), utils, vctrs (>= 0.4.2)", "")
+  ],
+  "withr": [
+    ("2.0.0", "2017-07-28", "R (>= 3.0.2)", "graphics, grDevices, stats", ""),
+    ("2.3.0", "2020-09-22", "R (>= 3.2.0)", "graphics, grDevices, stats", ""),
+    ("2.5.0", "2022-03-15", "R (>= 3.2.0)", "graphics, grDevices, stats", "")
+  ],
+  "cli": [
+    ("2.2.0", "2020-11-20", "R (>= 2.10)", "assertthat, crayon (>= 1.3.4), glue, methods, utils, fansi", ""),
+    ("3.6.1", "2023-03-23", "R (>= 3.4)", "utils", "")
+  ],
+  "lifecycle": [
+    ("0.2.0", "2020-03-06", "R (>= 3.2)", "glue, rlang (>= 0.4.0)", ""),
+    ("1.0.3", "2022-10-07", "R (>= 3.4)", "cli (>= 3.4.0), glue, rlang (>= 1.0.6)", "")
+  ],
+  "vctrs": [
+    ("0.3.6", "2020-12-17", "R (>= 3.2)", "ellipsis (>= 0.2.0), digest, glue, rlang (>= 0.4.10)", ""),
+    ("0.6.3", "2023-06-14", "R (>= 3.5.0)", "cli (>= 3.4.0), glue, lifecycle (>= 1.0.3), rlang (>= 1.1.0)", "")
+  ],
+  "ellipsis": [
+    ("0.3.1", "2020-05-15", "R (>= 3.2)", "rlang (>= 0.3.0)", ""),
+    ("0.3.2", "2021-04-29", "R (>= 3.2)", "rlang (>= 0.3.0)", "")
+  ],
+  "pillar": [
+    ("1.4.7", "2020-11-20", "", "cli, crayon (>= 1.3.4), ellipsis, fansi, lifecycle, rlang (>= 0.3.0), utf8 (>= 1.1.0), utils, vctrs (>= 0.2.0)", ""),
+    ("1.9.0", "2023-03-22", "", "cli (>= 2.3.0), fansi, glue, lifecycle, rlang (>= 1.0.2), utf8 (>= 1.1.0), utils, vctrs (>= 0.5.0)", "")
+  ],
+  "fansi": [
+    ("0.4.1", "2020-01-08", "R (>= 3.1.0)", "grDevices, utils", ""),
+    ("1.0.5", "2023-10-08", "R (>= 3.1.0)", "grDevices, utils", "")
+  ],
+  "utf8": [
+    ("1.1.4", "2018-05-24", "R (>= 2.10)", "", ""),
+    ("1.2.4", "2023-10-22", "R (>= 2.10)", "", "")
+  ],
+  "crayon": [
+    ("1.3.4", "2017-09-16", "", "grDevices, methods, utils", ""),
+    ("1.5.2", "2022-09-29", "", "grDevices, methods, utils", "")
+  ],
+  "assertthat": [
+    ("0.2.1", "2019-03-21", "", "tools", "")
+  ],
+  "magrittr": [
+    ("1.5", "2014-11-22", "", "", ""),
+    ("2.0.3", "2022-03-30", "R (>= 3.4.0)", "", "")
+  ],
+  "pkgconfig": [
+    ("2.0.3", "2019-09-22", "", "utils", "")
+  ],
+  "farver": [
+    ("2.0.3", "2020-01-16", "", "", ""),
+    ("2.1.1", "2022-07-06", "", "", "")
+  ],
+  "labeling": [
+    ("0.3", "2014-08-23", "", "", ""),
+    ("0.4.3", "2023-08-29", "", "stats, graphics", "")
+  ],
+  "munsell": [
+    ("0.4.3", "2016-02-13", "", "colorspace, methods", ""),
+    ("0.5.0", "2018-06-12", "", "colorspace, methods", "")
+  ],
+  "colorspace": [
+    ("1.2-6", "2015-03-11", "R (>= 2.13.0), methods", "graphics, grDevices", ""),
+    ("2.1-0", "2023-01-23", "R (>= 3.0.0), methods", "graphics, grDevices, stats", "")
+  ],
+  "R6": [
+    ("2.5.0", "2020-10-28", "R (>= 3.0)", "", ""),
+    ("2.5.1", "2021-08-19", "R (>= 3.0)", "", "")
+  ],
+  "RColorBrewer": [
+    ("1.1-2", "2014-12-07", "R (>= 2.0.0)", "", ""),
+    ("1.1-3", "2022-04-03", "R (>= 2.0.0)", "", "")
+  ],
+  "viridisLite": [
+    ("0.3.0", "2018-02-01", "R (>= 2.10)", "", ""),
+    ("0.4.2", "2023-05-02", "R (>= 2.10)", "", "")
+  ],
+  "plyr": [
+    ("1.8.4", "2016-06-08", "R (>= 3.1.0)", "Rcpp (>= 0.11.0)", "Rcpp"),
+    ("1.8.9", "2023-10-02", "R (>= 3.1.0)", "Rcpp (>= 0.11.0)", "Rcpp")
+  ],
+  "reshape2": [
+    ("1.4.2", "2016-10-22", "R (>= 3.1)", "plyr (>= 1.8.1), stringr, Rcpp", "Rcpp"),
+    ("1.4.4", "2020-04-09", "R (>= 3.1)", "plyr (>= 1.8.1), Rcpp, stringr", "Rcpp")
+  ],
+  "stringr": [
+    ("1.1.0", "2016-08-19", "R (>= 2.14)", "stringi (>= 0.4.1), magrittr", ""),
+    ("1.5.0", "2022-12-02", "R (>= 3.3)", "cli, glue (>= 1.6.1), lifecycle (>= 1.0.3), magrittr, rlang (>= 1.0.0), stringi (>= 1.5.3), vctrs", "")
+  ],
+  "stringi": [
+    ("1.1.1", "2016-05-27", "R (>= 2.14)", "tools, utils, stats", ""),
+    ("1.7.12", "2023-01-11", "R (>= 3.1)", "tools, utils, stats", "")
+  ],
+  "lazyeval": [
+    ("0.2.0", "2016-06-12", "R (>= 3.1.0)", "", ""),
+    ("0.2.2", "2019-03-15", "R (>= 3.1.0)", "", "")
+  ],
+  "dichromat": [
+    ("2.0-0", "2013-01-24", "R (>= 2.10), stats", "", ""),
+    ("2.0-0.1", "2022-05-02", "R (>= 2.10), stats", "", "")
+  ]
+}
+"""package name -> [(version, date, Depends, Imports, LinkingTo), ...], as recorded from CRAN"""
+
+DICT__SOURCE_SIZES = {"Rcpp": 120_000, "RcppArmadillo": 300_000, "stringi": 400_000}
+"""bytes of source in the tarballs of large packages, 4000 for others"""
+
+# -------- RDS
+
+class Writer__RDS:
+  # R's XDR serialization format, version 2, only what `Meta/archive.rds` is made of
+  def __init__(self):
+    self.buffer = io.BytesIO()
+    self.dict__symbols = {}
+
+  def write__int(self, value):
+    self.buffer.write(struct.pack(">i", value))
+
+  def write__CHARSXP(self, str__value):
+    bytes__value = str__value.encode("utf-8")
+    self.write__int(9 | ((1 << 3) << 12)) # UTF8_MASK
+    self.write__int(len(bytes__value))
+    self.buffer.write(bytes__value)
+
+  def write__symbol(self, name):
+    if name in self.dict__symbols: # REFSXP
+      self.write__int((self.dict__symbols[name] << 8) | 255)
+      return
+    self.dict__symbols[name] = len(self.dict__symbols) + 1
+    self.write__int(1)
+    self.write__CHARSXP(name)
+
+  def write__vector(self, sexptype, list__values, dict__attributes={}, if__object=False):
+    # dict__attributes: name -> function writing the value
+    self.write__int(sexptype | ((1 << 9) if dict__attributes else 0) | ((1 << 8) if if__object else 0))
+    self.write__int(len(list__values))
+    for value in list__values:
+      if sexptype == 16: # STRSXP
+        self.write__CHARSXP(value)
+      elif sexptype in [10, 13]: # LGLSXP, INTSXP
+        self.write__int(value)
+      elif sexptype == 14: # REALSXP
+        self.buffer.write(struct.pack(">d", value))
+      else: # VECSXP, a function writing the item
+        value()
+    for name, func__write in dict__attributes.items():
+      self.write__int(2 | (1 << 10)) # LISTSXP with a tag
+      self.write__symbol(name)
+      func__write()
+    if dict__attributes:
+      self.write__int(254)
+
+  def get__bytes(self):
+    return gzip.compress(b"X\n" + struct.pack(">iii", 2, 0x040201, 0x020300) + self.buffer.getvalue())
+
+def render__archive_rds(list__archived):
+  # list__archived: [(package name, [(file name, size, mtime), ...]), ...] -> gzipped RDS, as `tools:::CRAN_archive_db()` saves it
+  writer = Writer__RDS()
+  def write__data_frame(package_name, list__files):
+    int__rows = len(list__files)
+    def write__POSIXct():
+      writer.write__vector(14, [float(mtime) for _, _, mtime in list__files], {"class": lambda: writer.write__vector(16, ["POSIXct", "POSIXt"])}, True)
+    dict__columns = {
+      "size": lambda: writer.write__vector(14, [float(size) for _, size, _ in list__files]),
+      "isdir": lambda: writer.write__vector(10, [0] * int__rows),
+      "mode": lambda: writer.write__vector(13, [0o644] * int__rows, {"class": lambda: writer.write__vector(16, ["octmode"])}, True),
+      "mtime": write__POSIXct,
+      "ctime": write__POSIXct,
+      "atime": write__POSIXct
+    }
+    writer.write__vector(19, list(dict__columns.values()), {
+      "names": lambda: writer.write__vector(16, list(dict__columns)),
+      "class": lambda: writer.write__vector(16, ["data.frame"]),
+      "row.names": lambda: writer.write__vector(16, [f"{package_name}/{file_name}" for file_name, _, _ in list__files])
+    }, True)
+  writer.write__vector(19, [lambda item=item: write__data_frame(*item) for item in list__archived], {
+    "names": lambda: writer.write__vector(16, [package_name for package_name, _ in list__archived])
+  })
+  return writer.get__bytes()
+
+# -------- package files
+
+def get__timestamp(str__date):
+  return calendar.timegm(time.strptime(str__date, "%Y-%m-%d")) + 12 * 3600
+
+def render__DESCRIPTION(package_name, str__version, str__date, str__depends, str__imports, str__links):
+  list__lines = [f"Package: {package_name}", "Type: Package", f"Title: The {package_name} package", f"Version: {str__version}", f"Date: {str__date}"]
+  for field, str__value in [("Depends", str__depends), ("Imports", str__imports), ("LinkingTo", str__links)]:
+    if str__value != "": # continuation lines, as long fields are folded
+      list__lines.append(f"{field}: " + ",\n        ".join(item.strip() for item in str__value.split(",")))
+  list__lines += [
+    "License: GPL (>= 2)", "NeedsCompilation: yes", f"Packaged: {str__date} 10:00:00 UTC; maint",
+    "Repository: CRAN", f"Date/Publication: {str__date} 12:00:00 UTC"
+  ]
+  return "\n".join(list__lines) + "\n"
+
+def write__tarball(path__file, package_name, str__version, str__date, str__depends, str__imports, str__links, rng):
+  # -> bytes of the tarball
+  int__mtime = get__timestamp(str__date)
+  buffer = io.BytesIO()
+  with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+    info = tarfile.TarInfo(package_name)
+    info.type = tarfile.DIRTYPE
+    info.mode = 0o755
+    info.mtime = int__mtime
+    tar.addfile(info)
+    for file_name, bytes__content in [
+      ("DESCRIPTION", render__DESCRIPTION(package_name, str__version, str__date, str__depends, str__imports, str__links).encode("utf-8")),
+      ("NAMESPACE", b"exportPattern('.')\n"),
+      ("R/code.R", b"f <- function() 1\n" * 50),
+      ("src/source.bin", rng.randbytes(DICT__SOURCE_SIZES.get(package_name, 4000)))
+    ]:
+      info = tarfile.TarInfo(f"{package_name}/{file_name}")
+      info.size = len(bytes__content)
+      info.mtime = int__mtime
+      tar.addfile(info, io.BytesIO(bytes__content))
+  with open(path__file, "wb") as f:
+    f.write(buffer.getvalue())
+  return buffer.getvalue()
+
+def render__package_page(package_name, str__version, str__date, str__depends, str__imports, str__links):
+  def render__items(str__items):
+    list__rendered = []
+    for item in [item.strip() for item in str__items.split(",") if item.strip() != ""]:
+      item_name, _, limitation = item.partition("(")
+      str__limitation = f" ({limitation.replace('>=', '&ge;').replace('<=', '&le;').replace('>', '&gt;').replace('<', '&lt;')}" if limitation else ""
+      if item_name.strip() == "R":
+        list__rendered.append(f"R{str__limitation}")
+      else:
+        list__rendered.append(f"<a href=\"../{item_name.strip()}/index.html\"><span class=\"CRAN\">{item_name.strip()}</span></a>{str__limitation}")
+    return ", ".join(list__rendered)
+
+  list__rows = [("Version:", str__version)]
+  for label, str__items in [("Depends:", str__depends), ("Imports:", str__imports), ("LinkingTo:", str__links)]:
+    if str__items != "":
+      list__rows.append((label, render__items(str__items)))
+  list__rows += [("Published:", str__date), ("Author:", "Someone [aut, cre]"), ("License:", "GPL-2 | GPL-3")]
+  return (
+    f"<!DOCTYPE html>\n<html>\n<head>\n<title>CRAN: Package {package_name}</title>\n</head>\n<body>\n<div class=\"container\">\n" + 
+    f"<h2>{package_name}: The {package_name} package</h2>\n<p>Does things.</p>\n<table>\n" + 
+    "\n".join(f"<tr>\n<td>{label}</td>\n<td>{value}</td>\n</tr>" for label, value in list__rows) + 
+    f"\n</table>\n<h4>Downloads:</h4>\n<table>\n<tr>\n<td> Package&nbsp;source: </td>\n<td> <a href=\"../../../src/contrib/{package_name}_{str__version}.tar.gz\"> {package_name}_{str__version}.tar.gz </a> </td>\n</tr>\n</table>\n</div>\n</body>\n</html>\n"
+  )
+
+# -------- corpus
+
+def get__packages(int__extra_packages, seed):
+  # the recorded packages, plus synthetic ones depending on random earlier packages to make the indexes wider
+  rng = random.Random(seed)
+  dict__packages = dict(DICT__PACKAGES)
+  list__names = list(dict__packages)
+  for index in range(int__extra_packages):
+    list__versions = []
+    for int__major in range(rng.randint(1, 4)):
+      str__date = date(2012 + int__major * 3 + rng.randint(0, 2), rng.randint(1, 12), rng.randint(1, 28)).isoformat()
+      list__versions.append((f"{int__major + 1}.{rng.randint(0, 9)}-{rng.randint(1, 20)}", str__date, "R (>= 3.0.0)", ", ".join(rng.sample(list__names, rng.randint(0, 5))), ""))
+    dict__packages[f"synth{index:04d}"] = list__versions
+    list__names.append(f"synth{index:04d}")
+  return dict__packages
+
+def generate__corpus(path__corpus=PATH_CORPUS, int__extra_packages=0, seed=1):
+  rng = random.Random(seed)
+  if os.path.exists(path__corpus):
+    shutil.rmtree(path__corpus)
+  path__contrib = os.path.join(path__corpus, "src", "contrib")
+  path__web = os.path.join(path__corpus, "web", "packages")
+  os.makedirs(os.path.join(path__contrib, "Archive"))
+  os.makedirs(os.path.join(path__contrib, "Meta"))
+  os.makedirs(path__web)
+
+  dict__packages = get__packages(int__extra_packages, seed)
+  list__package_names = sorted(dict__packages, key=str.lower)
+  list__contrib_rows, list__archive_rows, list__PACKAGES, list__archived = [], [], [], []
+  for package_name in list__package_names:
+    list__versions = sorted(dict__packages[package_name], key=lambda version: version[1])
+    latest = list__versions[-1]
+
+    bytes__tarball = write__tarball(os.path.join(path__contrib, f"{package_name}_{latest[0]}.tar.gz"), package_name, *latest, rng)
+    list__contrib_rows.append((f"{package_name}_{latest[0]}.tar.gz", f"{latest[1]} 12:00", f"{len(bytes__tarball) // 1024}K", "compressed"))
+    list__fields = [f"Package: {package_name}", f"Version: {latest[0]}"]
+    for field, str__value in [("Depends", latest[2]), ("Imports", latest[3]), ("LinkingTo", latest[4])]:
+      if str__value != "":
+        list__fields.append(f"{field}: {str__value}")
+    list__fields += ["License: GPL (>= 2)", f"MD5sum: {hashlib.md5(bytes__tarball).hexdigest()}", "NeedsCompilation: yes"]
+    list__PACKAGES.append("\n".join(list__fields))
+
+    os.makedirs(os.path.join(path__web, package_name))
+    with open(os.path.join(path__web, package_name, "index.html"), "w", encoding="utf-8") as f:
+      f.write(render__package_page(package_name, *latest))
+
+    if len(list__versions) > 1:
+      path__archive = os.path.join(path__contrib, "Archive", package_name)
+      os.makedirs(path__archive)
+      list__rows, list__files = [], []
+      for version in list__versions[:-1]:
+        file_name = f"{package_name}_{version[0]}.tar.gz"
+        bytes__tarball = write__tarball(os.path.join(path__archive, file_name), package_name, *version, rng)
+        list__rows.append((file_name, f"{version[1]} 12:00", f"{len(bytes__tarball) // 1024}K", "compressed"))
+        list__files.append((file_name, len(bytes__tarball), get__timestamp(version[1])))
+      with open(os.path.join(path__archive, "index.html"), "w", encoding="utf-8") as f:
+        f.write(render__listing(f"/src/contrib/Archive/{package_name}", list__rows))
+      list__archive_rows.append((f"{package_name}/", f"{list__versions[-2][1]} 12:00", "-", "folder"))
+      list__archived.append((package_name, list__files))
+
+  with open(os.path.join(path__contrib, "Archive", "index.html"), "w", encoding="utf-8") as f:
+    f.write(render__listing("/src/contrib/Archive", list__archive_rows))
+  with open(os.path.join(path__contrib, "index.html"), "w", encoding="utf-8") as f:
+    f.write(render__listing("/src/contrib", [("Archive/", "2024-01-01 00:00", "-", "folder"), ("Meta/", "2024-01-01 00:00", "-", "folder")] + list__contrib_rows))
+  str__PACKAGES = "\n\n".join(list__PACKAGES) + "\n"
+  with open(os.path.join(path__contrib, "PACKAGES"), "w", encoding="utf-8") as f:
+    f.write(str__PACKAGES)
+  with open(os.path.join(path__contrib, "PACKAGES.gz"), "wb") as f:
+    f.write(gzip.compress(str__PACKAGES.encode("utf-8")))
+  with open(os.path.join(path__contrib, "Meta", "archive.rds"), "wb") as f:
+    f.write(render__archive_rds(list__archived))
+  with open(os.path.join(path__web, "available_packages_by_name.html"), "w", encoding="utf-8") as f:
+    f.write(
+      "<!DOCTYPE html>\n<html>\n<head>\n<title>CRAN: Available Packages By Name</title>\n</head>\n<body>\n<div class=\"container\">\n" + 
+      "<h1>Available CRAN Packages By Name</h1>\n<table summary=\"Available CRAN packages by name.\">\n" + 
+      "".join(f"<tr id=\"available-packages-{package_name[0]}\">\n<td><a href=\"../../web/packages/{package_name}/index.html\"><span class=\"CRAN\">{package_name}</span></a></td>\n<td>The {package_name} package for doing things &amp; stuff</td>\n</tr>\n" for package_name in list__package_names) + 
+      "</table>\n</div>\n</body>\n</html>\n"
+    )
+
+def load__corpus(int__extra_packages=0):
+  # -> directory of the corpus, generated if missing or generated with another number of synthetic packages
+  path__corpus = PATH_CORPUS if int__extra_packages == 0 else f"{PATH_CORPUS}_{int__extra_packages}"
+  if not os.path.exists(os.path.join(path__corpus, "src", "contrib", "Meta", "archive.rds")):
+    generate__corpus(path__corpus, int__extra_packages)
+  return path__corpus
@@ -0,0 +1,104 @@
+# fixture pages with the layout of CRAN's, for benchmarks
+#
+# real pages saved from CRAN can be put into `bench/fixtures/` under the same file names,
+# otherwise synthetic ones are generated there on first use
+
+import os
+import random
+
+PATH_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+FILE_NAME__LATEST_INDEX = "available_packages_by_name.html"
+FILE_NAME__ARCHIVE_INDEX = "archive_index.html"
+FILE_NAME__ARCHIVE_VERSION_INDEX = "archive_version_index.html"
+FILE_NAME__CONTRIB_LISTING = "contrib_listing.html"
+FILE_NAME__LATEST_PACKAGE_METADATA = "latest_package_metadata.html"
+
+def get__package_names(int__packages, seed=0):
+  rng = random.Random(seed)
+  set__names = set()
+  while len(set__names) < int__packages:
+    set__names.add(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz") + "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789.") for _ in range(rng.randint(2, 12))))
+  return sorted(set__names, key=str.lower)
+
+def render__latest_index(list__package_names):
+  list__lines = [
+    "<!DOCTYPE html>\n<html>\n<head>\n<title>CRAN: Available Packages By Name</title>\n</head>\n<body>\n<div class=\"container\">",
+    "<h1>Available CRAN Packages By Name</h1>\n<table summary=\"Available CRAN packages by name.\">"
+  ]
+  for package_name in list__package_names:
+    list__lines.append(
+      f"<tr id=\"available-packages-{package_name[0]}\">\n" + 
+      f"<td><a href=\"../../web/packages/{package_name}/index.html\"><span class=\"CRAN\">{package_name}</span></a></td>\n" + 
+      f"<td>Tools for &lsquo;{package_name}&rsquo; &amp; Friends &lt;doi:10.1000/{len(package_name)}&gt;</td>\n</tr>"
+    )
+  list__lines.append("</table>\n</div>\n</body>\n</html>\n")
+  return "\n".join(list__lines)
+
+def render__listing(str__title, list__rows):
+  # Apache directory listing, rows: (href, last modified, size, icon)
+  list__lines = [
+    f"<!DOCTYPE HTML PUBLIC \"-//W3C//DTD HTML 3.2 Final//EN\">\n<html>\n <head>\n  <title>Index of {str__title}</title>\n </head>\n <body>\n<h1>Index of {str__title}</h1>\n  <table>",
+    "   <tr><th valign=\"top\"><img src=\"/icons/blank.gif\" alt=\"[ICO]\"></th><th><a href=\"?C=N;O=D\">Name</a></th><th><a href=\"?C=M;O=A\">Last modified</a></th><th><a href=\"?C=S;O=A\">Size</a></th><th><a href=\"?C=D;O=A\">Description</a></th></tr>",
+    "   <tr><th colspan=\"5\"><hr></th></tr>",
+    "<tr><td valign=\"top\"><img src=\"/icons/back.gif\" alt=\"[PARENTDIR]\"></td><td><a href=\"/src/contrib/\">Parent Directory</a></td><td>&nbsp;</td><td align=\"right\">  - </td><td>&nbsp;</td></tr>"
+  ]
+  for href, str__date, str__size, icon in list__rows:
+    list__lines.append(f"<tr><td valign=\"top\"><img src=\"/icons/{icon}.gif\" alt=\"[   ]\"></td><td><a href=\"{href}\">{href}</a></td><td align=\"right\">{str__date}  </td><td align=\"right\">{str__size}</td><td>&nbsp;</td></tr>")
+  list__lines.append("   <tr><th colspan=\"5\"><hr></th></tr>\n</table>\n</body></html>\n")
+  return "\n".join(list__lines)
+
+def render__latest_package_metadata(package_name, str__version, str__date, dict__fields):
+  # package page, dict__fields: label -> list of (package name or `None` for R, version limitation or `None`)
+  def render__items(list__items):
+    list__rendered = []
+    for item_name, limitation in list__items:
+      str__limitation = "" if limitation == None else f" (&ge; {limitation})"
+      if item_name == None:
+        list__rendered.append(f"R{str__limitation}")
+      else:
+        list__rendered.append(f"<a href=\"../{item_name}/index.html\"><span class=\"CRAN\">{item_name}</span></a>{str__limitation}")
+    return ", ".join(list__rendered)
+
+  list__rows = [("Version:", str__version)]
+  for label, list__items in dict__fields.items():
+    list__rows.append((label, render__items(list__items)))
+  list__rows += [("Published:", str__date), ("Author:", "Someone [aut, cre]"), ("License:", "<a href=\"../../licenses/GPL-2\">GPL-2</a> | <a href=\"../../licenses/GPL-3\">GPL-3</a>")]
+  return (
+    f"<!DOCTYPE html>\n<html>\n<head>\n<title>CRAN: Package {package_name}</title>\n</head>\n<body>\n<div class=\"container\">\n" + 
+    f"<h2>{package_name}: Tools for {package_name}</h2>\n<p>Does things &amp; more.</p>\n<table>\n" + 
+    "\n".join(f"<tr>\n<td>{label}</td>\n<td>{value}</td>\n</tr>" for label, value in list__rows) + 
+    "\n</table>\n<h4>Reverse dependencies:</h4>\n<table>\n<tr>\n<td>Reverse&nbsp;depends:</td>\n<td><a href=\"../zzz/index.html\"><span class=\"CRAN\">zzz</span></a></td>\n</tr>\n</table>\n</div>\n</body>\n</html>\n"
+  )
+
+def generate__fixtures(int__packages=20000, seed=0):
+  rng = random.Random(seed)
+  list__package_names = get__package_names(int__packages, seed)
+  def random__date():
+    return f"{rng.randint(2005, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+
+  dict__pages = {
+    FILE_NAME__LATEST_INDEX: render__latest_index(list__package_names),
+    FILE_NAME__ARCHIVE_INDEX: render__listing("/src/contrib/Archive", [(f"{package_name}/", random__date(), "-", "folder") for package_name in list__package_names]),
+    FILE_NAME__CONTRIB_LISTING: render__listing("/src/contrib", [(f"{package_name}_{rng.randint(0, 9)}.{rng.randint(0, 20)}-{rng.randint(0, 30)}.tar.gz", random__date(), f"{rng.randint(5, 9000)}K", "compressed") for package_name in list__package_names]),
+    FILE_NAME__ARCHIVE_VERSION_INDEX: render__listing("/src/contrib/Archive/Rcpp", [(f"Rcpp_0.{minor}.{patch}.tar.gz", random__date(), f"{rng.randint(100, 3000)}K", "compressed") for minor in range(8, 13) for patch in range(0, 40)]),
+    FILE_NAME__LATEST_PACKAGE_METADATA: render__latest_package_metadata("ggplot2", "3.4.4", "2023-10-12", {
+      "Depends:": [(None, "3.3")],
+      "Imports:": [(name, None) for name in ["cli", "glue", "grDevices", "grid", "isoband", "MASS", "mgcv", "stats", "tibble"]] + [("gtable", "0.1.1"), ("rlang", "1.1.0"), ("scales", "1.2.0"), ("vctrs", "0.5.0"), ("withr", "2.5.0")],
+      "Suggests:": [(name, None) for name in ["covr", "dplyr", "ggplot2movies", "hexbin", "Hmisc", "knitr", "lattice", "mapproj", "maps", "multcomp"]]
+    })
+  }
+
+  os.makedirs(PATH_FIXTURES, exist_ok=True)
+  for file_name, str__HTML in dict__pages.items():
+    path__file = os.path.join(PATH_FIXTURES, file_name)
+    if not os.path.exists(path__file): # keep pages saved from CRAN
+      with open(path__file, "w", encoding="utf-8") as f:
+        f.write(str__HTML)
+
+def load__fixture(file_name):
+  path__file = os.path.join(PATH_FIXTURES, file_name)
+  if not os.path.exists(path__file):
+    generate__fixtures()
+  with open(path__file, "r", encoding="utf-8") as f:
+    return f.read()
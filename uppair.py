@@ -1,14 +1,37 @@
-from datetime import datetime
+from collections import namedtuple
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+import codecs
+import contextlib
+import email.utils
+import functools
+import gzip
+import hashlib
 import html
+import http.client
+import http.server
+import io
 import json
+import mmap
 import os
+import queue
+import random
 import re
+import secrets
+import shutil
+import signal
+import sqlite3
+import struct
 import sys
 import subprocess
 import tarfile
+import tempfile
+import threading
 import time
+import urllib.error
 import urllib.request
-from urllib.parse import urljoin
+from urllib.parse import unquote, urljoin, urlsplit
 
 # -------- constants
 
@@ -17,42 +40,134 @@ URL__LATEST_INDEX = "https://cloud.r-project.org/web/packages/available_packages
 
 URL__ARCHIVE_INDEX = "https://cran.r-project.org/src/contrib/Archive/"
 
+URL__CONTRIB = "https://cloud.r-project.org/src/contrib/"
+"""where tarballs of latest packages are downloaded from, its listing also gives the date of each of them"""
+URL__PACKAGES = "https://cloud.r-project.org/src/contrib/PACKAGES.gz"
+"""machine-readable metadata (version, dependencies, MD5sum) of all latest packages in one file"""
+URL__ARCHIVE_RDS = "https://cran.r-project.org/src/contrib/Meta/archive.rds"
+"""R serialized list: package name -> `file.info()` data frame of all its archived tarballs"""
+"""all `URL__` above can be pointed to another CRAN mirror, or a local snapshot made by `mirror`, by `--repository=URL|DIR`"""
+
 PATH_STORAGE = "./r_packages"
+PATH_PROCESS_LOG = "./process.log"
+"""output of every R process installing a package, appended once the process ends"""
+PATH_LOCKFILE = "./renv.lock"
+"""every package `tree` resolved, pinned (version, date, tarball URL, MD5sum if CRAN lists one, dependencies) in renv's lockfile format;
+`auto` installs from it without resolving again"""
 PATH_CACHE = "./cache"
-"""to store HTML and index files, so that if you use the script in the same day, it can be reused instead of fetching again"""
+"""to store the metadata store and the output files of each run"""
+PATH_STORE = os.path.join(PATH_CACHE, "metadata.sqlite3")
+"""index of the metadata store: key -> content digest, expiry and last access, so a lookup never scans the directory"""
+PATH_STORE_BLOBS = os.path.join(PATH_CACHE, "blobs")
+"""contents of the metadata store, one file per sha256 digest, shared by entries with the same content"""
+PATH_DAEMON = os.path.join(PATH_CACHE, "daemon.json")
+"""port, token and repository of the `serve` process running from this directory, removed when it stops"""
+
+STORE_TTL__LATEST_INDEX = 6 * 60 * 60 # in seconds
+STORE_TTL__INDEX = 24 * 60 * 60 # archive listings and latest package pages
+STORE_TTL__FOREVER = None # metadata of archived tarballs never changes
+STORE_MAX_SIZE = 512 * 1024 * 1024 # in bytes, least recently used entries are evicted beyond it
+BUILD_CACHE_MAX_SIZE = 4 * 1024 * 1024 * 1024 # in bytes
+"""binary builds of installed packages are kept in the store too, under `build:` keys, and evicted separately beyond this size"""
 
 FETCH_MAX_RETRY = 5
-FETCH_BETWEEN_RETRY = 3 # in seconds
+FETCH_BACKOFF_INITIAL = 1 # in seconds, doubled after every failed try
+FETCH_BACKOFF_MAX = 30 # in seconds
+FETCH_MAX_WORKERS = 8
+"""max number of packages resolved (so requests in flight) at the same time, can be changed by `--fetch-workers=N`"""
+RESOLVE_MAX_WORKERS = 4
+"""max number of environments `resolve__many` resolves at the same time, each with its own fetch workers"""
+FETCH_CHUNK_SIZE = 64 * 1024 # in bytes
+FETCH_PIPELINE_DEPTH = 16 # chunks read ahead of the parser at most
+FETCH_TIMEOUT = 60 # in seconds, for downloads over pooled connections
+FETCH_MAX_REDIRECTS = 5
+
+DAEMON_REFRESH_INTERVAL = 10 * 60 # in seconds, how often `serve` checks whether the indexes it holds expired
+
+INSTALL_MAX_WORKERS = 4
+"""max number of R processes installing packages at the same time, can be changed by `--install-workers=N`"""
+INSTALL_BATCH_SIZE = 16
+"""max number of packages installed by one R session, can be changed by `--install-batch=N`; `1` starts R for every package"""
+INSTALL_STATUS_PREFIX = "uppair-install-status"
+"""R sessions print `<prefix>\t<package name>\t<ok|failed>\t<message>` for each package, read back to tell which ones failed"""
+R_SCRIPT__INSTALL = """
+uppair__install <- function(name, path, version, build) {
+  message <- ""
+  withCallingHandlers(
+    tryCatch(
+      install.packages(
+        path, repos = NULL,
+        type = if (grepl("[.]tar[.]gz$", path)) "source" else "binary",
+        INSTALL_opts = if (build) "--build" else character(0)
+      ),
+      error = function(e) message <<- conditionMessage(e)
+    ),
+    warning = function(w) {
+      message <<- conditionMessage(w)
+      invokeRestart("muffleWarning")
+    }
+  )
+  installed <- tryCatch(packageVersion(name) == package_version(version), error = function(e) FALSE)
+  if (!installed && message == "") message <- "not installed"
+  cat(sprintf("%s\\t%s\\t%s\\t%s\\n", "{prefix}", name, if (installed) "ok" else "failed", gsub("[\\t\\n]", " ", message)))
+}
+"""
+"""script run by `R --vanilla` in a build directory, followed by one `uppair__install(name, path, version, build)` call per package;
+with `build`, `R CMD INSTALL --build` leaves a binary tarball of the package in the directory"""
+R_EXPRESSION__BUILD_TARGET = 'cat(R.version$major, ".", strsplit(R.version$minor, ".", fixed = TRUE)[[1]][1], "\\t", R.version$platform, "\\n", sep = "")'
+"""prints `<major>.<minor>\\t<platform>` of the R installing packages"""
+
+R_RELEASE_DATES = {
+  "3.0.0": "2013-04-03", "3.0.1": "2013-05-16", "3.0.2": "2013-09-25", "3.0.3": "2014-03-06",
+  "3.1.0": "2014-04-10", "3.1.1": "2014-07-10", "3.1.2": "2014-10-31", "3.1.3": "2015-03-09",
+  "3.2.0": "2015-04-16", "3.2.1": "2015-06-18", "3.2.2": "2015-08-14", "3.2.3": "2015-12-10", "3.2.4": "2016-03-10", "3.2.5": "2016-04-14",
+  "3.3.0": "2016-05-03", "3.3.1": "2016-06-21", "3.3.2": "2016-10-31", "3.3.3": "2017-03-06",
+  "3.4.0": "2017-04-21", "3.4.1": "2017-06-30", "3.4.2": "2017-09-28", "3.4.3": "2017-11-30", "3.4.4": "2018-03-15",
+  "3.5.0": "2018-04-23", "3.5.1": "2018-07-02", "3.5.2": "2018-12-20", "3.5.3": "2019-03-11",
+  "3.6.0": "2019-04-26", "3.6.1": "2019-07-05", "3.6.2": "2019-12-12", "3.6.3": "2020-02-29",
+  "4.0.0": "2020-04-24", "4.0.1": "2020-06-06", "4.0.2": "2020-06-22", "4.0.3": "2020-10-10", "4.0.4": "2021-02-15", "4.0.5": "2021-03-31",
+  "4.1.0": "2021-05-18", "4.1.1": "2021-08-10", "4.1.2": "2021-11-01", "4.1.3": "2022-03-10",
+  "4.2.0": "2022-04-22", "4.2.1": "2022-06-23", "4.2.2": "2022-10-31", "4.2.3": "2023-03-15",
+  "4.3.0": "2023-04-21", "4.3.1": "2023-06-16", "4.3.2": "2023-10-31", "4.3.3": "2024-02-29",
+  "4.4.0": "2024-04-24", "4.4.1": "2024-06-14", "4.4.2": "2024-10-31", "4.4.3": "2025-02-28",
+  "4.5.0": "2025-04-11", "4.5.1": "2025-06-13", "4.5.2": "2025-10-31"
+}
+"""recommended packages bundled with an R release are taken as their newest versions on CRAN by its date;
+a release missing here is taken as the newest one listed before it (see `get__R_release_date`)"""
+BASE_PACKAGES = [
+  "base", "compiler", "datasets", "graphics", "grDevices", "grid", "methods",
+  "parallel", "splines", "stats", "stats4", "tcltk", "tools", "utils"
+]
+"""part of R itself (the same set since R 3.0.0), never looked up on CRAN"""
+RECOMMENDED_PACKAGES = [
+  "boot", "class", "cluster", "codetools", "foreign", "KernSmooth", "lattice", "MASS",
+  "Matrix", "mgcv", "nlme", "nnet", "rpart", "spatial", "survival"
+]
+"""installed with R at the versions bundled with the release, so they are only installed from CRAN when a package needs a newer one"""
 
 SEPERATOR_VERSION = "@"
 
 RE = {
   "R_VERSION": r'^(\d+(?:[.]\d+)*)$', # regexp to test R version string; pass: like `4`, `4.2`, `4.2.1`; failed: like `.2`, `4.2.`, `4.2.1.5`, `4.2.1a`
-  "LATEST_INDEX__ALL_TD": r'<td.*?<a(.*?)</td>',
-  "LATEST_INDEX__PACKAGE_NAME": r'<span.*?>(.*?)</span>',
-  "LATEST_INDEX__URL": r'href.*?=.*?"(.*?)"',
-  "ARCHIVE_INDEX__ALL_TR": r'<tr.*?<td.*?<a(.*?)</a>.*?</tr>',
-  "ARCHIVE_INDEX__URL": r'href.*?=.*?"(.*?)"',
-  "ARCHIVE_INDEX__PACKAGE_NAME": r'>(.*?)[/]?$',
-  "LATEST_META__TABLE": r'<table(.*?)</table>',
-  "LATEST_META__VERSION": r'<tr.*?<td.*?version.*?</td>.*?<td>(.*?)</td>.*?</tr>',
-  "LATEST_META__DATE": r'<tr.*?<td.*?published.*?</td>.*?<td>(.*?)</td>.*?</tr>',
-  "LATEST_META__DEPENDENCIES": r'<tr.*?<td.*?depend.*?</td>.*?<td>(.*?)</td>.*?</tr>',
-  "LATEST_META__DEPENDENCY_R": r'R.*?(=|<|>|>=|<=|≥|≤).*?(\d+(?:[.]\d+)*)',
-  "LATEST_META__SPAN_ITEM": r'<span.*?>(.*?)</span>',
-  "LATEST_META__IMPORTS": r'<tr.*?<td.*?import.*?</td>.*?<td>(.*?)</td>.*?</tr>',
-  "LATEST_META__LINKS": r'<tr.*?<td.*?linking.*?</td>.*?<td>(.*?)</td>.*?</tr>',
-  "ARCHIVE__VERSION_INDEX__ALL_TR": r'<tr.*?<a.*?href.*?=.*?"([^"]*?[.]tar[.]gz)".*?<td.*?>(.*?)</td>.*?</tr>',
   "ARCHIVE__VERSION_INDEX__VERSION": r'.*?_(.*?).tar.gz',
-  "DESCRIPTION__DEPENDENCIES": r'depend.*?:(.*?)\n',
-  "DESCRIPTION__IMPORTS": r'import.*?:(.*?)\n',
-  "DESCRIPTION__LINKS": r'link.*?:(.*?)\n'
+  "DEPENDENCY": r'^\s*([\w.]*)\s*(?:\(\s*([<>=!≥≤]+)\s*([^)\s]+)\s*\))?', # `name (op version)` item of `Depends` and the like
+  "VERSION__PARTS": r'\d+', # R versions are numbers separated by `.` or `-`, like `1.0-11`
+  # one token of an HTML page per match, no nested quantifiers so a page is tokenized in linear time:
+  # comment, declaration / processing instruction, tag (`/`, name, attributes) with the text after it, text, `<` that starts nothing
+  "HTML__TOKEN": r'<!--.*?-->|<![^-][^>]*>|<\?[^>]*>|<(/?)([a-z][-\w]*)([^>]*)>([^<]*)|([^<]+|<)',
+  "HTML__ATTRIBUTE": r'([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?'
 }
 
-def initialize__RE():
-  # iterate RE, compile them
+def compile__RE():
+  # iterate RE, compile the ones not compiled yet
   for key, value in RE.items():
-    RE[key] = re.compile(value, re.IGNORECASE | re.DOTALL)
+    if isinstance(value, str):
+      RE[key] = re.compile(value, re.IGNORECASE | re.DOTALL)
+
+compile__RE() # on import, so `Resolver` and `resolve__many` work without the command line set up
+
+def initialize__RE():
+  compile__RE()
   success("ready")
 
 # -------- variables
@@ -60,15 +175,41 @@ def initialize__RE():
 formatted_date__when_start = None
 
 if__using_cache = None
-
-dict__latest_index = {}
-dict__archive_index = {}
+lock__using_cache = threading.Lock()
+
+int__fetch_workers = FETCH_MAX_WORKERS
+int__install_workers = INSTALL_MAX_WORKERS
+int__install_batch_size = INSTALL_BATCH_SIZE
+lock__process_log = threading.Lock()
+dict__idle_connections = {}
+"""(scheme, host) -> keep-alive HTTP connections not in use, shared by every thread for the whole run"""
+dict__connection_stats = {}
+"""host -> numbers of `requests` sent and `connections` opened to it"""
+lock__connections = threading.Lock()
 
 r_start = "R"
-str_R_version = None
-
-dict__dependencies_tree = {}
-list__error_packages = []
+str__R_version = None
+str__R_build_target = None
+"""`<R major.minor>@<platform>` of `r_start`, binary builds are only reused by the same one; `None` if unknown, then builds are not cached"""
+
+dict__MD5sums = {}
+"""tarball URL -> MD5sum listed in CRAN's PACKAGES index, to check downloads; archived tarballs have none"""
+if__fresh = False
+if__daemon_allowed = True
+"""`--no-daemon` resolves in this process even if `serve` is running"""
+lock__daemon = threading.Lock()
+"""held by `serve` while resolving, or swapping refreshed indexes in, so a resolution sees the same indexes throughout"""
+
+store__connection = None
+lock__store = threading.Lock()
+int__store_size = 0
+int__build_cache_size = 0
+
+backend__default = None
+"""`Backend__repository` of the command line (`--repository`), made on first use"""
+lock__backend_default = threading.Lock()
+local__repository = threading.local()
+"""`backend`: the `Backend__repository` the module functions of the thread read from (see `Backend__repository.activate`)"""
 list__tmp_dependencies_info_items = []
 
 # -------- console output
@@ -78,14 +219,157 @@ ANSI_GREEN = "\033[32m"
 ANSI_YELLOW = "\033[33m"
 ANSI_RESET = "\033[0m"
 
+local__output = threading.local()
+"""`stream` and `if__quiet` of the console helpers in the thread (see `output__to`), `sys.stdout` and `--quiet` where not set"""
+
+def if__output_quiet():
+  if__quiet__thread = local__output.__dict__.get("if__quiet")
+  return if__quiet if (if__quiet__thread == None) else if__quiet__thread
+
+def output(content):
+  # printed where the console helpers of this thread write
+  print(content, file=local__output.__dict__.get("stream") or sys.stdout)
+
+@contextlib.contextmanager
+def output__to(stream, if__quiet__thread):
+  # console helpers of this thread write to `stream` (`None` for `sys.stdout`), quiet or not, whatever other threads do
+  tuple__previous = (local__output.__dict__.get("stream"), local__output.__dict__.get("if__quiet"))
+  local__output.stream, local__output.if__quiet = stream, if__quiet__thread
+  try:
+    yield
+  finally:
+    local__output.stream, local__output.if__quiet = tuple__previous
+
+def bind__output(func):
+  # -> `func`, which writes where the console helpers of this thread write, in whichever thread it runs (an executor's)
+  stream, if__quiet__thread = local__output.__dict__.get("stream"), local__output.__dict__.get("if__quiet")
+  @functools.wraps(func)
+  def wrapper(*args, **kwargs):
+    with output__to(stream, if__quiet__thread):
+      return func(*args, **kwargs)
+  return wrapper
+
 def success(content):
-  print(f"{ANSI_GREEN}✔️  {content}{ANSI_RESET}")
+  if not if__output_quiet():
+    output(f"{ANSI_GREEN}✔️  {content}{ANSI_RESET}")
+
+def step(content):
+  # progress of a step, dropped by `--quiet`
+  if not if__output_quiet():
+    output(content)
 
 def warning(content):
-  print(f"{ANSI_YELLOW}❗ {content}{ANSI_RESET}")
+  output(f"{ANSI_YELLOW}❗ {content}{ANSI_RESET}")
 
 def error(content):
-  print(f"{ANSI_RED}❗❗❗  {content}{ANSI_RESET}")
+  output(f"{ANSI_RED}❗❗❗  {content}{ANSI_RESET}")
+
+# -------- instrumentation
+
+if__quiet = False
+"""`--quiet`: progress of each step is not printed, warnings, errors, results and the summary are"""
+path__trace = None
+"""`--trace=PATH`: every span of the run is written there as a Chrome trace (JSON, for `chrome://tracing` or Perfetto)"""
+float__trace_start = time.perf_counter()
+list__trace_events = []
+"""(category, name, start, seconds, CPU seconds, thread id, args) of every span ended, times relative to `float__trace_start`"""
+list__trace_hooks = []
+lock__trace = threading.Lock()
+local__trace = threading.local()
+"""`list__spans`: args of the spans open in the thread, innermost last"""
+
+TRACE_CATEGORIES = ["fetch", "cache", "parse", "tar", "resolve", "install"]
+"""categories of spans, in the order of the summary"""
+
+def add__trace_hook(func__hook):
+  # `func__hook(dict__event)` is called with every span as it ends, in the thread which ran it;
+  # `dict__event`: category, name, start and seconds (relative to the start of the run), CPU seconds, thread, args
+  # (`bytes`, `cache` as `hit`, `miss` or `not_modified`, `status`, ... as the span recorded)
+  list__trace_hooks.append(func__hook)
+
+def remove__trace_hook(func__hook):
+  list__trace_hooks.remove(func__hook)
+
+@contextlib.contextmanager
+def trace__span(category, name, **dict__args):
+  # -> args of the span, which can be added to until it ends (see `annotate__span`)
+  list__spans = local__trace.__dict__.setdefault("list__spans", [])
+  list__spans.append(dict__args)
+  float__start = time.perf_counter()
+  float__CPU_start = time.thread_time()
+  try:
+    yield dict__args
+  except BaseException as e:
+    dict__args.setdefault("error", type(e).__name__)
+    raise
+  finally:
+    event = (category, name, float__start - float__trace_start, time.perf_counter() - float__start, time.thread_time() - float__CPU_start, threading.get_ident(), dict__args)
+    list__spans.pop()
+    with lock__trace:
+      list__trace_events.append(event)
+    if len(list__trace_hooks) > 0:
+      dict__event = dict(zip(["category", "name", "start", "seconds", "CPU_seconds", "thread", "args"], event))
+      for func__hook in list(list__trace_hooks):
+        func__hook(dict__event)
+
+def annotate__span(**dict__args):
+  # add to the args of the innermost span open in this thread
+  list__spans = local__trace.__dict__.get("list__spans", [])
+  if len(list__spans) > 0:
+    list__spans[-1].update(dict__args)
+
+def traced(category):
+  # decorator: every call of the function is a span named after it
+  def decorate(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      with trace__span(category, func.__name__):
+        return func(*args, **kwargs)
+    return wrapper
+  return decorate
+
+def get__trace_summary():
+  # -> category -> calls, seconds (summed over threads), CPU seconds, bytes, count of each cache outcome
+  dict__summary = {category: {"calls": 0, "seconds": 0.0, "CPU_seconds": 0.0, "bytes": 0, "cache": {}} for category in TRACE_CATEGORIES}
+  with lock__trace:
+    list__events = list(list__trace_events)
+  for category, _, _, seconds, seconds__CPU, _, dict__args in list__events:
+    dict__category = dict__summary.setdefault(category, {"calls": 0, "seconds": 0.0, "CPU_seconds": 0.0, "bytes": 0, "cache": {}})
+    dict__category["calls"] += 1
+    dict__category["seconds"] += seconds
+    dict__category["CPU_seconds"] += seconds__CPU
+    dict__category["bytes"] += dict__args.get("bytes", 0)
+    if "cache" in dict__args:
+      dict__category["cache"][dict__args["cache"]] = dict__category["cache"].get(dict__args["cache"], 0) + 1
+  return dict__summary
+
+def report__trace():
+  # summary table, and the trace file if asked
+  dict__summary = get__trace_summary()
+  print(f"\ntime spent ({time.perf_counter() - float__trace_start:.2f}s in total, spans of threads running at the same time add up):")
+  print(f"  {'':<10}{'calls':>8}{'time':>10}{'CPU':>10}{'bytes':>12}  cache")
+  for category, dict__category in dict__summary.items():
+    if dict__category["calls"] == 0:
+      continue
+    str__bytes = f"{dict__category['bytes'] // 1024}KB" if (dict__category["bytes"] > 0) else ""
+    str__cache = ", ".join(f"{outcome} {count}" for outcome, count in sorted(dict__category["cache"].items()))
+    print(f"  {category:<10}{dict__category['calls']:>8}{dict__category['seconds']:>9.2f}s{dict__category['CPU_seconds']:>9.2f}s{str__bytes:>12}  {str__cache}")
+
+  if path__trace == None:
+    return
+  with lock__trace:
+    list__events = list(list__trace_events)
+  dict__trace = {
+    "traceEvents": [
+      {
+        "name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": thread,
+        "ts": round(start * 1e6), "dur": round(seconds * 1e6), "args": dict(dict__args, CPU_ms=round(seconds__CPU * 1000, 3))
+      } for category, name, start, seconds, seconds__CPU, thread, dict__args in sorted(list__events, key=lambda event: event[2])
+    ],
+    "displayTimeUnit": "ms",
+    "otherData": {"command": sys.argv[1:], "summary": dict__summary}
+  }
+  save__file(path__trace, json.dumps(dict__trace, ensure_ascii=False, default=str))
 
 # -------- utils
 
@@ -113,7 +397,7 @@ def ask__user_confirm(prompt, str__default_input="y"):
     exit(1)
     
 def save__file(path__file, content):
-  print(f"try save file to:\n  {path__file}")
+  step(f"try save file to:\n  {path__file}")
   try:
     with open(path__file, "w") as f:
       f.write(content)
@@ -122,33 +406,856 @@ def save__file(path__file, content):
     error(f"failed to save file to {path__file}:\n  {e}")
     exit(1)
 
-def fetch__HTML__from__URL(str__URL):
-  retry_times = FETCH_MAX_RETRY
-  def try_fetch():
-    nonlocal retry_times
+# -------- HTTP
+
+class Error__fetch(Exception):
+  # something needed can not be fetched, retries given up; the command line exits on it, `resolve__many` returns it
+  pass
+
+def get__seconds__before_retry(int__retried):
+  # exponential backoff, jittered so concurrent workers do not retry in step
+  return min(FETCH_BACKOFF_MAX, FETCH_BACKOFF_INITIAL * (2 ** int__retried)) * random.uniform(0.5, 1)
+
+def retry__with_backoff(func__attempt, str__what, func__if_retry_now=None):
+  # -> what `func__attempt()` returns, tried up to `FETCH_MAX_RETRY` times with backoff between tries,
+  # or right away when `func__if_retry_now()` says the failed try made progress;
+  # `FileNotFoundError` (not in the local repository) is not retried; the last exception is raised once given up
+  for int__retried in range(FETCH_MAX_RETRY):
     try:
-      with urllib.request.urlopen(str__URL) as response:
-        str__HTML = html.unescape(response.read().decode("utf-8"))
-        return str__HTML
+      return func__attempt()
+    except FileNotFoundError as e: # no retry helps
+      warning(f"failed to {str__what}:\n  {e}")
+      raise
     except Exception as e:
-      warning(f"failed to fetch HTML from {str__URL}:\n  {e}\n  {retry_times} retries left in {FETCH_BETWEEN_RETRY} seconds...")
-      retry_times -= 1
-      if retry_times > 0:
-        time.sleep(FETCH_BETWEEN_RETRY)
-        return try_fetch()
+      int__left = FETCH_MAX_RETRY - int__retried - 1
+      if int__left == 0:
+        warning(f"failed to {str__what} after {FETCH_MAX_RETRY} times retry:\n  {e}")
+        raise
+      if (func__if_retry_now != None) and func__if_retry_now():
+        warning(f"failed to {str__what}:\n  {e}\n  {int__left} retries left, retry now...")
+        continue
+      seconds__before_retry = get__seconds__before_retry(int__retried)
+      warning(f"failed to {str__what}:\n  {e}\n  {int__left} retries left in {seconds__before_retry:.1f} seconds...")
+      time.sleep(seconds__before_retry)
+
+def acquire__connection(str__scheme, str__netloc, if__retry=False):
+  # -> (idle connection to the host, or a new one; whether it was used before; whether it goes through an HTTP proxy);
+  # with `if__retry`, a new connection for a request already counted, which failed on an idle one
+  with lock__connections:
+    dict__stats = dict__connection_stats.setdefault(str__netloc, {"requests": 0, "connections": 0})
+    if not if__retry:
+      dict__stats["requests"] += 1
+    list__idle = dict__idle_connections.get((str__scheme, str__netloc), [])
+    if (len(list__idle) > 0) and (not if__retry):
+      connection, if__proxy_HTTP = list__idle.pop()
+      return connection, True, if__proxy_HTTP
+    dict__stats["connections"] += 1
+
+  str__proxy = urllib.request.getproxies().get(str__scheme)
+  if (str__proxy != None) and urllib.request.proxy_bypass(str__netloc.split(":")[0]):
+    str__proxy = None
+  class__connection = http.client.HTTPSConnection if (str__scheme == "https") else http.client.HTTPConnection
+  if str__proxy == None:
+    connection = class__connection(str__netloc, timeout=FETCH_TIMEOUT)
+  else:
+    connection = class__connection(urlsplit(str__proxy).netloc, timeout=FETCH_TIMEOUT)
+    if str__scheme == "https":
+      connection.set_tunnel(str__netloc)
+  return connection, False, (str__proxy != None) and (str__scheme == "http")
+
+def release__connection(str__scheme, str__netloc, connection, if__proxy_HTTP):
+  with lock__connections:
+    dict__idle_connections.setdefault((str__scheme, str__netloc), []).append((connection, if__proxy_HTTP))
+
+@contextlib.contextmanager
+def open__URL(str__URL, dict__headers={}, list__accepted_statuses=[200]):
+  # a `fetch` span from the request until the response is closed
+  with trace__span("fetch", str__URL) as dict__span:
+    try:
+      with open__URL__untraced(str__URL, dict__headers, list__accepted_statuses) as response:
+        dict__span["status"] = response.status
+        dict__span["bytes"] = int(response.getheader("Content-Length") or 0)
+        yield response
+    except urllib.error.HTTPError as e:
+      dict__span["status"] = e.code
+      raise
+
+@contextlib.contextmanager
+def open__URL__untraced(str__URL, dict__headers={}, list__accepted_statuses=[200]):
+  # like `urllib.request.urlopen`, over a kept-alive connection: following redirects,
+  # raising `urllib.error.HTTPError` for statuses not accepted (`304` included);
+  # the connection goes back to the pool if the body was read to the end, else it is closed;
+  # `file://` URLs are read from the local file system instead
+  if urlsplit(str__URL).scheme == "file":
+    with open__file_URL(str__URL, dict__headers, list__accepted_statuses) as response:
+      yield response
+    return
+  for _ in range(FETCH_MAX_REDIRECTS + 1):
+    parts = urlsplit(str__URL)
+    connection, if__reused, if__proxy_HTTP = acquire__connection(parts.scheme, parts.netloc)
+    str__target = str__URL if if__proxy_HTTP else ((parts.path or "/") + (f"?{parts.query}" if parts.query else ""))
+    try:
+      try:
+        connection.request("GET", str__target, headers=dict__headers)
+        response = connection.getresponse()
+      except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+        if not if__reused:
+          raise
+        # the server closed the idle connection meanwhile, try once more on a new one
+        connection.close()
+        connection, _, if__proxy_HTTP = acquire__connection(parts.scheme, parts.netloc, if__retry=True)
+        connection.request("GET", str__target, headers=dict__headers)
+        response = connection.getresponse()
+    except Exception:
+      connection.close()
+      raise
+
+    try:
+      if response.status in [301, 302, 303, 307, 308]:
+        response.read()
+        str__URL = urljoin(str__URL, response.getheader("Location"))
+        continue
+      if response.status not in list__accepted_statuses:
+        response.read()
+        raise urllib.error.HTTPError(str__URL, response.status, response.reason, response.headers, None)
+      yield response
+      return
+    finally:
+      if response.length == 0: # read to the end by `read1`, which leaves the response open
+        response.close()
+      # a body cut short closes the response too, with bytes still expected: the server is gone
+      if response.isclosed() and (not response.will_close) and (not response.length):
+        release__connection(parts.scheme, parts.netloc, connection, if__proxy_HTTP)
       else:
-        error(f"failed to fetch HTML from {str__URL} after {FETCH_MAX_RETRY} times retry, exit")
-        exit(1)
-  return try_fetch()
+        connection.close()
+  raise http.client.HTTPException(f"more than {FETCH_MAX_REDIRECTS} redirects from {str__URL}")
+
+def report__connections():
+  if len(dict__connection_stats) == 0:
+    return
+  print("\nHTTP connections:")
+  for str__netloc, dict__stats in sorted(dict__connection_stats.items()):
+    print(f"  {str__netloc}: {dict__stats['requests']} requests over {dict__stats['connections']} connections, {dict__stats['requests'] - dict__stats['connections']} reused")
+
+class Response__file(io.RawIOBase):
+  # the parts of `http.client.HTTPResponse` used here, for a file of a local repository
+  def __init__(self, fileobj, int__status, dict__headers, int__length):
+    self.fileobj = fileobj
+    self.status = int__status
+    self.reason = http.client.responses[int__status]
+    self.headers = http.client.HTTPMessage()
+    for name, value in dict__headers.items():
+      self.headers[name] = value
+    self.length = int__length
+
+  def readable(self):
+    return True
+
+  def readinto(self, buffer):
+    bytes__chunk = self.fileobj.read(min(len(buffer), self.length))
+    buffer[:len(bytes__chunk)] = bytes__chunk
+    self.length -= len(bytes__chunk)
+    return len(bytes__chunk)
+
+  def read1(self, int__size=-1):
+    return self.read(int__size)
+
+  def getheader(self, name, default=None):
+    return self.headers.get(name, default)
+
+def render__directory_listing(path__directory):
+  # the table of an Apache directory listing, as CRAN serves, so parsers of listings read local repositories too;
+  # files are dated by their mtime
+  list__rows = []
+  for entry in sorted(os.scandir(path__directory), key=lambda entry: entry.name):
+    if entry.name.startswith(".") or entry.name.endswith(".part"):
+      continue
+    str__name = html.escape(entry.name + ("/" if entry.is_dir() else ""))
+    str__date = time.strftime("%Y-%m-%d %H:%M", time.gmtime(entry.stat().st_mtime))
+    list__rows.append(f'<tr><td><a href="{str__name}">{str__name}</a></td><td align="right">{str__date}  </td><td align="right">{entry.stat().st_size}</td></tr>')
+  return "<html><body><table>\n" + "\n".join(list__rows) + "\n</table></body></html>\n"
+
+@contextlib.contextmanager
+def open__file_URL(str__URL, dict__headers={}, list__accepted_statuses=[200]):
+  # `open__URL` of a local repository: `Range` and `If-Modified-Since` are answered as a server would,
+  # a missing file raises `FileNotFoundError`, which is not retried
+  path__file = urllib.request.url2pathname(urlsplit(str__URL).path)
+  if not os.path.exists(path__file):
+    raise FileNotFoundError(f"not in the local repository: {path__file}")
+
+  dict__headers__response = {"Last-Modified": email.utils.formatdate(os.path.getmtime(path__file), usegmt=True)}
+  if os.path.isdir(path__file):
+    fileobj = io.BytesIO(render__directory_listing(path__file).encode("utf-8"))
+    int__size = len(fileobj.getvalue())
+  else:
+    fileobj = open(path__file, "rb")
+    int__size = os.fstat(fileobj.fileno()).st_size
+
+  with fileobj:
+    int__status = 200
+    int__length = int__size
+    match__range = re.match(r'bytes=(\d+)-(\d*)$', dict__headers.get("Range", ""))
+    if dict__headers.get("If-Modified-Since") == dict__headers__response["Last-Modified"]:
+      int__status = 304
+      int__length = 0
+    elif match__range != None:
+      int__start = int(match__range.group(1))
+      int__end = min(int(match__range.group(2) or int__size - 1), int__size - 1)
+      if int__start >= int__size:
+        int__status = 416
+        int__length = 0
+        dict__headers__response["Content-Range"] = f"bytes */{int__size}"
+      else:
+        int__status = 206
+        int__length = int__end - int__start + 1
+        dict__headers__response["Content-Range"] = f"bytes {int__start}-{int__end}/{int__size}"
+        fileobj.seek(int__start)
+    dict__headers__response["Content-Length"] = str(int__length)
+
+    response = Response__file(fileobj, int__status, dict__headers__response, int__length)
+    if int__status not in list__accepted_statuses:
+      raise urllib.error.HTTPError(str__URL, int__status, response.reason, response.headers, None)
+    yield response
+
+class Reader__ranges(io.RawIOBase):
+  # a remote file read through successive `Range` requests of `FETCH_CHUNK_SIZE` bytes, each read to its end,
+  # so the connection goes back to the pool even when only the head of the file is needed
+  def __init__(self, str__URL):
+    self.str__URL = str__URL
+    self.int__offset = 0
+    self.bytes__buffer = b""
+    self.if__end = False
+
+  def readable(self):
+    return True
+
+  def readinto(self, buffer):
+    if (len(self.bytes__buffer) == 0) and (not self.if__end):
+      self.fill()
+    int__size = min(len(buffer), len(self.bytes__buffer))
+    buffer[:int__size] = self.bytes__buffer[:int__size]
+    self.bytes__buffer = self.bytes__buffer[int__size:]
+    return int__size
+
+  def fill(self):
+    dict__headers = {"Range": f"bytes={self.int__offset}-{self.int__offset + FETCH_CHUNK_SIZE - 1}"}
+    with open__URL(self.str__URL, dict__headers, [200, 206, 416]) as response:
+      if response.status == 416: # past the end
+        response.read()
+        self.if__end = True
+        return
+      self.bytes__buffer = response.read()
+      self.int__offset += len(self.bytes__buffer)
+      if response.status == 200: # range not supported, the whole file came
+        self.if__end = True
+      else: # `bytes <first>-<last>/<size>`
+        str__size = (response.getheader("Content-Range") or "").rpartition("/")[2]
+        self.if__end = (len(self.bytes__buffer) == 0) or (str__size.isdigit() and (self.int__offset >= int(str__size)))
+
+def iterate__response__in__background(response):
+  # chunks of the response are read by another thread into a bounded queue,
+  # so the network keeps downloading while the consumer parses the chunks before
+  queue__chunks = queue.Queue(maxsize=FETCH_PIPELINE_DEPTH)
+  event__stop = threading.Event()
+
+  def read():
+    func__read = getattr(response, "read1", response.read) # `read1` returns what has arrived instead of waiting for a full chunk
+    try:
+      while not event__stop.is_set():
+        bytes__chunk = func__read(FETCH_CHUNK_SIZE)
+        queue__chunks.put(bytes__chunk)
+        if not bytes__chunk:
+          return
+    except Exception as e:
+      queue__chunks.put(e)
+
+  thread__reader = threading.Thread(target=read, daemon=True)
+  thread__reader.start()
+  try:
+    while True:
+      chunk = queue__chunks.get()
+      if isinstance(chunk, Exception):
+        raise chunk
+      if not chunk:
+        return
+      yield chunk
+  finally:
+    # the consumer stopped early: unblock the reader and let it end
+    event__stop.set()
+    while thread__reader.is_alive():
+      try:
+        queue__chunks.get(timeout=0.1)
+      except queue.Empty:
+        pass
+
+def fetch__HTML__then_parse(str__URL, func__parse_from_HTML, key__HTML, seconds__TTL, dict__validators={}):
+  # the page is decoded, teed into the metadata store and parsed chunk by chunk while it is downloaded;
+  # with validators (`etag`, `last_modified`) of a stored copy, the request is conditional,
+  # and `None` is returned when the page is not modified since then
+  dict__headers = {}
+  if dict__validators.get("etag"):
+    dict__headers["If-None-Match"] = dict__validators["etag"]
+  if dict__validators.get("last_modified"):
+    dict__headers["If-Modified-Since"] = dict__validators["last_modified"]
+
+  def attempt():
+    path__tmp = get__path__tmp_blob()
+    try:
+      with open__URL(str__URL, dict__headers) as response, open(path__tmp, "wb") as f__tee:
+        hash__tee = hashlib.sha256()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        def iterate__HTML():
+          for bytes__chunk in iterate__response__in__background(response):
+            f__tee.write(bytes__chunk)
+            hash__tee.update(bytes__chunk)
+            yield decoder.decode(bytes__chunk) # parsers convert character references themselves
+          yield decoder.decode(b"", final=True)
+
+        dict__content = func__parse_from_HTML(iterate__HTML())
+        dict__validators__new = {
+          "etag": response.headers.get("ETag"),
+          "last_modified": response.headers.get("Last-Modified")
+        }
+      store__put__tmp_blob(key__HTML, path__tmp, hash__tee.hexdigest(), seconds__TTL, dict__validators__new)
+      return dict__content
+    except Exception as e:
+      if os.path.exists(path__tmp):
+        os.remove(path__tmp)
+      if isinstance(e, urllib.error.HTTPError) and (e.code == 304):
+        return None
+      raise
 
-def download__file_from__URL(str__URL, path__file):
-  print(f"try download file from:\n  {str__URL}")
   try:
-    urllib.request.urlretrieve(str__URL, path__file)
-    success("file downloaded")
+    return retry__with_backoff(attempt, f"fetch HTML from {str__URL}")
   except Exception as e:
-    error(f"download failed:\n  {e}")
-    exit(1)
+    raise Error__fetch(f"no HTML from {str__URL} to go on with") from e
+
+def if__file_intact(path__file, str__MD5=None):
+  # against the MD5sum if known, else through gzip (whose CRC and length are checked at the end of the stream)
+  try:
+    with open(path__file, "rb") as f:
+      if str__MD5:
+        hash__MD5 = hashlib.md5()
+        for bytes__chunk in iter(lambda: f.read(FETCH_CHUNK_SIZE), b""):
+          hash__MD5.update(bytes__chunk)
+        return hash__MD5.hexdigest() == str__MD5.lower()
+      with gzip.GzipFile(fileobj=f) as f__gzip:
+        while f__gzip.read(FETCH_CHUNK_SIZE):
+          pass
+      return True
+  except Exception:
+    return False
+
+@traced("cache")
+def download__file_from__URL(str__URL, path__file, str__MD5=None):
+  # the file is written as `<file>.part` and only renamed once checked intact, an interrupted download is resumed from the part;
+  # the MD5sum listed by CRAN for the URL is used if not given
+  # -> whether downloaded
+  str__MD5 = str__MD5 or dict__MD5sums.get(str__URL)
+  if os.path.exists(path__file):
+    if if__file_intact(path__file, str__MD5):
+      annotate__span(key=str__URL, cache="hit")
+      return True
+    warning(f"{path__file} is corrupted, download it again")
+    os.remove(path__file)
+
+  annotate__span(key=str__URL, cache="miss")
+  path__part = f"{path__file}.part"
+  step(f"try download file from:\n  {str__URL}")
+  dict__progress = {"received": 0}
+  def attempt():
+    dict__progress["received"] = 0
+    int__offset = os.path.getsize(path__part) if os.path.exists(path__part) else 0
+    with open__URL(str__URL, {"Range": f"bytes={int__offset}-"} if (int__offset > 0) else {}, [200, 206, 416]) as response:
+      if response.status == 416: # the part is already whole, or not of this file
+        response.read()
+        if not if__file_intact(path__part, str__MD5):
+          os.remove(path__part)
+          raise ValueError("the partial file does not match, start over")
+      else:
+        if response.status == 206:
+          if not (response.getheader("Content-Range") or "").startswith(f"bytes {int__offset}-"):
+            raise ValueError(f"unexpected range: {response.getheader('Content-Range')}")
+          str__mode = "ab"
+        else: # range not supported, start over
+          str__mode = "wb"
+
+        int__length = response.getheader("Content-Length")
+        with open(path__part, str__mode) as f:
+          for bytes__chunk in iter(lambda: response.read(FETCH_CHUNK_SIZE), b""):
+            f.write(bytes__chunk)
+            dict__progress["received"] += len(bytes__chunk)
+        if (int__length != None) and (dict__progress["received"] < int(int__length)):
+          raise ConnectionError(f"connection closed after {int__offset + dict__progress['received']} bytes, {int(int__length) - dict__progress['received']} more expected")
+        if not if__file_intact(path__part, str__MD5):
+          os.remove(path__part)
+          raise ValueError("MD5sum mismatch" if str__MD5 else "broken gzip stream")
+
+    os.replace(path__part, path__file)
+    if int__offset > 0:
+      success(f"file downloaded, resumed from {int__offset} bytes")
+    else:
+      success("file downloaded")
+    return True
+
+  try:
+    # cut off, or checked broken, after some progress: go on right away
+    return retry__with_backoff(attempt, f"download {str__URL}", lambda: dict__progress["received"] > 0)
+  except Exception:
+    error(f"{str__URL} not downloaded")
+    return False
+
+# -------- metadata store
+
+def open__store():
+  global store__connection, int__store_size, int__build_cache_size
+  os.makedirs(PATH_STORE_BLOBS, exist_ok=True)
+  store__connection = sqlite3.connect(PATH_STORE, check_same_thread=False, isolation_level=None)
+  store__connection.execute("PRAGMA journal_mode=WAL")
+  store__connection.execute(
+    "CREATE TABLE IF NOT EXISTS entries (" + 
+    "key TEXT PRIMARY KEY, digest TEXT NOT NULL, size INTEGER NOT NULL, " + 
+    "created REAL NOT NULL, expires REAL, accessed REAL NOT NULL)"
+  )
+  store__connection.execute("CREATE INDEX IF NOT EXISTS entries__accessed ON entries (accessed)")
+  # validators of fetched pages, for conditional requests once entries expire
+  list__columns = [row[1] for row in store__connection.execute("PRAGMA table_info(entries)")]
+  for column in ["etag", "last_modified"]:
+    if column not in list__columns:
+      store__connection.execute(f"ALTER TABLE entries ADD COLUMN {column} TEXT")
+  int__store_size, int__build_cache_size = store__connection.execute(
+    "SELECT COALESCE(SUM(CASE WHEN key LIKE 'build:%' THEN 0 ELSE size END), 0), " + 
+    "COALESCE(SUM(CASE WHEN key LIKE 'build:%' THEN size ELSE 0 END), 0) FROM entries"
+  ).fetchone()
+
+def get__path__blob(digest):
+  return os.path.join(PATH_STORE_BLOBS, digest[:2], digest)
+
+def store__get__entry(key, if__content=True):
+  # expired entries are returned too (flagged), their content and validators are still useful for revalidation;
+  # with `if__content` false, the `path` of the blob is returned instead of its content, for large ones
+  with lock__store:
+    if store__connection == None:
+      open__store()
+    row = store__connection.execute("SELECT digest, expires, etag, last_modified FROM entries WHERE key = ?", (key,)).fetchone()
+    if row == None:
+      return None
+    digest, expires, etag, last_modified = row
+    store__connection.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+
+  dict__entry = {
+    "if__expired": (expires != None) and (expires < time.time()),
+    "etag": etag,
+    "last_modified": last_modified
+  }
+  path__blob = get__path__blob(digest)
+  if not if__content:
+    dict__entry["path"] = path__blob
+    return dict__entry if os.path.exists(path__blob) else None # blob removed by hand
+  try:
+    with open(path__blob, "rb") as f:
+      dict__entry["content"] = f.read()
+  except OSError: # blob removed by hand
+    return None
+  return dict__entry
+
+def store__get(key):
+  entry = store__get__entry(key)
+  if (entry == None) or entry["if__expired"]:
+    return None
+  return entry["content"]
+
+def store__if_expired(key):
+  # -> whether the entry is missing or expired, without reading its content
+  with lock__store:
+    if store__connection == None:
+      open__store()
+    row = store__connection.execute("SELECT expires FROM entries WHERE key = ?", (key,)).fetchone()
+  return (row == None) or ((row[0] != None) and (row[0] < time.time()))
+
+def store__refresh(key, seconds__TTL):
+  float__now = time.time()
+  float__expires = None if (seconds__TTL == None) else (float__now + seconds__TTL)
+  with lock__store:
+    store__connection.execute("UPDATE entries SET expires = ?, accessed = ? WHERE key = ?", (float__expires, float__now, key))
+
+def get__path__tmp_blob():
+  # unique across threads and processes (the CLI and `serve` share the blobs)
+  os.makedirs(PATH_STORE_BLOBS, exist_ok=True)
+  fd, path__tmp = tempfile.mkstemp(dir=PATH_STORE_BLOBS, suffix=".tmp")
+  os.close(fd)
+  return path__tmp
+
+def store__put(key, bytes__content, seconds__TTL, dict__validators={}):
+  digest = hashlib.sha256(bytes__content).hexdigest()
+
+  if os.path.exists(get__path__blob(digest)):
+    store__put__index(key, digest, len(bytes__content), seconds__TTL, dict__validators)
+    return
+
+  path__tmp = get__path__tmp_blob()
+  with open(path__tmp, "wb") as f:
+    f.write(bytes__content)
+  store__put__tmp_blob(key, path__tmp, digest, seconds__TTL, dict__validators)
+
+def store__put__tmp_blob(key, path__tmp, digest, seconds__TTL, dict__validators={}):
+  # content already written to a temporary file (and hashed) while it was streamed
+  path__blob = get__path__blob(digest)
+  int__size = os.path.getsize(path__tmp)
+  os.makedirs(os.path.dirname(path__blob), exist_ok=True)
+  os.replace(path__tmp, path__blob)
+  store__put__index(key, digest, int__size, seconds__TTL, dict__validators)
+
+def store__put__index(key, digest, int__size, seconds__TTL, dict__validators):
+  global int__store_size, int__build_cache_size
+  float__now = time.time()
+  float__expires = None if (seconds__TTL == None) else (float__now + seconds__TTL)
+
+  with lock__store:
+    if store__connection == None:
+      open__store()
+    row = store__connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+    int__size_delta = int__size - (0 if (row == None) else row[0])
+    store__connection.execute(
+      "INSERT OR REPLACE INTO entries (key, digest, size, created, expires, accessed, etag, last_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+      (key, digest, int__size, float__now, float__expires, float__now, dict__validators.get("etag"), dict__validators.get("last_modified"))
+    )
+
+    if key.startswith("build:"):
+      int__build_cache_size += int__size_delta
+      if int__build_cache_size > BUILD_CACHE_MAX_SIZE:
+        evict__store(True)
+    else:
+      int__store_size += int__size_delta
+      if int__store_size > STORE_MAX_SIZE:
+        evict__store(False)
+
+def evict__store(if__builds):
+  # drop least recently used entries (binary builds, or metadata) until they are back under 90% of their max size, then their unreferenced blobs
+  global int__store_size, int__build_cache_size
+  int__max_size = BUILD_CACHE_MAX_SIZE if if__builds else STORE_MAX_SIZE
+  int__size = int__build_cache_size if if__builds else int__store_size
+  list__evicted_digests = []
+  for key, digest, size in store__connection.execute("SELECT key, digest, size FROM entries WHERE (key LIKE 'build:%') = ? ORDER BY accessed", (if__builds,)).fetchall():
+    if int__size <= int__max_size * 0.9:
+      break
+    store__connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+    int__size -= size
+    list__evicted_digests.append(digest)
+
+  if if__builds:
+    int__build_cache_size = int__size
+  else:
+    int__store_size = int__size
+
+  for digest in list__evicted_digests:
+    if store__connection.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone() == None:
+      try:
+        os.remove(get__path__blob(digest))
+      except OSError:
+        pass
+  warning(f"{'build cache' if if__builds else 'metadata store'} exceeded {int__max_size} bytes, {len(list__evicted_digests)} least recently used entries evicted")
+
+def store__get__path(key):
+  # -> path of the blob of an unexpired entry without reading it, for large contents
+  with lock__store:
+    if store__connection == None:
+      open__store()
+    row = store__connection.execute("SELECT digest, expires FROM entries WHERE key = ?", (key,)).fetchone()
+    if (row == None) or ((row[1] != None) and (row[1] < time.time())):
+      return None
+    store__connection.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+
+  path__blob = get__path__blob(row[0])
+  if not os.path.exists(path__blob): # blob removed by hand
+    return None
+  return path__blob
+
+def store__put__file(key, path__file, seconds__TTL):
+  # the file is moved into the store
+  hash__file = hashlib.sha256()
+  with open(path__file, "rb") as f:
+    for bytes__chunk in iter(lambda: f.read(FETCH_CHUNK_SIZE), b""):
+      hash__file.update(bytes__chunk)
+  store__put__tmp_blob(key, path__file, hash__file.hexdigest(), seconds__TTL)
+
+def store__get__dict(key):
+  bytes__content = store__get(key)
+  if bytes__content == None:
+    return None
+  return json.loads(bytes__content)
+
+def store__put__dict(key, dict__content, seconds__TTL, dict__validators={}, if__snapshot=False):
+  # indexes are stored as snapshots, read in place by `read__stored_dict` instead of parsed as a whole
+  if if__snapshot:
+    store__put(key, pack__snapshot(dict__content), seconds__TTL, dict__validators)
+    return
+  store__put(key, json.dumps(dict__content, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), seconds__TTL, dict__validators)
+
+def read__stored_dict(entry__dict):
+  # -> dict of an entry of `store__get__entry`: JSON content is parsed, a blob given by `path` is mapped if it is a snapshot
+  if "content" in entry__dict:
+    return json.loads(entry__dict["content"])
+  with open(entry__dict["path"], "rb") as f:
+    if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC: # stored as JSON, before snapshots
+      f.seek(0)
+      return json.load(f)
+  return Index__snapshot(entry__dict["path"])
+
+# -------- index snapshots
+
+SNAPSHOT_MAGIC = b"UPPAIRX1"
+SNAPSHOT_HEADER = struct.Struct("<8sI") # magic, number of keys
+SNAPSHOT_ENTRY = struct.Struct("<IIII") # offset and length of a key, then of its value
+"""a snapshot is the header, one entry per key sorted by key, every key, then every value as compact JSON;
+a lookup bisects over the entries, so it only reads the pages of the entries and keys compared and of the value found"""
+
+def pack__snapshot(dict__index):
+  list__keys = [key.encode("utf-8") for key in sorted(dict__index)] # UTF-8 bytes sort as the code points do
+  list__values = [json.dumps(dict__index[key.decode("utf-8")], ensure_ascii=False, separators=(",", ":")).encode("utf-8") for key in list__keys]
+  int__key_offset = SNAPSHOT_HEADER.size + SNAPSHOT_ENTRY.size * len(list__keys)
+  int__value_offset = int__key_offset + sum(map(len, list__keys))
+  list__entries = []
+  for bytes__key, bytes__value in zip(list__keys, list__values):
+    list__entries.append(SNAPSHOT_ENTRY.pack(int__key_offset, len(bytes__key), int__value_offset, len(bytes__value)))
+    int__key_offset += len(bytes__key)
+    int__value_offset += len(bytes__value)
+  return b"".join([SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(list__keys))] + list__entries + list__keys + list__values)
+
+class Index__snapshot(Mapping):
+  # read-only dict of a snapshot, memory-mapped: opening it reads nothing but the header, a value is decoded when looked up
+  __slots__ = ("path", "mmap", "int__count")
+
+  def __init__(self, path__snapshot):
+    self.path = path__snapshot
+    with open(path__snapshot, "rb") as f:
+      self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    bytes__magic, self.int__count = SNAPSHOT_HEADER.unpack_from(self.mmap, 0)
+    if bytes__magic != SNAPSHOT_MAGIC:
+      raise ValueError(f"not an index snapshot: {path__snapshot}")
+
+  def get__key(self, int__index):
+    # -> UTF-8 bytes of the key at the index, in sorted order
+    int__offset, int__length, _, _ = SNAPSHOT_ENTRY.unpack_from(self.mmap, SNAPSHOT_HEADER.size + SNAPSHOT_ENTRY.size * int__index)
+    return self.mmap[int__offset:int__offset + int__length]
+
+  def find(self, key):
+    # -> index of the key, `None` if it is not in the snapshot
+    if not isinstance(key, str):
+      return None
+    bytes__key = key.encode("utf-8")
+    int__low, int__high = 0, self.int__count
+    while int__low < int__high:
+      int__middle = (int__low + int__high) // 2
+      if self.get__key(int__middle) < bytes__key:
+        int__low = int__middle + 1
+      else:
+        int__high = int__middle
+    if (int__low < self.int__count) and (self.get__key(int__low) == bytes__key):
+      return int__low
+    return None
+
+  def __getitem__(self, key):
+    int__index = self.find(key)
+    if int__index == None:
+      raise KeyError(key)
+    _, _, int__offset, int__length = SNAPSHOT_ENTRY.unpack_from(self.mmap, SNAPSHOT_HEADER.size + SNAPSHOT_ENTRY.size * int__index)
+    return json.loads(self.mmap[int__offset:int__offset + int__length])
+
+  def __contains__(self, key):
+    return self.find(key) != None
+
+  def __len__(self):
+    return self.int__count
+
+  def __iter__(self):
+    for int__index in range(self.int__count):
+      yield self.get__key(int__index).decode("utf-8")
+
+  def __eq__(self, other):
+    if isinstance(other, Index__snapshot): # blobs of the store are named by the digest of their content
+      return self.path == other.path
+    return Mapping.__eq__(self, other)
+
+# -------- RDS
+
+R_object = namedtuple("R_object", ["value", "attributes"])
+"""a deserialized R object: vectors and lists as python lists, attributes as a dict of `R_object`s"""
+
+RDS_NA_INTEGER = -2 ** 31
+
+@traced("parse")
+def read__RDS(fileobj):
+  # R's XDR serialization format (version 2 and 3), only the subset needed by CRAN metadata files:
+  # vectors, lists, pairlists, symbols, attributes and the compact ALTREP classes
+  if not hasattr(fileobj, "peek"):
+    fileobj = io.BufferedReader(fileobj)
+  if fileobj.peek(2)[:2] == b"\x1f\x8b": # `saveRDS` compresses with gzip by default
+    stream = gzip.GzipFile(fileobj=fileobj)
+  else:
+    stream = fileobj
+
+  list__references = []
+
+  def read__bytes(n):
+    bytes__content = stream.read(n)
+    if len(bytes__content) != n:
+      raise EOFError("truncated RDS")
+    return bytes__content
+
+  def read__int():
+    return struct.unpack(">i", read__bytes(4))[0]
+
+  def read__length():
+    length = read__int()
+    if length == -1: # long vector
+      upper = read__int()
+      lower = read__int()
+      length = (upper << 32) + lower
+    return length
+
+  def read__strings():
+    read__int() # always 0
+    return [read__item() for _ in range(read__int())]
+
+  def read__pairlist(flags):
+    # -> [(tag, value), ...], the chain of CDRs is followed in a loop, not recursively
+    list__items = []
+    while True:
+      if flags & (1 << 9):
+        read__item() # attributes of a pairlist cell
+      tag = read__item() if (flags & (1 << 10)) else None
+      list__items.append((tag, read__item()))
+      flags = read__int()
+      if (flags & 0xFF) not in [2, 239]: # LISTSXP, ATTRLISTSXP
+        break
+    if (flags & 0xFF) != 254: # NILVALUE_SXP
+      raise ValueError(f"unsupported pairlist tail: {flags & 0xFF}")
+    return list__items
+
+  def read__attributes(flags):
+    if not (flags & (1 << 9)):
+      return {}
+    flags__attributes = read__int()
+    return dict(read__pairlist(flags__attributes))
+
+  def expand__ALTREP(list__info, state):
+    class_name = list__info[0][1]
+    if class_name == "compact_intseq":
+      length, start, step = state.value
+      return [int(start + i * step) for i in range(int(length))]
+    if class_name == "compact_realseq":
+      length, start, step = state.value
+      return [start + i * step for i in range(int(length))]
+    if class_name.startswith("wrap_"):
+      return state.value[0].value
+    if class_name == "deferred_string": # numbers turned into strings lazily
+      return [None if x == None else str(x) for x in state[0][1].value]
+    raise ValueError(f"unsupported ALTREP class: {class_name}")
+
+  def read__item():
+    flags = read__int()
+    sexptype = flags & 0xFF
+
+    if sexptype == 254: # NILVALUE_SXP
+      return None
+    if sexptype in [242, 241, 253, 252, 251, 250]: # special environments and values
+      return None
+    if sexptype == 255: # REFSXP
+      index = flags >> 8
+      if index == 0:
+        index = read__int()
+      return list__references[index - 1]
+    if sexptype in [247, 249, 248]: # PERSISTSXP, NAMESPACESXP, PACKAGESXP
+      list__strings = read__strings()
+      list__references.append(list__strings)
+      return list__strings
+    if sexptype == 1: # SYMSXP
+      name = read__item()
+      list__references.append(name)
+      return name
+    if sexptype == 4: # ENVSXP
+      read__int() # locked
+      dict__environment = {}
+      list__references.append(dict__environment)
+      read__item() # enclosure
+      dict__environment.update(read__item() or []) # frame
+      for bucket in (read__item() or R_object([], {})).value: # hash table
+        dict__environment.update(bucket or [])
+      read__item() # attributes
+      return dict__environment
+    if sexptype in [2, 239, 6, 240]: # LISTSXP, ATTRLISTSXP, LANGSXP, ATTRLANGSXP
+      return read__pairlist(flags)
+    if sexptype == 9: # CHARSXP
+      length = read__int()
+      if length == -1: # NA_character_
+        return None
+      bytes__content = read__bytes(length)
+      if (flags >> 12) & (1 << 2): # LATIN1_MASK
+        return bytes__content.decode("latin-1")
+      return bytes__content.decode("utf-8", errors="replace")
+    if sexptype == 238: # ALTREP_SXP
+      list__info = read__item()
+      state = read__item()
+      dict__attributes = read__item()
+      return R_object(expand__ALTREP(list__info, state), dict(dict__attributes or []))
+
+    if sexptype in [10, 13]: # LGLSXP, INTSXP
+      length = read__length()
+      value = [None if x == RDS_NA_INTEGER else x for x in struct.unpack(f">{length}i", read__bytes(4 * length))]
+    elif sexptype == 14: # REALSXP
+      length = read__length()
+      value = list(struct.unpack(f">{length}d", read__bytes(8 * length)))
+    elif sexptype == 15: # CPLXSXP
+      length = read__length()
+      list__parts = struct.unpack(f">{2 * length}d", read__bytes(16 * length))
+      value = [complex(list__parts[i], list__parts[i + 1]) for i in range(0, 2 * length, 2)]
+    elif sexptype == 24: # RAWSXP
+      value = read__bytes(read__length())
+    elif sexptype in [16, 19, 20]: # STRSXP, VECSXP, EXPRSXP
+      value = [read__item() for _ in range(read__length())]
+    elif sexptype == 25: # S4SXP
+      value = None
+    else:
+      raise ValueError(f"unsupported SEXP type in RDS: {sexptype}")
+
+    return R_object(value, read__attributes(flags))
+
+  bytes__head = read__bytes(2)
+  if bytes__head != b"X\n":
+    raise ValueError(f"unsupported RDS format: {bytes__head}")
+  int__format_version = read__int()
+  read__int() # R version which wrote it
+  read__int() # minimal R version to read it
+  if int__format_version == 3:
+    read__bytes(read__int()) # native encoding
+  elif int__format_version != 2:
+    raise ValueError(f"unsupported RDS format version: {int__format_version}")
+
+  return read__item()
+
+@traced("parse")
+def parse__archive_rds(archive):
+  # archive.rds: package name -> data frame with one row (named by `<package>/<file name>`) per archived tarball
+  step("parse archive.rds...")
+  dict__archive_rds_index = {}
+  for package_name, data_frame in zip(archive.attributes["names"].value, archive.value):
+    dict__columns = dict(zip(data_frame.attributes["names"].value, data_frame.value))
+    list__row_names = data_frame.attributes["row.names"].value
+    dict__archive__version_index = {}
+    for str__row_name, float__mtime in zip(list__row_names, dict__columns["mtime"].value):
+      str__file_name = str__row_name.split("/")[-1]
+      if not str__file_name.endswith(".tar.gz"):
+        continue
+      str__version = str__file_name[len(package_name) + 1:-len(".tar.gz")]
+      dict__archive__version_index[str__version] = {
+        "date": datetime.fromtimestamp(float__mtime, timezone.utc).strftime("%Y-%m-%d"),
+        "relative_URL": str__file_name
+      }
+    dict__archive_rds_index[package_name] = dict__archive__version_index
+
+  success(f"all {len(dict__archive_rds_index)} archived packages parsed")
+  return dict__archive_rds_index
 
 # -------- logic
 
@@ -193,208 +1300,558 @@ def if__date_unsure__not_later_than__date_target(str__date_unsure, str__date_tar
     error(f"date comparison failed:\n  {e}")
     return False
 
-def try_get__HTML__then_parse(file_name, str__URL, func__parse_from_HTML):
+def if__cache_allowed():
   global if__using_cache
-
-  path__file = os.path.join(PATH_CACHE, f"{formatted_date__when_start}_{file_name}.html")
-
-  str__HTML = None
-
-  if os.path.exists(path__file):
+  backend = get__backend()
+  if backend.if__cache_used != None:
+    return backend.if__cache_used
+  with lock__using_cache: # resolving threads may find caches at the same time
     if if__using_cache == None: # only ask once if using cache
-      if__using_cache = not ask__user_confirm("very recent cache found, force fetch new?", "n")
+      if__using_cache = not ask__user_confirm("unexpired cache found, force fetch new?", "n")
+  return if__using_cache
+
+def load__once(file_name, func__load):
+  # once per backend (see `get__backend`), whichever thread asks first; a load failed is not kept: threads coming after it try again
+  backend = get__backend()
+  dict__loaded = backend.dict__loaded_dicts
+  if file_name in dict__loaded:
+    return dict__loaded[file_name]
+  with backend.lock__loading_locks:
+    lock__file = backend.dict__loading_locks.setdefault(file_name, threading.Lock())
+    error__before = backend.dict__loading_errors.get(file_name)
+  with lock__file:
+    if file_name not in dict__loaded:
+      if backend.dict__loading_errors.get(file_name) is not error__before: # failed while this thread waited for it
+        raise backend.dict__loading_errors[file_name]
+      try:
+        dict__loaded[file_name] = func__load()
+      except Exception as e:
+        backend.dict__loading_errors[file_name] = e
+        raise
+    return dict__loaded[file_name]
+
+def try_get__dict(file_name, str__URL, func__parse_from_HTML, seconds__TTL=STORE_TTL__INDEX, if__snapshot=False):
+  return load__once(file_name, lambda: load__dict(str__URL, func__parse_from_HTML, seconds__TTL, if__snapshot))
+
+@traced("cache")
+def load__dict(str__URL, func__parse_from_HTML, seconds__TTL, if__snapshot=False):
+  # `if__snapshot` for indexes of the whole repository: stored as a snapshot, not parsed again once stored
+  key__dict = f"dict:{str__URL}"
+  annotate__span(key=key__dict, cache="miss")
 
-    if if__using_cache:
-      with open(path__file, "r") as f:
-        str__HTML = f.read()
-      success(f"cache loaded:\n  {path__file}")
-
-  # fetch HTML
-  if str__HTML == None:
-    str__HTML = fetch__HTML__from__URL(str__URL)
-    save__file(path__file, str__HTML)
+  # if cache exists and loaded
+  entry__dict = store__get__entry(key__dict, not if__snapshot)
+  if (entry__dict != None) and (not entry__dict["if__expired"]) and if__cache_allowed():
+    annotate__span(cache="hit")
+    success(f"cache loaded:\n  {key__dict}")
+    return read__stored_dict(entry__dict)
+
+  # else get HTML
+  key__HTML = f"HTML:{str__URL}"
+  entry__HTML = store__get__entry(key__HTML)
+  if (entry__HTML != None) and (not entry__HTML["if__expired"]) and if__cache_allowed():
+    annotate__span(cache="hit")
+    success(f"cache loaded:\n  {key__HTML}")
+    dict__content = func__parse_from_HTML([entry__HTML["content"].decode("utf-8")])
+    store__put__dict(key__dict, dict__content, seconds__TTL, if__snapshot=if__snapshot)
+    return dict__content
 
-  # parse HTML
-  dict__content = func__parse_from_HTML(str__HTML)
+  # fetch and parse HTML, conditionally if a copy was stored before
+  step(f"try fetch and parse HTML from:\n  {str__URL}")
+  dict__validators = {} if (entry__HTML == None) else entry__HTML
+  dict__content = fetch__HTML__then_parse(str__URL, func__parse_from_HTML, key__HTML, seconds__TTL, dict__validators)
 
-  return dict__content
-    
-def try_get__dict(file_name, str__URL, func__parse_from_HTML):
-  global if__using_cache
+  if dict__content == None:
+    annotate__span(cache="not_modified")
+    success(f"not modified since cached:\n  {str__URL}")
+    store__refresh(key__HTML, seconds__TTL)
+    # unchanged HTML parses to the stored dict, so skip parsing
+    if entry__dict != None:
+      store__refresh(key__dict, seconds__TTL)
+      return read__stored_dict(entry__dict)
+    dict__content = func__parse_from_HTML([entry__HTML["content"].decode("utf-8")])
 
-  path__file = os.path.join(PATH_CACHE, f"{formatted_date__when_start}_{file_name}.json")
+  store__put__dict(key__dict, dict__content, seconds__TTL, if__snapshot=if__snapshot)
 
-  # if cache exists and loaded
-  if os.path.exists(path__file):
-    if if__using_cache == None: # only ask once if using cache
-      if__using_cache = not ask__user_confirm("very recent cache found, force fetch new?", "n")
+  return dict__content
 
-    if if__using_cache:
-      with open(path__file, "r") as f:
-        dict__content = json.load(f)
-      success(f"cache loaded:\n  {path__file}")
-      return dict__content
+@traced("tar")
+def read__DESCRIPTION__from__tar_stream(fileobj):
+  # R package tarballs keep DESCRIPTION near the head, so reading stops right there
+  # instead of decompressing (or downloading) the whole archive
+  with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+    for member in tar:
+      list__path_parts = member.name.strip("/").split("/")
+      if member.isfile() and (list__path_parts[-1] == "DESCRIPTION") and (len(list__path_parts) <= 2):
+        with tar.extractfile(member) as f:
+          return f.read().decode("utf-8")
+  raise FileNotFoundError("DESCRIPTION not found in R package")
+
+def read__DESCRIPTION__from__tar_file(path__file):
+  try:
+    with open(path__file, "rb") as f:
+      str__content = read__DESCRIPTION__from__tar_stream(f)
+    success(f"R package DESCRIPTION found:\n  {path__file}")
+    return str__content
+  except Exception as e:
+    error(f"failed to extract DESCRIPTION from {path__file}:\n  {e}")
+    return None
 
-  # else get HTML and parse
-  dict__content = try_get__HTML__then_parse(file_name, str__URL, func__parse_from_HTML)
+def fetch__DESCRIPTION__from__URL(str__URL):
+  step(f"try stream DESCRIPTION from:\n  {str__URL}")
+  def attempt():
+    with io.BufferedReader(Reader__ranges(str__URL), FETCH_CHUNK_SIZE) as f:
+      return read__DESCRIPTION__from__tar_stream(f)
 
-  save__file(path__file, json.dumps(dict__content, ensure_ascii=False, indent=2))
+  try:
+    str__content = retry__with_backoff(attempt, f"stream DESCRIPTION from {str__URL}")
+  except Exception:
+    warning("download the whole file instead")
+    return None
+  success("R package DESCRIPTION streamed")
+  return str__content
+
+def fetch__stream__then_parse(str__URL, func__parse_from_stream, dict__validators={}):
+  # the response is parsed while it is downloaded, without keeping the whole file in memory,
+  # `None` is returned as content when it is not modified since the stored copy
+  dict__headers = {}
+  if dict__validators.get("etag"):
+    dict__headers["If-None-Match"] = dict__validators["etag"]
+  if dict__validators.get("last_modified"):
+    dict__headers["If-Modified-Since"] = dict__validators["last_modified"]
+
+  step(f"try fetch and parse:\n  {str__URL}")
+  def attempt():
+    try:
+      with open__URL(str__URL, dict__headers) as response:
+        dict__content = func__parse_from_stream(response)
+        response.read() # what parsers left (padding), so the connection can be reused
+        return dict__content, {
+          "etag": response.headers.get("ETag"),
+          "last_modified": response.headers.get("Last-Modified")
+        }
+    except urllib.error.HTTPError as e:
+      if e.code == 304:
+        return None, dict__validators
+      raise
 
+  try:
+    return retry__with_backoff(attempt, f"fetch and parse {str__URL}")
+  except Exception:
+    warning("use HTML index instead")
+    return {}, {}
+
+@traced("cache")
+def load__dict__from__stream(str__URL, func__parse_from_stream, seconds__TTL):
+  # -> `{}` if it can not be fetched
+  key__dict = f"dict:{str__URL}"
+  annotate__span(key=key__dict, cache="miss")
+
+  entry__dict = store__get__entry(key__dict, False)
+  if (entry__dict != None) and (not entry__dict["if__expired"]) and if__cache_allowed():
+    annotate__span(cache="hit")
+    success(f"cache loaded:\n  {key__dict}")
+    return read__stored_dict(entry__dict)
+
+  dict__validators = {} if (entry__dict == None) else entry__dict
+  dict__content, dict__validators = fetch__stream__then_parse(str__URL, func__parse_from_stream, dict__validators)
+
+  if dict__content == None:
+    annotate__span(cache="not_modified")
+    success(f"not modified since cached:\n  {str__URL}")
+    store__refresh(key__dict, seconds__TTL)
+    return read__stored_dict(entry__dict)
+
+  if len(dict__content) > 0:
+    store__put__dict(key__dict, dict__content, seconds__TTL, dict__validators, if__snapshot=True)
+    # read back, so it is the same as when loaded from the store later (JSON values: lists, not tuples), and compares equal to it
+    entry__dict = store__get__entry(key__dict, False)
+    if entry__dict != None:
+      return read__stored_dict(entry__dict)
   return dict__content
 
+def load__PACKAGES_index():
+  def parse__PACKAGES_index__from__stream(response):
+    with gzip.open(response, "rt", encoding="utf-8", errors="replace") as f:
+      return parse__PACKAGES_index(f)
+  return load__dict__from__stream(get__backend().URL__PACKAGES, parse__PACKAGES_index__from__stream, STORE_TTL__LATEST_INDEX)
+
+def load__archive_rds_index():
+  def parse__archive_rds__from__stream(response):
+    return parse__archive_rds(read__RDS(response))
+  str__URL = get__backend().URL__ARCHIVE_RDS
+  if (urlsplit(str__URL).scheme == "file") and (not os.path.exists(urllib.request.url2pathname(urlsplit(str__URL).path))):
+    return {} # a snapshot written by `mirror` has none: its listings are read instead, nothing failed
+  step("\ntry get archive.rds index...")
+  return load__dict__from__stream(str__URL, parse__archive_rds__from__stream, STORE_TTL__INDEX)
+
+def load__contrib_listing():
+  return load__dict(get__backend().URL__CONTRIB, parse__contrib_listing, STORE_TTL__LATEST_INDEX, if__snapshot=True)
+
+def load__latest_index():
+  step("\ntry get latest index...")
+  return load__dict(get__backend().URL__LATEST_INDEX, parse__latest_index, STORE_TTL__LATEST_INDEX, if__snapshot=True)
+
+def load__archive_index():
+  step("\ntry get archive index...")
+  return load__dict(get__backend().URL__ARCHIVE_INDEX, parse__archive_index, STORE_TTL__INDEX, if__snapshot=True)
+
+def load__PACKAGES_index__with__dates():
+  step("\ntry get PACKAGES index...")
+  dict__index = load__PACKAGES_index()
+  dict__listing = {}
+  if len(dict__index) > 0:
+    dict__listing = load__once("contrib_listing", load__contrib_listing)
+  return {
+    "PACKAGES": dict__index,
+    "contrib_listing": dict__listing
+  }
+
 def try_get__dict__from__downloaded_file(file_name, str__URL):
-  global if__using_cache
+  return load__once(file_name, lambda: load__dict__from__downloaded_file(file_name, str__URL))
 
-  path__json = os.path.join(PATH_CACHE, f"{formatted_date__when_start}_{file_name}.json")
+@traced("cache")
+def load__dict__from__downloaded_file(file_name, str__URL):
+  key__dict = f"DESCRIPTION_dependencies:{str__URL}"
+  annotate__span(key=key__dict, cache="miss")
 
   path__file = os.path.join(PATH_STORAGE, f"{file_name}.tar.gz")
 
   # if cache exists and loaded
-  if os.path.exists(path__json):
-    if if__using_cache == None: # only ask once if using cache
-      if__using_cache = not ask__user_confirm("very recent cache found, force fetch new?", "n")
-
-    if if__using_cache:
-      with open(path__json, "r") as f:
-        dict__content = json.load(f)
-      success(f"cache loaded:\n  {path__json}")
-      return dict__content
+  dict__content = store__get__dict(key__dict)
+  if (dict__content != None) and if__cache_allowed():
+    annotate__span(cache="hit")
+    success(f"cache loaded:\n  {key__dict}")
+    return dict__content
 
-  # else download file and parse
-  if not os.path.exists(path__file):
-    download__file_from__URL(str__URL, path__file)
+  # else read DESCRIPTION from the downloaded file, or stream it from the URL without downloading the whole file
+  str__content = None
 
   if os.path.exists(path__file):
-    try:
-      with tarfile.open(path__file, "r:gz") as tar:
-        members = tar.getmembers()
+    str__content = read__DESCRIPTION__from__tar_file(path__file)
+  else:
+    str__content = fetch__DESCRIPTION__from__URL(str__URL)
 
-        if__DESCRIPTION_exists = any("DESCRIPTION" == member.name for member in members)
+    if str__content == None: # fall back to download the whole file
+      if not download__file_from__URL(str__URL, path__file):
+        raise Error__fetch(f"DESCRIPTION of {str__URL} can neither be streamed nor downloaded")
+      str__content = read__DESCRIPTION__from__tar_file(path__file)
 
-        if if__DESCRIPTION_exists == False:
-          path__DESCRIPTION = os.path.join(tar.getmembers()[0].name, "DESCRIPTION")
-        else:
-          path__DESCRIPTION = "DESCRIPTION"
+  if str__content == None:
+    return {}
 
-        with tar.extractfile(path__DESCRIPTION) as f:
-          str__content = f.read().decode("utf-8")
-      
-      success(f"R package DESCRIPTION found:\n  {path__file}")
-    except Exception as e:
-      error(f"failed to extract DESCRIPTION from {path__file}:\n  {e}")
-      return {}
+  # every line of a field, version constraints kept
+  dict__record = next(parse__DCF(str__content.splitlines()), {})
+  dict__content = dict({
+    "version": None,
+    "date": None
+  }, **parse__dependency_fields(dict__record))
 
-    list__dependencies_raw = RE["DESCRIPTION__DEPENDENCIES"].findall(str__content)
-    list__imports_raw = RE["DESCRIPTION__IMPORTS"].findall(str__content)
-    list__links_raw = RE["DESCRIPTION__LINKS"].findall(str__content)
-
-    list__dependencies = []
-    list__imports = []
-    list__links = []
-
-    if len(list__dependencies_raw) > 0:
-      list__dependencies = list__dependencies_raw[0].split(",")
-    if len(list__imports_raw) > 0:
-      list__imports = list__imports_raw[0].split(",")
-    if len(list__links_raw) > 0:
-        list__links = list__links_raw[0].split(",")
-
-    dict__content = {
-      "version": None,
-      "date": None,
-      "limitation_of_R_version": None,
-      "dependencies": [],
-      "imports": [],
-      "links": []
-    }
+  store__put__dict(key__dict, dict__content, STORE_TTL__FOREVER)
 
-    for str__dependency in list__dependencies:
-      str__dependency = str__dependency.strip()
+  return dict__content
 
-      dependency_R_version = RE["LATEST_META__DEPENDENCY_R"].findall(str__dependency)
-      if len(dependency_R_version) > 0:
-        version_R = dependency_R_version[0]
-        # print(f"dependency R version detected: {version_R}")
-        dict__content["limitation_of_R_version"] = version_R
+def parse__DCF(iterable__lines):
+  # DCF (the format of DESCRIPTION and PACKAGES): `Field: value` lines, indented lines continue the value,
+  # blank lines separate records
+  dict__record = {}
+  field = None
+  for line in iterable__lines:
+    line = line.rstrip("\r\n")
+    if line.strip() == "":
+      if len(dict__record) > 0:
+        yield dict__record
+      dict__record = {}
+      field = None
+    elif line[0] in " \t":
+      if field != None:
+        dict__record[field] += " " + line.strip()
+    else:
+      field, _, value = line.partition(":")
+      dict__record[field] = value.strip()
+  if len(dict__record) > 0:
+    yield dict__record
+
+def parse__dependency_fields(dict__record):
+  # `Depends`, `Imports` and `LinkingTo` of a DCF record -> dependencies as `name (op version)` items,
+  # and the R version `Depends` on as `(op, version)`
+  dict__fields = {
+    "limitation_of_R_version": None,
+    "dependencies": [],
+    "imports": [],
+    "links": []
+  }
+  for field, key in [("Depends", "dependencies"), ("Imports", "imports"), ("LinkingTo", "links")]:
+    for str__item in dict__record.get(field, "").split(","):
+      package_name, list__constraints = parse__dependency(str__item)
+      if package_name == "":
         continue
+      if package_name == "R":
+        if len(list__constraints) > 0:
+          dict__fields["limitation_of_R_version"] = list__constraints[0]
+        continue
+      dict__fields[key].append(" ".join(str__item.split()))
+  return dict__fields
+
+@traced("parse")
+def parse__PACKAGES_index(iterable__lines):
+  step("parse PACKAGES index...")
+  dict__PACKAGES_index = {}
+  for dict__record in parse__DCF(iterable__lines):
+    dict__metadata = dict({
+      "version": dict__record.get("Version"),
+    }, **parse__dependency_fields(dict__record), MD5sum=dict__record.get("MD5sum"))
+    dict__PACKAGES_index[dict__record["Package"]] = dict__metadata
+
+  success(f"all {len(dict__PACKAGES_index)} packages parsed")
+  return dict__PACKAGES_index
+
+class Tokenizer__HTML:
+  # hand-written incremental tokenizer with the callback interface of `html.parser.HTMLParser` (`handle_starttag`,
+  # `handle_endtag`, `handle_data`), only what CRAN's pages need; `feed` can be called with each chunk as it arrives,
+  # the unfinished tail of a chunk is kept until the next one;
+  # one Python step per token costs a few times what the former whole-page regexes took on well-formed pages,
+  # the price of staying linear on any page and of parsing while the page is still downloading
+  tuple__attribute_tags = None # tags whose attributes the parser reads, the others get `[]`; `None` for all
+  def __init__(self):
+    self.str__pending = ""
+
+  def feed(self, data):
+    self.str__pending += data
+    self.tokenize(False)
+
+  def close(self):
+    self.tokenize(True)
+
+  def tokenize(self, if__final):
+    # tokens up to the last `>` can not change with what comes next, unless a comment is still open;
+    # text cut there is handed over in two parts, which every parser joins
+    str__pending = self.str__pending
+    int__cut = len(str__pending) if if__final else str__pending.rfind(">") + 1
+    int__start = 0
+    while not if__final:
+      int__comment = str__pending.find("<!--", int__start, int__cut)
+      if int__comment == -1:
+        break
+      int__start = str__pending.find("-->", int__comment + 4) + 3
+      if (int__start == 2) or (int__start > int__cut):
+        int__cut = int__comment
+        break
+    if int__cut == 0:
+      return
+
+    tuple__attribute_tags = self.tuple__attribute_tags
+    for match in RE["HTML__TOKEN"].finditer(str__pending, 0, int__cut):
+      str__close, tag, str__attributes, str__tail, str__text = match.groups()
+      if tag:
+        tag = tag.lower()
+        if str__close:
+          self.handle_endtag(tag)
+        elif str__attributes and ((tuple__attribute_tags == None) or (tag in tuple__attribute_tags)):
+          self.handle_starttag(tag, [
+            (name.lower(), html.unescape(value_1 or value_2 or value_3))
+            for name, value_1, value_2, value_3 in RE["HTML__ATTRIBUTE"].findall(str__attributes)
+          ])
+        else:
+          self.handle_starttag(tag, [])
+        str__text = str__tail
+      if str__text:
+        self.handle_data(html.unescape(str__text) if "&" in str__text else str__text)
+    self.str__pending = str__pending[int__cut:]
 
-      dict__content["dependencies"].append(str__dependency)
-    for str__import in list__imports:
-      str__import = str__import.strip()
-      dict__content["imports"].append(str__import)
-    for str__link in list__links:
-      str__link = str__link.strip()
-      dict__content["links"].append(str__link)
-
-    success(f"cache loaded:\n  {path__json}")
-
-    save__file(path__json, json.dumps(dict__content, ensure_ascii=False, indent=2))
-
-    return dict__content
-  else:
-    error(f"seems R package download failed: {path__file}")
-    exit(1)
-
-def parse__latest_package_metadata(str__HTML):
-  print("parse latest package metadata...")
-  dict__metadata = {}
-
-  table__info = RE["LATEST_META__TABLE"].findall(str__HTML)[0]
-  str__version = RE["LATEST_META__VERSION"].findall(table__info)[0]
-  str__date = RE["LATEST_META__DATE"].findall(table__info)[0]
-
-  limitation_of_R_version = None
-
-  list__dependencies = []
-  list__dependencies__raw = RE["LATEST_META__DEPENDENCIES"].findall(table__info)
+  def handle_starttag(self, tag, attrs):
+    pass
 
-  if len(list__dependencies__raw) > 0:
-    list__tmp_dependencies = list__dependencies__raw[0].split(",")
-    for tmp_dependency in list__tmp_dependencies:
-      tmp_dependency = tmp_dependency.strip()
-      # print(tmp_dependency)
+  def handle_endtag(self, tag):
+    pass
 
-      # check if tmp_denpendency matched RE["LATEST_META__DEPENDENCY_R"]
-      dependency_R_version = RE["LATEST_META__DEPENDENCY_R"].findall(tmp_dependency)
-      if len(dependency_R_version) > 0:
-        version_R = dependency_R_version[0]
-        # print(f"dependency R version detected: {version_R}")
-        limitation_of_R_version = version_R
-        continue
-      
-      item = RE["LATEST_META__SPAN_ITEM"].findall(tmp_dependency)
+  def handle_data(self, data):
+    pass
 
-      if len(item) > 0:
-        list__dependencies.append(item[0])
+class Parser__listing(Tokenizer__HTML):
+  # rows of an Apache directory listing (CRAN's `src/contrib/` and `Archive/` pages) are handed to `func__on_row`
+  # one by one as a list of cells `{"text", "href"}`, so nothing but the current row is kept while parsing
+  tuple__attribute_tags = ("a",)
+  def __init__(self, func__on_row):
+    super().__init__()
+    self.func__on_row = func__on_row
+    self.list__cells = None
+    self.dict__cell = None
+
+  def handle_starttag(self, tag, attrs):
+    if tag == "tr":
+      self.list__cells = []
+    elif (tag == "td") and (self.list__cells != None):
+      self.dict__cell = {"text": "", "href": None}
+      self.list__cells.append(self.dict__cell)
+    elif (tag == "a") and (self.dict__cell != None) and (self.dict__cell["href"] == None):
+      self.dict__cell["href"] = dict(attrs).get("href")
+
+  def handle_endtag(self, tag):
+    if tag == "td":
+      self.dict__cell = None
+    elif (tag == "tr") and (self.list__cells != None):
+      if len(self.list__cells) > 0:
+        self.func__on_row(self.list__cells)
+      self.list__cells = None
+      self.dict__cell = None
+
+  def handle_data(self, data):
+    if self.dict__cell != None:
+      self.dict__cell["text"] += data
+
+class Parser__latest_index(Tokenizer__HTML):
+  # `available_packages_by_name.html`: `<td><a href="..."><span class="CRAN">name</span></a></td>` per package
+  tuple__attribute_tags = ("a",)
+  def __init__(self):
+    super().__init__()
+    self.dict__latest_index = {}
+    self.int__td_items = 0
+    self.dict__td = None
+    self.list__span_text = None
+
+  def handle_starttag(self, tag, attrs):
+    if tag == "td":
+      self.dict__td = {"href": None, "package_name": None, "if__anchor": False}
+    elif self.dict__td == None:
+      return
+    elif tag == "a":
+      self.dict__td["if__anchor"] = True
+      if self.dict__td["href"] == None:
+        self.dict__td["href"] = dict(attrs).get("href")
+    elif (tag == "span") and (self.dict__td["package_name"] == None):
+      self.list__span_text = []
+
+  def handle_endtag(self, tag):
+    if (tag == "span") and (self.list__span_text != None):
+      self.dict__td["package_name"] = "".join(self.list__span_text)
+      self.list__span_text = None
+    elif (tag == "td") and (self.dict__td != None):
+      if self.dict__td["if__anchor"]:
+        self.int__td_items += 1
+        if self.dict__td["package_name"] and self.dict__td["href"]:
+          self.dict__latest_index[self.dict__td["package_name"]] = self.dict__td["href"]
+      self.dict__td = None
+
+  def handle_data(self, data):
+    if self.list__span_text != None:
+      self.list__span_text.append(data)
+
+class Parser__latest_package_metadata(Tokenizer__HTML):
+  # the first table of a package page: `<tr><td>Version:</td><td>...</td></tr>` per field,
+  # dependencies are `<a><span>name</span></a>` items separated by `,` in the value cell
+  tuple__attribute_tags = ()
+  def __init__(self):
+    super().__init__()
+    self.list__rows = []
+    self.list__cells = None
+    self.dict__cell = None
+    self.if__in_span = False
+    self.if__table_done = False
+
+  def handle_starttag(self, tag, attrs):
+    if self.if__table_done:
+      return
+    if tag == "tr":
+      self.list__cells = []
+    elif (tag == "td") and (self.list__cells != None):
+      self.dict__cell = {"text": "", "spans": []} # spans: (offset in text, span text)
+      self.list__cells.append(self.dict__cell)
+    elif (tag == "span") and (self.dict__cell != None):
+      self.if__in_span = True
+      self.dict__cell["spans"].append((len(self.dict__cell["text"]), ""))
+
+  def handle_endtag(self, tag):
+    if self.if__table_done:
+      return
+    if tag == "span":
+      self.if__in_span = False
+    elif tag == "td":
+      self.dict__cell = None
+    elif (tag == "tr") and (self.list__cells != None):
+      if len(self.list__cells) >= 2:
+        self.list__rows.append((self.list__cells[0]["text"].strip().lower(), self.list__cells[1]))
+      self.list__cells = None
+    elif tag == "table":
+      self.if__table_done = True
+
+  def handle_data(self, data):
+    if self.if__table_done or (self.dict__cell == None):
+      return
+    if self.if__in_span:
+      offset, span_text = self.dict__cell["spans"][-1]
+      self.dict__cell["spans"][-1] = (offset, span_text + data)
+    self.dict__cell["text"] += data
+
+  def get__cell(self, str__label_keyword):
+    for str__label, dict__cell in self.list__rows:
+      if str__label_keyword in str__label:
+        return dict__cell
+    return None
+
+  def get__items(self, str__label_keyword):
+    # -> (dependencies as `name (op version)` items, R version limitation) of a dependency cell
+    dict__cell = self.get__cell(str__label_keyword)
+    list__package_names = []
+    limitation_of_R_version = None
+    if dict__cell == None:
+      return list__package_names, limitation_of_R_version
+
+    int__start = 0
+    for str__item in dict__cell["text"].split(","):
+      int__end = int__start + len(str__item)
+      list__span_texts = [span_text for offset, span_text in dict__cell["spans"] if int__start <= offset < int__end]
+      if len(list__span_texts) > 0:
+        _, list__constraints = parse__dependency(str__item)
+        list__package_names.append(" ".join([list__span_texts[0]] + [f"({op} {version})" for op, version in list__constraints]))
+      else:
+        package_name, list__constraints = parse__dependency(str__item)
+        if (package_name == "R") and (len(list__constraints) > 0):
+          limitation_of_R_version = list__constraints[0]
+      int__start = int__end + 1
+    return list__package_names, limitation_of_R_version
+
+def feed__parser(parser, iterable__HTML):
+  for str__chunk in iterable__HTML:
+    parser.feed(str__chunk)
+  parser.close()
+  return parser
+
+@traced("parse")
+def parse__contrib_listing(iterable__HTML):
+  step("parse contrib listing...")
+  dict__contrib_listing = {}
+
+  def on_row(list__cells):
+    for index, dict__cell in enumerate(list__cells[:-1]):
+      str__relative_URL = dict__cell["href"]
+      if (str__relative_URL != None) and str__relative_URL.endswith(".tar.gz"):
+        # `<package name>_<version>.tar.gz`, package names never contain `_`
+        package_name, _, str__version = os.path.basename(str__relative_URL)[:-len(".tar.gz")].partition("_")
+        dict__contrib_listing[package_name] = {
+          "version": str__version,
+          "date": list__cells[index + 1]["text"].strip().split(" ")[0]
+        }
+        return
 
-  list__imports = []
-  list__imports__raw = RE["LATEST_META__IMPORTS"].findall(table__info)
-  if len(list__imports__raw) > 0:
-    list__tmp_imports = list__imports__raw[0].split(",")
-    for tmp_import in list__tmp_imports:
-      tmp_import = tmp_import.strip()
-      # print(tmp_import)
-      item = RE["LATEST_META__SPAN_ITEM"].findall(tmp_import)
+  feed__parser(Parser__listing(on_row), iterable__HTML)
 
-      if len(item) > 0:
-        list__imports.append(item[0])
+  success(f"all {len(dict__contrib_listing)} latest packages dated")
+  return dict__contrib_listing
 
-  list__links = []
-  list__links__raw = RE["LATEST_META__LINKS"].findall(table__info)
-  if len(list__links__raw) > 0:
-    list__tmp_links = list__links__raw[0].split(",")
-    for tmp_link in list__tmp_links:
-      tmp_link = tmp_link.strip()
-      # print(tmp_link)
+@traced("parse")
+def parse__latest_package_metadata(iterable__HTML):
+  step("parse latest package metadata...")
 
-      item = RE["LATEST_META__SPAN_ITEM"].findall(tmp_link)
+  parser = feed__parser(Parser__latest_package_metadata(), iterable__HTML)
 
-      if len(item) > 0:
-        list__links.append(item[0])
+  list__dependencies, limitation_of_R_version = parser.get__items("depend")
+  list__imports, _ = parser.get__items("import")
+  list__links, _ = parser.get__items("linking")
 
   dict__metadata = {
-    "version": str__version,
-    "date": str__date,
+    "version": parser.get__cell("version")["text"].strip(),
+    "date": parser.get__cell("published")["text"].strip(),
     "limitation_of_R_version": limitation_of_R_version,
     "dependencies": list__dependencies,
     "imports": list__imports,
@@ -403,21 +1860,18 @@ def parse__latest_package_metadata(str__HTML):
 
   success(f"package metadata parsed:")
   # print key, value in dict__metadata joined by newline
-  print("\n".join([f"  {key}: {value}" for key, value in dict__metadata.items()]))
+  step("\n".join([f"  {key}: {value}" for key, value in dict__metadata.items()]))
 
   return dict__metadata
 
-def parse__latest_index(str__HTML):
-  print("parse latest index...")
-  dict__latest_index = {}
-  list__td_items = RE["LATEST_INDEX__ALL_TD"].findall(str__HTML)
-  for td_item in list__td_items:
-    package_name = RE["LATEST_INDEX__PACKAGE_NAME"].findall(td_item)
-    relative_URL = RE["LATEST_INDEX__URL"].findall(td_item)
-    if package_name and relative_URL:
-      dict__latest_index[package_name[0]] = relative_URL[0]
+@traced("parse")
+def parse__latest_index(iterable__HTML):
+  step("parse latest index...")
+
+  parser = feed__parser(Parser__latest_index(), iterable__HTML)
+  dict__latest_index = parser.dict__latest_index
   
-  length__td_items = len(list__td_items)
+  length__td_items = parser.int__td_items
   length__latest_index = len(dict__latest_index)
 
   if length__td_items == length__latest_index:
@@ -427,21 +1881,24 @@ def parse__latest_index(str__HTML):
 
   return dict__latest_index
 
-def parse__archive_index(str__HTML):
-  print("parse archive index...")
+@traced("parse")
+def parse__archive_index(iterable__HTML):
+  step("parse archive index...")
   dict__archive_index = {}
-  list__tr_items = RE["ARCHIVE_INDEX__ALL_TR"].findall(str__HTML)
-  for tr_item in list__tr_items:
-    if len(tr_item) == 0:
-      warning("empty tr_item found")
-      continue
-    relative_URL = RE["ARCHIVE_INDEX__URL"].findall(tr_item)
-    package_name = RE["ARCHIVE_INDEX__PACKAGE_NAME"].findall(tr_item)
-    
-    if relative_URL and package_name:
-      dict__archive_index[package_name[0]] = relative_URL[0]
+  length__tr_items = 0
+
+  def on_row(list__cells):
+    nonlocal length__tr_items
+    for dict__cell in list__cells:
+      if dict__cell["href"] != None:
+        length__tr_items += 1
+        package_name = dict__cell["text"].strip().rstrip("/")
+        if package_name != "":
+          dict__archive_index[package_name] = dict__cell["href"]
+        return
+
+  feed__parser(Parser__listing(on_row), iterable__HTML)
   
-  length__tr_items = len(list__tr_items)
   length_archive_index = len(dict__archive_index)
   
   if length__tr_items == length_archive_index:
@@ -451,26 +1908,25 @@ def parse__archive_index(str__HTML):
   
   return dict__archive_index
 
-def parse__archive_package_version(str__HTML):
-  print("parse archive package version...")
+@traced("parse")
+def parse__archive_package_version(iterable__HTML):
+  step("parse archive package version...")
   dict__archive_package_version = {}
-  list__tr_items = RE["ARCHIVE__VERSION_INDEX__ALL_TR"].findall(str__HTML)
-  for tr_item in list__tr_items:
-    # print(tr_item)
-    
-    if len(tr_item) == 0:
-      warning("empty tr_item found")
-      continue
 
-    str__relative_URL = tr_item[0]
-    str_date = tr_item[1].strip().split(" ")[0]
-    str__version = RE["ARCHIVE__VERSION_INDEX__VERSION"].findall(str__relative_URL)[0]
+  def on_row(list__cells):
+    for index, dict__cell in enumerate(list__cells[:-1]):
+      str__relative_URL = dict__cell["href"]
+      if (str__relative_URL != None) and str__relative_URL.endswith(".tar.gz"):
+        str_date = list__cells[index + 1]["text"].strip().split(" ")[0]
+        str__version = RE["ARCHIVE__VERSION_INDEX__VERSION"].findall(str__relative_URL)[0]
 
-    dict__archive_package_version[str__version] = {
-      "date": str_date,
-      "relative_URL": str__relative_URL
-    }
-    # print(f"{str_date}: {str__version}")
+        dict__archive_package_version[str__version] = {
+          "date": str_date,
+          "relative_URL": str__relative_URL
+        }
+        return
+
+  feed__parser(Parser__listing(on_row), iterable__HTML)
 
   return dict__archive_package_version
 
@@ -480,21 +1936,28 @@ def convert__check_status__to__str(status):
   else:
     return "failed"
 
-def try_find__package__from__archive_index(package_name, str__version_target=None, str__date_before=None):
-  global dict__archive_index
+def get__archive_version_index(package_name):
+  # -> version -> date and file name of each archived tarball of the package, `None` if it has never been archived
+  dict__archive_rds_index = load__once("archive_rds_index", load__archive_rds_index) # `{}` when it can not be loaded
+  if len(dict__archive_rds_index) > 0:
+    return dict__archive_rds_index.get(package_name)
 
-  print(f"try find '{package_name}' from archive index...")
+  # scrape HTML listings instead
+  dict__archive_index = load__once("archive_index", load__archive_index)
+  if package_name not in dict__archive_index:
+    return None
 
-  if len(dict__archive_index) == 0:
-    print("\ntry get archive index...")
-    dict__archive_index = try_get__dict("archive_index", URL__ARCHIVE_INDEX, parse__archive_index)
+  step("\ntry get archive package version index...")
+  return try_get__dict(f"{package_name}_archive_version_index", urljoin(get__backend().URL__ARCHIVE_INDEX, dict__archive_index[package_name]), parse__archive_package_version)
 
-  if package_name in dict__archive_index:
-    print("\n")
-    success(f"package {package_name} found in archive index")
+def try_find__package__from__archive_index(package_name, str__version_target=None, str__date_before=None):
+  step(f"try find '{package_name}' from archive index...")
+
+  dict__archive__version_index = get__archive_version_index(package_name)
 
-    print("\ntry get archive package version index...")
-    dict__archive__version_index = try_get__dict(f"{package_name}_archive_version_index", urljoin(URL__ARCHIVE_INDEX, dict__archive_index[package_name]), parse__archive_package_version)
+  if dict__archive__version_index != None:
+    step("\n")
+    success(f"package {package_name} found in archive index")
 
     # print(dict__archive__version_index)
 
@@ -532,7 +1995,7 @@ def try_find__package__from__archive_index(package_name, str__version_target=Non
     # print(f"debug package name: {package_name}")
     # print(f"debug version URL: {str__version_URL}")
 
-    URL__file_to_download = urljoin(URL__ARCHIVE_INDEX, f"{package_name}/")
+    URL__file_to_download = urljoin(get__backend().URL__ARCHIVE_INDEX, f"{package_name}/")
 
     # print(f"debug URL__file_to_download: {URL__file_to_download}")
 
@@ -542,30 +2005,56 @@ def try_find__package__from__archive_index(package_name, str__version_target=Non
 
     dict__archive__metadata = try_get__dict__from__downloaded_file(f"{package_name}_v_{str__version_to_download}", URL__file_to_download)
 
+    if len(dict__archive__metadata) == 0:
+      return {}
+
     dict__archive__metadata["version"] = str__version_to_download
     dict__archive__metadata["date"] = dict__archive__version_index[str__version_to_download]["date"]
-
-    print(f"debug dict__archive__metadata: {dict__archive__metadata}")
+    dict__archive__metadata["URL"] = URL__file_to_download
 
     return dict__archive__metadata
   else:
     warning(f"package '{package_name}' not found in archive index")
     return {}
 
-def try_find__package__from__latest_index(package_name, str__version_target=None, str__date_before=None):
-  global dict__latest_index
+def get__latest_metadata__from__PACKAGES_index(package_name):
+  # -> `None` if the PACKAGES index (or the date of the package) is unavailable, `{}` if the package is not a latest one
+  dict__indexes = load__once("PACKAGES_index", load__PACKAGES_index__with__dates)
+  dict__PACKAGES_index, dict__contrib_listing = dict__indexes["PACKAGES"], dict__indexes["contrib_listing"] # `{}` when it can not be loaded
 
-  print(f"try find '{package_name}' from latest index...")
+  if len(dict__PACKAGES_index) == 0:
+    return None
+  if package_name not in dict__PACKAGES_index:
+    return {}
 
-  if len(dict__latest_index) == 0:
-    print("\ntry get latest index...")
-    dict__latest_index = try_get__dict("latest_index", URL__LATEST_INDEX, parse__latest_index)
+  dict__metadata = dict__PACKAGES_index[package_name]
+  dict__dated = dict__contrib_listing.get(package_name)
+  if (dict__dated == None) or (dict__dated["version"] != dict__metadata["version"]): # CRAN is updating it right now
+    return None
 
-  if package_name in dict__latest_index:
-    print("\n")
-    success(f"package {package_name} found in latest index")
+  return dict(dict__metadata, date=dict__dated["date"])
+
+def get__latest_metadata(package_name):
+  # -> metadata of the latest version of the package, `{}` if it is not a latest one
+  dict__latest__metadata = get__latest_metadata__from__PACKAGES_index(package_name)
+
+  if dict__latest__metadata == None: # scrape HTML instead
+    dict__latest_index = load__once("latest_index", load__latest_index)
+    if package_name not in dict__latest_index:
+      return {}
+
+    dict__latest__metadata = try_get__dict(f"{package_name}_latest_metadata", urljoin(get__backend().URL__LATEST_INDEX, dict__latest_index[package_name]), parse__latest_package_metadata)
 
-    dict__latest__metadata = try_get__dict(f"{package_name}_latest_metadata", urljoin(URL__LATEST_INDEX, dict__latest_index[package_name]), parse__latest_package_metadata)
+  return dict__latest__metadata
+
+def try_find__package__from__latest_index(package_name, str__version_target=None, str__date_before=None):
+  step(f"try find '{package_name}' from latest index...")
+
+  dict__latest__metadata = get__latest_metadata(package_name)
+
+  if len(dict__latest__metadata) > 0:
+    step("\n")
+    success(f"package {package_name} found in latest index")
 
     # print(dict__latest__metadata)
 
@@ -589,10 +2078,13 @@ def try_find__package__from__latest_index(package_name, str__version_target=None
         "package_name": package_name,
         "version": dict__latest__metadata["version"],
         "date": dict__latest__metadata["date"], 
-        "dependencies": dict__latest__metadata["dependencies"] + dict__latest__metadata["imports"] + dict__latest__metadata["links"]
+        "dependencies": dict__latest__metadata["dependencies"] + dict__latest__metadata["imports"] + dict__latest__metadata["links"],
+        "URL": urljoin(get__backend().URL__CONTRIB, f"{package_name}_{dict__latest__metadata['version']}.tar.gz"),
+        "MD5sum": dict__latest__metadata.get("MD5sum")
       }
     else:
-      warning(f"latest package '{package_name}' check failed:\n  version: {convert__check_status__to__str(if__version_check__passed)}\n  date: {convert__check_status__to__str(if__date_check__passed)}")
+      if not if__output_quiet(): # expected while looking for an older version, not worth a warning in `--quiet`
+        warning(f"latest package '{package_name}' check failed:\n  version: {convert__check_status__to__str(if__version_check__passed)}\n  date: {convert__check_status__to__str(if__date_check__passed)}")
       return {}
 
   else: # package not found in latest index
@@ -602,9 +2094,38 @@ def split__package_name__and__version(str_package_name_and_version):
   package_name, str__version_target = str_package_name_and_version.split(SEPERATOR_VERSION)
   return package_name, str__version_target
 
-def find__package__and__parse__dpendencies(package_name, str__version_target=None, str__date_before=None, dict__parent=None):
+def parse__dependency(str__item):
+  # `rlang (>= 0.4.10)` -> ("rlang", [(">=", "0.4.10")])
+  match = RE["DEPENDENCY"].match(str__item)
+  if match.group(2) == None:
+    return match.group(1), []
+  str__operator = {"≥": ">=", "≤": "<=", "=": "=="}.get(match.group(2), match.group(2))
+  return match.group(1), [(str__operator, match.group(3))]
+
+def parse__version(str__version):
+  # compared as R's `package_version()` does: part by part as numbers, `1.0-11` < `1.0.12` < `1.1`
+  return tuple(int(part) for part in RE["VERSION__PARTS"].findall(str__version))
+
+def if__version_satisfies(str__version, list__constraints):
+  tuple__version = parse__version(str__version)
+  for str__operator, str__version_required in list__constraints:
+    tuple__required = parse__version(str__version_required)
+    if not {
+      ">=": tuple__version >= tuple__required,
+      ">": tuple__version > tuple__required,
+      "<=": tuple__version <= tuple__required,
+      "<": tuple__version < tuple__required,
+      "==": tuple__version == tuple__required,
+      "!=": tuple__version != tuple__required
+    }.get(str__operator, True):
+      return False
+  return True
+
+def format__constraints(list__constraints):
+  return " ".join(f"({str__operator} {str__version})" for str__operator, str__version in list__constraints) or "(any version)"
 
-  print(f"\nfind package: {package_name}\n  version limit: {str__version_target}\n  before date: {str__date_before}")
+def find__package__and__parse__dpendencies(package_name, str__version_target=None, str__date_before=None):
+  step(f"\nfind package: {package_name}\n  version limit: {str__version_target}\n  before date: {str__date_before}")
 
   dict__result = try_find__package__from__latest_index(
     package_name, 
@@ -619,160 +2140,1238 @@ def find__package__and__parse__dpendencies(package_name, str__version_target=Non
       str__date_before
     )
 
-  if len(dict__result) > 0:
-    version = dict__result["version"]
-    date = dict__result["date"]
-    dependencies = dict__result["dependencies"]
-    if "imports" in dict__result:
-      dependencies += dict__result["imports"]
-    if "links" in dict__result:
-      dependencies += dict__result["links"]
-
-    if "dependencies" not in dict__parent: # global dict__dependencies_tree
-      dict__parent[package_name] = {
-        "version": version,
-        "date": date,
-        "dependencies": {}
+  return dict__result
+
+def get__candidate_versions(package_name):
+  # -> version -> date of every version of the package on CRAN, the latest one and the archived ones
+  def load():
+    dict__versions = {}
+    for str__version, dict__info in (get__archive_version_index(package_name) or {}).items():
+      dict__versions[str__version] = dict__info["date"]
+    dict__latest__metadata = get__latest_metadata(package_name)
+    if len(dict__latest__metadata) > 0:
+      dict__versions[dict__latest__metadata["version"]] = dict__latest__metadata["date"]
+    return dict__versions
+  return load__once(f"{package_name}_candidate_versions", load)
+
+def get__R_release(str__R_version):
+  # -> the release listed in `R_RELEASE_DATES` the R version stands for: the latest patch of it if only `major(.minor)` is given,
+  # `None` if not listed
+  list__releases = [str__release for str__release in R_RELEASE_DATES if (str__release == str__R_version) or str__release.startswith(f"{str__R_version}.")]
+  return max(list__releases, key=parse__version, default=None)
+
+def get__R_release_date(str__R_version):
+  # -> release date of the R version (see `get__R_release`); for a release not listed, with a warning,
+  # the date of the newest release listed before it, `None` if older than all of them
+  if str__R_version == None:
+    return None
+  str__release = get__R_release(str__R_version)
+  if str__release != None:
+    return R_RELEASE_DATES[str__release]
+  str__release = max((str__release for str__release in R_RELEASE_DATES if parse__version(str__release) < parse__version(str__R_version)), key=parse__version, default=None)
+  if str__release == None:
+    warning(f"R {str__R_version} is older than the releases known, its recommended packages are looked up on CRAN as any other")
+    return None
+  warning(f"R {str__R_version} is not among the releases known, its recommended packages are taken as bundled with R {str__release} ({R_RELEASE_DATES[str__release]})")
+  return R_RELEASE_DATES[str__release]
+
+def if__R_version_fits(limitation_of_R_version, str__R_version):
+  # `major(.minor)` stands for its latest patch, as in `get__R_release_date`
+  if (str__R_version == None) or (limitation_of_R_version == None):
+    return True
+  str__R_version = get__R_release(str__R_version) or str__R_version
+  str__operator, str__version = limitation_of_R_version
+  return if__version_satisfies(str__R_version, [({"≥": ">=", "≤": "<=", "=": "=="}.get(str__operator, str__operator), str__version)])
+
+@traced("resolve")
+def get__package_metadata(package_name, str__version):
+  # -> version, date, URL and dependencies (`name (op version)` items) of one version of the package, `{}` if it can not be read;
+  # read once in the process, whichever resolution needs it
+  def load():
+    dict__result = find__package__and__parse__dpendencies(package_name, str__version)
+    if len(dict__result) > 0:
+      dict__result = dict(dict__result, dependencies=dict__result["dependencies"] + dict__result.get("imports", []) + dict__result.get("links", []))
+    return dict__result
+  return load__once(f"{package_name}_v_{str__version}_metadata", load)
+
+def get__tarball_URL(package_name, str__version):
+  # the latest version is under `src/contrib/`, the others under the archive directory of the package
+  if get__latest_metadata(package_name).get("version") == str__version:
+    return urljoin(get__backend().URL__CONTRIB, f"{package_name}_{str__version}.tar.gz")
+  return urljoin(get__backend().URL__ARCHIVE_INDEX, f"{package_name}/{package_name}_{str__version}.tar.gz")
+
+def order__candidate_versions(dict__versions, str__date_before):
+  # newest version published by the date first, as the package was when its dependents were published;
+  # versions published after it only if none of those fits, oldest first
+  list__versions = sorted(dict__versions, key=parse__version, reverse=True)
+  if str__date_before == None:
+    return list__versions
+  list__before = [str__version for str__version in list__versions if if__date_unsure__not_later_than__date_target(dict__versions[str__version], str__date_before)]
+  list__after = [str__version for str__version in reversed(list__versions) if str__version not in list__before]
+  return list__before + list__after
+
+class Node__package:
+  __slots__ = ("id", "name", "version", "date", "int__date", "URL", "tuple__dependency_ids")
+
+  def __init__(self, int__id, package_name, dict__metadata):
+    self.id = int__id
+    self.name = package_name
+    self.version = dict__metadata["version"]
+    self.date = dict__metadata["date"]
+    self.int__date = datetime.strptime(self.date, "%Y-%m-%d").toordinal() # parsed once, compared as a number
+    self.URL = dict__metadata["URL"]
+    self.tuple__dependency_ids = ()
+
+class Graph__packages:
+  # packages chosen as a DAG: node ids index `list__nodes`, each node keeps the ids of its dependencies;
+  # edges closing a dependency cycle are dropped where first met walking from the roots,
+  # base packages and recommended ones bundled with R are not nodes
+  __slots__ = ("list__nodes", "dict__ids", "tuple__root_ids", "list__priorities")
+
+  def __init__(self, list__root_names, dict__solution, dict__dependencies, dict__metadata):
+    self.list__nodes = []
+    self.dict__ids = {}
+
+    def get__id(package_name):
+      # -> id of the node of the package, `None` if it is not a node
+      if package_name not in self.dict__ids:
+        dict__metadata__chosen = dict__metadata.get((package_name, dict__solution.get(package_name)))
+        if (not dict__metadata__chosen) or dict__metadata__chosen.get("bundled"):
+          self.dict__ids[package_name] = None
+        else:
+          self.dict__ids[package_name] = len(self.list__nodes)
+          self.list__nodes.append(Node__package(len(self.list__nodes), package_name, dict__metadata__chosen))
+      return self.dict__ids[package_name]
+
+    # depth first from the roots, iteratively: (node id, dependencies left, ids of dependencies kept)
+    self.tuple__root_ids = tuple(int__id for int__id in map(get__id, list__root_names) if int__id != None)
+    list__postorder = []
+    set__visited = set()
+    set__on_path = set()
+    for int__root_id in self.tuple__root_ids:
+      if int__root_id in set__visited:
+        continue
+      set__visited.add(int__root_id)
+      set__on_path.add(int__root_id)
+      list__stack = [(int__root_id, iter(dict__dependencies.get(self.list__nodes[int__root_id].name, [])), [])]
+      while len(list__stack) > 0:
+        int__id, iterator__dependencies, list__dependency_ids = list__stack[-1]
+        for dependency in iterator__dependencies:
+          int__dependency_id = get__id(dependency)
+          if (int__dependency_id == None) or (int__dependency_id in list__dependency_ids):
+            continue
+          if int__dependency_id in set__on_path:
+            warning(f"dependency cycle detected at '{dependency}', skip")
+            continue
+          list__dependency_ids.append(int__dependency_id)
+          if int__dependency_id not in set__visited:
+            set__visited.add(int__dependency_id)
+            set__on_path.add(int__dependency_id)
+            list__stack.append((int__dependency_id, iter(dict__dependencies.get(dependency, [])), []))
+            break
+        else:
+          list__stack.pop()
+          self.list__nodes[int__id].tuple__dependency_ids = tuple(list__dependency_ids)
+          set__on_path.discard(int__id)
+          list__postorder.append(int__id)
+
+    # priority: the longest path from a root, in one pass over the nodes in topological order
+    self.list__priorities = [0] * len(self.list__nodes)
+    for int__id in reversed(list__postorder):
+      for int__dependency_id in self.list__nodes[int__id].tuple__dependency_ids:
+        self.list__priorities[int__dependency_id] = max(self.list__priorities[int__dependency_id], self.list__priorities[int__id] + 1)
+
+  def get__dict__final(self):
+    # -> package name -> priority, version, date, URL and names of dependencies, the deepest packages first, older ones first among them
+    dict__final = {}
+    for int__id in sorted(range(len(self.list__nodes)), key=lambda int__id: (-self.list__priorities[int__id], self.list__nodes[int__id].int__date)):
+      node = self.list__nodes[int__id]
+      dict__final[node.name] = {
+        "priority": self.list__priorities[int__id],
+        "version": node.version,
+        "date": node.date,
+        "URL": node.URL,
+        "dependencies": sorted(self.list__nodes[int__dependency_id].name for int__dependency_id in node.tuple__dependency_ids)
       }
-      for dependency in dependencies:
-        find__package__and__parse__dpendencies(
-          dependency, 
-          str__version_target=None, 
-          str__date_before=date, 
-          dict__parent=dict__parent[package_name]
-        )
-    else: # sub dependencies
-      dict__parent["dependencies"][package_name] = {
-        "version": version,
-        "date": date,
-        "dependencies": {}
+    return dict__final
+
+  def get__dict__JSON(self):
+    # every package once, with the names of its dependencies, however many packages depend on it
+    return {
+      "roots": [self.list__nodes[int__id].name for int__id in self.tuple__root_ids],
+      "packages": {
+        node.name: {
+          "version": node.version,
+          "date": node.date,
+          "URL": node.URL,
+          "dependencies": [self.list__nodes[int__dependency_id].name for int__dependency_id in node.tuple__dependency_ids]
+        } for node in self.list__nodes
       }
-      for dependency in dependencies:
-        find__package__and__parse__dpendencies(
-          dependency, 
-          str__version_target=None, 
-          str__date_before=date, 
-          dict__parent=dict__parent["dependencies"][package_name]
-        )
-  else:
-    error(f"'{package_name}' @ {str__version_target} not found")
-    list__error_packages.append({
-      "package_name": package_name,
-      "version_target": str__version_target,
-      "date_before": str__date_before
-    })
+    }
 
-def command__tree(list_str__package_name__and__version):
-  global dict__dependencies_tree
-  print("parse dependencies tree...")
+  def iterate__tree_lines(self):
+    # the tree as text, a subtree shown again is only named
+    set__shown = set()
+    list__stack = [(int__id, 0) for int__id in reversed(self.tuple__root_ids)]
+    while len(list__stack) > 0:
+      int__id, int__level = list__stack.pop()
+      node = self.list__nodes[int__id]
+      if (int__id in set__shown) and (len(node.tuple__dependency_ids) > 0):
+        yield f"{'  ' * int__level}{node.name} @ {node.version} (dependencies shown above)"
+        continue
+      set__shown.add(int__id)
+      yield f"{'  ' * int__level}{node.name} @ {node.version} ({node.date})"
+      list__stack += [(int__dependency_id, int__level + 1) for int__dependency_id in reversed(node.tuple__dependency_ids)]
+
+class Error__conflicts(Exception):
+  # no consistent choice of versions exists, `list__conflicts` explains why
+  def __init__(self, list__conflicts):
+    super().__init__("no consistent versions of the packages exist")
+    self.list__conflicts = list__conflicts
+
+class Backend__repository:
+  # where a `Resolver` reads candidate versions and metadata from: a repository (see `get__repository_URLs`), through the metadata store,
+  # each read once by the backend (in `dict__loaded_dicts`) and shared by every resolver given it;
+  # any object with the same three methods can be given to `Resolver` instead, e.g. metadata served by something else
+  def __init__(self, str__repository=None, if__cache_used=True):
+    # `str__repository`: the one of the command line (`--repository`) if `None`;
+    # `if__cache_used`: whether unexpired cached indexes are used, `None` to ask once, as the command line does
+    if str__repository != None:
+      self.URL__LATEST_INDEX, self.URL__ARCHIVE_INDEX, self.URL__CONTRIB, self.URL__PACKAGES, self.URL__ARCHIVE_RDS = get__repository_URLs(str__repository)
+    else:
+      self.URL__LATEST_INDEX, self.URL__ARCHIVE_INDEX, self.URL__CONTRIB, self.URL__PACKAGES, self.URL__ARCHIVE_RDS = URL__LATEST_INDEX, URL__ARCHIVE_INDEX, URL__CONTRIB, URL__PACKAGES, URL__ARCHIVE_RDS
+    self.if__cache_used = if__cache_used
+    self.dict__loaded_dicts = {} # file name -> dict already loaded, so concurrent lookups of the same file fetch and parse it only once
+    self.dict__loading_locks = {}
+    self.lock__loading_locks = threading.Lock()
+    self.dict__loading_errors = {} # file name -> exception of its last load failed, raised to the threads which waited for that load
+
+  @contextlib.contextmanager
+  def activate(self):
+    # module functions of this thread read the repository of this backend, and keep what they load in it
+    backend__previous = local__repository.__dict__.get("backend")
+    local__repository.backend = self
+    try:
+      yield self
+    finally:
+      local__repository.backend = backend__previous
+
+  def get__candidate_versions(self, package_name):
+    # -> version -> date of every version of the package
+    with self.activate():
+      return get__candidate_versions(package_name)
+
+  def get__package_metadata(self, package_name, str__version):
+    with self.activate():
+      return get__package_metadata(package_name, str__version)
+
+  def get__tarball_URL(self, package_name, str__version):
+    with self.activate():
+      return get__tarball_URL(package_name, str__version)
+
+def get__backend():
+  # -> backend the module functions of this thread read from, the one of the command line if none is active
+  global backend__default
+  backend = local__repository.__dict__.get("backend")
+  if backend != None:
+    return backend
+  with lock__backend_default:
+    if backend__default == None:
+      backend__default = Backend__repository(if__cache_used=None)
+  return backend__default
+
+class Resolver:
+  # resolves roots for one R version, everything of the resolution kept by the object, so resolvers can run at the same time (see `resolve__many`);
+  # nothing is asked and nothing exits: the backend is non-interactive by default, conflicts raise `Error__conflicts`, fetches given up `Error__fetch`
+  def __init__(self, str__R_version, backend=None):
+    self.str__R_version = str__R_version
+    self.str__date_release = get__R_release_date(str__R_version) # once, as it may warn
+    self.backend = backend if (backend != None) else Backend__repository()
+    self.reset()
+
+  def reset(self):
+    self.dict__metadata = {} # (package name, version) -> metadata of the version read while solving, dependencies included; `{}` if it can not be read
+    self.dict__solution = {} # package name -> version chosen
+    self.dict__chosen_dependencies = {} # package name -> names of the packages its version chosen depends on, in the order they are declared
+    self.dict__chosen_dates_before = {} # package name -> date of its earliest dependent when it was chosen, which ordered its candidates
+    self.dict__chosen_constraints = {} # package name -> version constraints on it when it was chosen, which its version had to satisfy
+    self.dict__preferred = {} # package name -> version, date cutoff and constraints of the previous resolution (see `load__previous_resolution`)
+    self.list__error_packages = []
+    self.graph__packages = None
+
+  def get__bundled_version(self, package_name):
+    # -> version of a recommended package bundled with the R version, `None` if not known
+    if (package_name not in RECOMMENDED_PACKAGES) or (self.str__date_release == None):
+      return None
+    dict__versions = self.backend.get__candidate_versions(package_name)
+    list__versions = [str__version for str__version in dict__versions if if__date_unsure__not_later_than__date_target(dict__versions[str__version], self.str__date_release)]
+    return max(list__versions, key=parse__version, default=None)
+
+  def get__candidate_metadata(self, package_name, str__version):
+    # -> metadata of one version of the package, as the backend gives it;
+    # the version of a recommended package bundled with R is not read at all, it comes with R and so do its dependencies
+    if (package_name, str__version) not in self.dict__metadata:
+      if str__version == self.get__bundled_version(package_name):
+        self.dict__metadata[(package_name, str__version)] = {
+          "version": str__version,
+          "date": self.backend.get__candidate_versions(package_name)[str__version],
+          "dependencies": [],
+          "URL": self.backend.get__tarball_URL(package_name, str__version),
+          "bundled": True
+        }
+      else:
+        self.dict__metadata[(package_name, str__version)] = self.backend.get__package_metadata(package_name, str__version)
+    return self.dict__metadata[(package_name, str__version)]
 
-  for str__package_name__and__version in list_str__package_name__and__version:
-    package_name, str__version_target = split__package_name__and__version(str__package_name__and__version)
+  def load__previous_resolution(self, dict__lockfile):
+    # versions in the lockfile, resolved for the same R version, are what the solver tries first:
+    # their metadata comes from the lockfile, so packages not affected by changed roots are chosen again without any lookup
+    if (dict__lockfile.get("R", {}).get("Version") != self.str__R_version) or ("UPPAIR" not in dict__lockfile):
+      return
 
-    find__package__and__parse__dpendencies(
-      package_name = package_name,
-      str__version_target = str__version_target,
-      str__date_before = None, 
-      dict__parent = dict__dependencies_tree
-    )
+    for package_name, dict__record in dict__lockfile.get("Packages", {}).items():
+      if "Dependencies" not in dict__record:
+        continue
+      self.dict__preferred[package_name] = (dict__record["Version"], dict__record.get("DateBefore"), dict__record.get("Constraints"))
+      self.dict__metadata[(package_name, dict__record["Version"])] = {
+        "version": dict__record["Version"],
+        "date": dict__record.get("Date"),
+        "URL": dict__record["URL"],
+        "MD5sum": dict__record.get("MD5sum"),
+        "dependencies": dict__record["Dependencies"]
+      }
+    for package_name, str__version in dict__lockfile["UPPAIR"].get("Bundled", {}).items():
+      self.dict__preferred[package_name] = (str__version, None, None)
+      self.dict__metadata[(package_name, str__version)] = {
+        "version": str__version,
+        "date": None,
+        "URL": None,
+        "dependencies": [],
+        "bundled": True
+      }
+    success(f"{len(self.dict__preferred)} packages resolved before loaded from {PATH_LOCKFILE}, roots then: {dict__lockfile['UPPAIR'].get('Roots')}")
+
+  @traced("resolve")
+  def solve__versions(self, list__roots):
+    # -> package name -> version chosen, one per package, satisfying the version constraints of every package chosen depending on it;
+    # depth by depth from the roots, backtracking over the candidate versions of each package when a constraint fails,
+    # straight back to the latest package choice involved in the conflict (conflict-directed backjumping);
+    # `Error__conflicts` is raised if there is no consistent choice, with the conflicts causing it
+    dict__requirements = {} # package name -> name of a chosen package depending on it (`""` for roots) -> version constraints
+    dict__chosen = {}
+    dict__chosen_dates = {}
+    set__missing = set() # packages not on CRAN at all, reported once and left out
+    list__frames = [] # one per package chosen, in order: its candidates left, the packages still to choose and the packages conflicting with it
+    list__conflicts = [] # explanations of the packages which ran out of candidates, since the last successful choice
+    set__prefetched = set()
+
+    for package_name, str__version_target in list__roots:
+      dict__requirements.setdefault(package_name, {})[""] = [] if (str__version_target == None) else [("==", str__version_target)]
+
+    def get__date_before(package_name):
+      list__dates = [dict__chosen_dates[requirer] for requirer in dict__requirements[package_name] if requirer != ""]
+      return min(list__dates) if len(list__dates) > 0 else None # `%Y-%m-%d` dates sort as strings
+
+    def get__constraints(package_name):
+      # -> every version constraint on the package, whoever requires it, as the lockfile keeps them
+      return sorted([str__operator, str__version] for str__operator, str__version in {
+        tuple(constraint) for list__constraints in dict__requirements[package_name].values() for constraint in list__constraints
+      })
+
+    def prefetch(package_name, str__date_before):
+      # metadata of the version most likely chosen is loaded in the background, while the packages before it are chosen
+      if (package_name in BASE_PACKAGES) or (package_name in self.dict__preferred):
+        return
+      dict__versions = self.backend.get__candidate_versions(package_name)
+      if len(dict__versions) > 0:
+        self.get__candidate_metadata(package_name, order__candidate_versions(dict__versions, str__date_before)[0])
+
+    def start__frame(list__queue):
+      # -> frame of the next package to choose from the queue, `None` when every package is chosen
+      while len(list__queue) > 0:
+        package_name, list__queue = list__queue[0], list__queue[1:]
+        if (package_name in dict__chosen) or (len(dict__requirements.get(package_name, {})) == 0) or (package_name in BASE_PACKAGES):
+          continue
+        str__version_preferred, str__date_before_preferred, list__constraints_preferred = self.dict__preferred.get(package_name, (None, None, None))
+        if (str__version_preferred != None) and (
+          self.dict__metadata[(package_name, str__version_preferred)].get("bundled") or
+          ((get__date_before(package_name) == str__date_before_preferred) and (get__constraints(package_name) == list__constraints_preferred))
+        ):
+          # chosen before under the same date cutoff and constraints: all other candidates are only listed if it does not fit anymore
+          return {
+            "package_name": package_name,
+            "queue": list__queue,
+            "candidates": [str__version_preferred],
+            "date_before": get__date_before(package_name),
+            "constraints": get__constraints(package_name),
+            "if__listed": False,
+            "conflicts": set()
+          }
+        dict__versions = self.backend.get__candidate_versions(package_name)
+        if len(dict__versions) == 0:
+          if package_name not in set__missing:
+            set__missing.add(package_name)
+            error(f"'{package_name}' not found")
+            self.list__error_packages.append({
+              "package_name": package_name,
+              "version_target": dict(list__roots).get(package_name),
+              "date_before": get__date_before(package_name)
+            })
+          continue
+        list__candidates = order__candidate_versions(dict__versions, get__date_before(package_name))
+        str__version_bundled = self.get__bundled_version(package_name)
+        if str__version_bundled != None: # what R comes with first
+          list__candidates.remove(str__version_bundled)
+          list__candidates.insert(0, str__version_bundled)
+        return {
+          "package_name": package_name,
+          "queue": list__queue,
+          "candidates": list__candidates,
+          "date_before": get__date_before(package_name),
+          "constraints": get__constraints(package_name),
+          "if__listed": True,
+          "conflicts": set()
+        }
+      return None
+
+    list__prefetches = [] # futures of `prefetch`
+    def check__prefetches(if__wait=False):
+      # errors of the prefetches done (or of all of them, once finished) are raised here, in the resolving thread
+      for future in [future for future in list__prefetches if if__wait or future.done()]:
+        list__prefetches.remove(future)
+        try:
+          future.result()
+        except Exception:
+          for future__pending in list__prefetches:
+            future__pending.cancel()
+          raise
+
+    def undo__frame(dict__frame):
+      package_name = dict__frame["package_name"]
+      for dependency in dict__frame["dependencies"]:
+        dict__requirements[dependency].pop(package_name, None)
+      del dict__chosen[package_name]
+      del dict__chosen_dates[package_name]
+
+    with ThreadPoolExecutor(max_workers=int__fetch_workers) as executor:
+      for package_name, _ in list__roots:
+        list__prefetches.append(executor.submit(bind__output(prefetch), package_name, None))
+      dict__frame = start__frame([package_name for package_name, _ in list__roots])
+
+      while dict__frame != None:
+        check__prefetches()
+        package_name = dict__frame["package_name"]
+        dict__frame__next = None
+        while True:
+          if (len(dict__frame["candidates"]) == 0) and (not dict__frame["if__listed"]):
+            dict__frame["if__listed"] = True
+            dict__frame["candidates"] = [
+              str__version for str__version in order__candidate_versions(self.backend.get__candidate_versions(package_name), dict__frame["date_before"])
+              if str__version != self.dict__preferred[package_name][0]
+            ]
+          if len(dict__frame["candidates"]) == 0:
+            break
+          str__version = dict__frame["candidates"].pop(0)
+          list__requirers__violated = [requirer for requirer, list__constraints in dict__requirements[package_name].items() if not if__version_satisfies(str__version, list__constraints)]
+          if len(list__requirers__violated) > 0:
+            dict__frame["conflicts"].update(list__requirers__violated)
+            continue
+          dict__metadata = self.get__candidate_metadata(package_name, str__version)
+          if len(dict__metadata) == 0:
+            continue
+          if not if__R_version_fits(dict__metadata.get("limitation_of_R_version"), self.str__R_version):
+            warning(f"{package_name} {str__version} needs R {format__constraints([dict__metadata['limitation_of_R_version']])}, skip it for R {self.str__R_version}")
+            continue
+
+          dict__dependencies = {} # name -> constraints, in the order declared
+          for str__item in dict__metadata["dependencies"]:
+            dependency, list__constraints = parse__dependency(str__item)
+            if (dependency != "") and (dependency != package_name):
+              dict__dependencies.setdefault(dependency, []).extend(list__constraints)
+          list__clashes = [dependency for dependency, list__constraints in dict__dependencies.items() if (dependency in dict__chosen) and (not if__version_satisfies(dict__chosen[dependency], list__constraints))]
+          if len(list__clashes) > 0:
+            dict__frame["conflicts"].update(list__clashes)
+            list__conflicts.append(f"{package_name} {str__version} needs " + ", ".join(f"{dependency} {format__constraints(dict__dependencies[dependency])}, but {dependency} {dict__chosen[dependency]} is chosen" for dependency in list__clashes))
+            continue
+
+          # choose it
+          dict__chosen[package_name] = str__version
+          dict__chosen_dates[package_name] = dict__metadata["date"]
+          dict__frame["dependencies"] = list(dict__dependencies)
+          for dependency, list__constraints in dict__dependencies.items():
+            dict__requirements.setdefault(dependency, {})[package_name] = list__constraints
+            if dependency not in set__prefetched:
+              set__prefetched.add(dependency)
+              list__prefetches.append(executor.submit(bind__output(prefetch), dependency, dict__metadata["date"]))
+          list__frames.append(dict__frame)
+          list__conflicts = []
+          dict__frame__next = start__frame(dict__frame["queue"] + dict__frame["dependencies"])
+          if dict__frame__next == None: # every package chosen
+            for dict__frame__chosen in list__frames:
+              self.dict__chosen_dependencies[dict__frame__chosen["package_name"]] = dict__frame__chosen["dependencies"]
+              self.dict__chosen_dates_before[dict__frame__chosen["package_name"]] = dict__frame__chosen["date_before"]
+              self.dict__chosen_constraints[dict__frame__chosen["package_name"]] = dict__frame__chosen["constraints"]
+            check__prefetches(if__wait=True)
+            return dict__chosen
+          break
+
+        if dict__frame__next != None:
+          dict__frame = dict__frame__next
+          continue
+
+        # out of candidates: the packages depending on it, or clashing with it, have to be chosen differently
+        list__conflicts.append(f"no version of {package_name} fits: " + ", ".join(
+          f"{'root' if (requirer == '') else (requirer + ' ' + dict__chosen[requirer])} needs {format__constraints(list__constraints)}"
+          for requirer, list__constraints in dict__requirements[package_name].items()
+        ) + f"; versions on CRAN: {sorted(self.backend.get__candidate_versions(package_name), key=parse__version)}")
+        set__conflicts = (dict__frame["conflicts"] | set(dict__requirements[package_name])) - {""}
+        list__indexes = [index for index, dict__frame__chosen in enumerate(list__frames) if dict__frame__chosen["package_name"] in set__conflicts]
+        if len(list__indexes) == 0:
+          break
+        while len(list__frames) > list__indexes[-1]:
+          dict__frame = list__frames.pop()
+          undo__frame(dict__frame)
+        # the latest of them goes on with its next candidate, carrying the conflicts over
+        dict__frame["conflicts"].update(set__conflicts - {dict__frame["package_name"]})
+
+    check__prefetches(if__wait=True)
+    if len(list__conflicts) == 0: # nothing to choose at all, every root not found
+      return dict__chosen
+    raise Error__conflicts(list__conflicts)
+
+  def convert__packages__to__lockfile(self, dict__packages, list_str__package_name__and__version):
+    # renv.lock layout, so renv can restore it too; `Date`, `URL` and `MD5sum` are kept for `auto`,
+    # the roots asked, the recommended packages left bundled, full dependencies, date cutoffs and constraints for the next `tree` to start from
+    dict__lockfile = {
+      "R": {
+        "Version": self.str__R_version,
+        "Repositories": [{"Name": "CRAN", "URL": getattr(self.backend, "URL__CONTRIB", URL__CONTRIB).rpartition("src/contrib/")[0].rstrip("/")}]
+      },
+      "UPPAIR": {
+        "Roots": list_str__package_name__and__version,
+        "Bundled": {
+          package_name: str__version for package_name, str__version in sorted(self.dict__solution.items())
+          if self.dict__metadata[(package_name, str__version)].get("bundled")
+        }
+      },
+      "Packages": {}
+    }
+    for package_name in sorted(dict__packages, key=str.lower):
+      dict__package = dict__packages[package_name]
+      dict__metadata = self.dict__metadata[(package_name, dict__package["version"])]
+      dict__record = {
+        "Package": package_name,
+        "Version": dict__package["version"],
+        "Source": "Repository",
+        "Repository": "CRAN",
+        "Date": dict__package["date"],
+        "URL": dict__package["URL"]
+      }
+      if dict__metadata.get("MD5sum"):
+        dict__record["MD5sum"] = dict__metadata["MD5sum"]
+      dict__record["Requirements"] = dict__package["dependencies"]
+      if self.dict__solution.get(package_name) == dict__package["version"]:
+        dict__record["Dependencies"] = dict__metadata["dependencies"]
+        dict__record["DateBefore"] = self.dict__chosen_dates_before.get(package_name)
+        dict__record["Constraints"] = self.dict__chosen_constraints.get(package_name)
+      dict__lockfile["Packages"][package_name] = dict__record
+    return dict__lockfile
+
+  def resolve(self, list_str__package_name__and__version, dict__lockfile__previous=None):
+    # -> everything `tree` outputs: packages in the order to install, lines and JSON of the tree, the lockfile, packages not found,
+    # and every version read (tarballs `mirror` copies); one resolution at a time per resolver
+    self.reset()
+    list__roots = []
+    for str__package_name__and__version in list_str__package_name__and__version:
+      list__roots.append(split__package_name__and__version(str__package_name__and__version))
+
+    if dict__lockfile__previous != None:
+      self.load__previous_resolution(dict__lockfile__previous)
+    self.dict__solution = self.solve__versions(list__roots)
+
+    with trace__span("resolve", "Graph__packages"):
+      self.graph__packages = Graph__packages([package_name for package_name, _ in list__roots], self.dict__solution, self.dict__chosen_dependencies, self.dict__metadata)
+
+    # sort out packages and order to install
+    dict__final = self.graph__packages.get__dict__final()
+    return {
+      "packages": dict__final,
+      "lines": list(self.graph__packages.iterate__tree_lines()),
+      "tree": self.graph__packages.get__dict__JSON(),
+      "lockfile": self.convert__packages__to__lockfile(dict__final, list_str__package_name__and__version),
+      "error_packages": self.list__error_packages,
+      "versions_read": [dict__metadata for dict__metadata in self.dict__metadata.values() if dict__metadata]
+    }
+
+def resolve__many(list__environments, backend=None, int__workers=RESOLVE_MAX_WORKERS):
+  # -> for each (R version, roots as `pack@ver`, previous lockfile or `None`) given, in the same order, what `Resolver.resolve` returns
+  # or the `Error__conflicts` (or `Error__fetch`) it raised; resolved at the same time, metadata read once for all through the same backend
+  backend = backend if (backend != None) else Backend__repository()
+
+  def resolve(tuple__environment):
+    str__R_version__environment, list_str__package_name__and__version, dict__lockfile__previous = tuple__environment
+    try:
+      return Resolver(str__R_version__environment, backend).resolve(list_str__package_name__and__version, dict__lockfile__previous)
+    except (Error__conflicts, Error__fetch) as e:
+      return e
+
+  with ThreadPoolExecutor(max_workers=int__workers) as executor:
+    return list(executor.map(bind__output(resolve), list__environments))
+
+def report__conflicts(list__conflicts):
+  error("no consistent versions of the packages exist:")
+  output("\n".join(f"  {str__conflict}" for str__conflict in list__conflicts))
+  save__file(os.path.join(PATH_CACHE, f"{formatted_date__when_start}_version_conflicts.json"), json.dumps(list__conflicts, ensure_ascii=False, indent=2))
+
+def resolve__tree(list_str__package_name__and__version, dict__lockfile__previous=None):
+  # -> what `Resolver.resolve` returns for the R version of the command, `None` if there is no consistent choice of versions
+  try:
+    return Resolver(str__R_version, get__backend()).resolve(list_str__package_name__and__version, dict__lockfile__previous)
+  except Error__conflicts as e:
+    report__conflicts(e.list__conflicts)
+    return None
+
+def command__tree(list_str__package_name__and__version):
+  step("parse dependencies tree...")
+
+  dict__lockfile__previous = read__previous_lockfile()
+  dict__result = None
+  if if__daemon_allowed:
+    dict__result = resolve__tree__by__daemon(list_str__package_name__and__version, dict__lockfile__previous)
+  if dict__result == None:
+    dict__result = resolve__tree(list_str__package_name__and__version, dict__lockfile__previous)
+  if dict__result == None:
+    exit(1)
+  for dict__record in dict__result["lockfile"]["Packages"].values():
+    if dict__record.get("MD5sum"):
+      dict__MD5sums[dict__record["URL"]] = dict__record["MD5sum"]
 
   success("dependencies tree parsed\n")
-  print(dict__dependencies_tree)
-  save__file(os.path.join(PATH_CACHE, f"{formatted_date__when_start}_dependencies_tree.json"), json.dumps(dict__dependencies_tree, ensure_ascii=False, indent=2))
+  print("\n".join(dict__result["lines"]))
+  save__file(os.path.join(PATH_CACHE, f"{formatted_date__when_start}_dependencies_tree.json"), json.dumps(dict__result["tree"], ensure_ascii=False, indent=2))
 
-  if len(list__error_packages) > 0:
+  if len(dict__result["error_packages"]) > 0:
     error("but with some packages not found:")
-    print(f"  {list__error_packages}")
-    save__file(os.path.join(PATH_CACHE, f"{formatted_date__when_start}_error_packages.json"), json.dumps(list__error_packages, ensure_ascii=False, indent=2))
+    print(f"  {dict__result['error_packages']}")
+    save__file(os.path.join(PATH_CACHE, f"{formatted_date__when_start}_error_packages.json"), json.dumps(dict__result["error_packages"], ensure_ascii=False, indent=2))
 
-  # sort out packages and order to install
-  
-  def organize_dict(dict__nested):
-    list__result = []
-    def append__packages__in(dict, int__level=0):
-      if len(dict) > 0:
-        for key in dict:
-          list__result.append((int__level, key, dict[key]["version"], dict[key]["date"]))
-          if "dependencies" in dict[key]:
-            if len(dict[key]["dependencies"]) > 0:
-              append__packages__in(dict[key]["dependencies"], int__level + 1)
-    append__packages__in(dict__nested)
-    sorted_result = sorted(list__result, key=lambda x: x[0], reverse=True)
-  
-    dict__final = {}
+  save__file(os.path.join(PATH_CACHE, f"dependencies_tree_final_{formatted_date__when_start}.json"), json.dumps(dict__result["packages"], ensure_ascii=False, indent=2))
 
-    for tmp in sorted_result:
-      if tmp[1] not in dict__final:
-        dict__final[tmp[1]] = {
-          "priority": tmp[0],
-          "version": tmp[2],
-          "date": tmp[3]
-        }
+  if (not os.path.exists(PATH_LOCKFILE)) or ask__user_confirm(f"{PATH_LOCKFILE} exists, overwrite it with the packages resolved?"):
+    save__file(PATH_LOCKFILE, json.dumps(dict__result["lockfile"], ensure_ascii=False, indent=2))
+
+  return dict__result
+
+def read__previous_lockfile():
+  # -> the lockfile written by the previous `tree`, `None` if there is none or `--fresh`
+  if if__fresh or (not os.path.exists(PATH_LOCKFILE)):
+    return None
+  try:
+    with open(PATH_LOCKFILE, "r", encoding="utf-8") as f:
+      return json.load(f)
+  except Exception as e:
+    warning(f"failed to load {PATH_LOCKFILE}, resolve from scratch:\n  {e}")
+    return None
+
+def convert__lockfile__to__packages(dict__lockfile):
+  # -> package name -> the same fields as the final dict of `tree`, `priority` being the depth of its dependencies
+  dict__packages = {}
+  for package_name, dict__record in dict__lockfile.get("Packages", {}).items():
+    str__URL = dict__record.get("URL") or urljoin(URL__ARCHIVE_INDEX, f"{package_name}/{package_name}_{dict__record['Version']}.tar.gz")
+    if dict__record.get("MD5sum"):
+      dict__MD5sums[str__URL] = dict__record["MD5sum"]
+    dict__packages[package_name] = {
+      "priority": 0,
+      "version": dict__record["Version"],
+      "date": dict__record.get("Date"),
+      "URL": str__URL,
+      "dependencies": [dependency for dependency in dict__record.get("Requirements", []) if dependency in dict__lockfile["Packages"]]
+    }
+
+  dict__depths = {}
+  def get__depth(package_name, set__visiting):
+    if package_name not in dict__depths:
+      if package_name in set__visiting: # dependency cycle
+        return 0
+      set__visiting.add(package_name)
+      dict__depths[package_name] = 1 + max([get__depth(dependency, set__visiting) for dependency in dict__packages[package_name]["dependencies"]], default=-1)
+      set__visiting.discard(package_name)
+    return dict__depths[package_name]
+  for package_name in dict__packages:
+    dict__packages[package_name]["priority"] = get__depth(package_name, set())
+  return dict__packages
+
+def get__R_build_target():
+  try:
+    process = subprocess.run([r_start, "--vanilla", "--slave", "-e", R_EXPRESSION__BUILD_TARGET], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+    str__R_version, str__platform = process.stdout.decode("utf-8").strip().splitlines()[-1].split("\t")
+    return f"{str__R_version}@{str__platform}"
+  except Exception as e:
+    warning(f"failed to tell R version and platform, binary builds will not be cached:\n  {e}")
+    return None
+
+def get__build_file_name(package_name, str__version):
+  # as named by `R CMD INSTALL --build`
+  str__platform = str__R_build_target.split("@", 1)[1]
+  if ("mingw" in str__platform) or ("windows" in str__platform):
+    str__extension = ".zip"
+  elif "darwin" in str__platform:
+    str__extension = ".tgz"
+  else:
+    str__extension = ".tar.gz"
+  return f"{package_name}_{str__version}_R_{str__platform}{str__extension}"
+
+def get__path__R_package(package_name, str__version):
+  return os.path.join(PATH_STORAGE, f"{package_name}_v_{str__version}.tar.gz")
+
+def get__key__build(package_name, str__version):
+  return f"build:{package_name}@{str__version}@{str__R_build_target}"
+
+@traced("install")
+def install__packages__in__one_session(list__package_names, dict__packages, dict__downloads={}):
+  # one `R --vanilla` session installs the packages in the given order, so R starts only once for all of them;
+  # a package built before by the same R is installed from its cached binary instead of compiled again,
+  # others wait for their downloads started ahead in `dict__downloads` (package name -> future)
+  # -> package name -> whether installed
+  dict__status = {}
+  dict__build_keys = {} # package name -> key of its binary build in the store, for packages built in this session
+  list__R_calls = []
+  path__build = os.path.abspath(tempfile.mkdtemp(prefix="build_", dir=PATH_CACHE))
+  for package_name in list__package_names:
+    str__version = dict__packages[package_name]["version"]
+    key__build = get__key__build(package_name, str__version)
+    path__blob = None if (str__R_build_target == None) else store__get__path(key__build)
+
+    if path__blob != None:
+      path__R_package = os.path.join(path__build, get__build_file_name(package_name, str__version))
+      try:
+        os.link(path__blob, path__R_package)
+      except OSError:
+        shutil.copyfile(path__blob, path__R_package)
+      step(f"installing {package_name} @ {str__version} ...\n  from cached binary build {key__build}")
+    else:
+      path__R_package = get__path__R_package(package_name, str__version)
+      # `tree` only streams DESCRIPTION, the whole file is needed now
+      if package_name in dict__downloads:
+        if__downloaded = dict__downloads[package_name].result()
       else:
-        tmp_priority = tmp[0]
-        if tmp_priority > dict__final[tmp[1]]["priority"]:
-          dict__final[tmp[1]]["priority"] = tmp_priority
-        
-        tmp_version = tmp[2]
-        tmp_date = tmp[3]
-        date__tmp = datetime.strptime(tmp_date, "%Y-%m-%d")
-        date__final = datetime.strptime(dict__final[tmp[1]]["date"], "%Y-%m-%d")
-        if date__tmp < date__final:
-          dict__final[tmp[1]]["version"] = tmp_version
-          dict__final[tmp[1]]["date"] = tmp_date
+        if__downloaded = download__file_from__URL(dict__packages[package_name]["URL"], path__R_package)
+      if not if__downloaded:
+        dict__status[package_name] = False
+        continue
+      step(f"installing {package_name} @ {str__version} ...\n  from {path__R_package}")
+      if str__R_build_target != None:
+        dict__build_keys[package_name] = key__build
 
-    return dict__final
+    list__R_calls.append(
+      f"uppair__install({json.dumps(package_name)}, {json.dumps(os.path.abspath(path__R_package), ensure_ascii=False)}, " + 
+      f"{json.dumps(str__version)}, {'TRUE' if package_name in dict__build_keys else 'FALSE'})"
+    )
 
-  dict__final = organize_dict(dict__dependencies_tree)
-  save__file(os.path.join(PATH_CACHE, f"dependencies_tree_final_{formatted_date__when_start}.json"), json.dumps(dict__final, ensure_ascii=False, indent=2))
+  annotate__span(packages=list__package_names, builds_reused=len(list__R_calls) - len(dict__build_keys) if (str__R_build_target != None) else 0)
+  if len(list__R_calls) == 0:
+    shutil.rmtree(path__build, ignore_errors=True)
+    return dict__status
 
-  return dict__final
+  path__script = os.path.join(path__build, "uppair_install.R")
+  try:
+    with open(path__script, "w", encoding="utf-8") as f:
+      f.write(R_SCRIPT__INSTALL.replace("{prefix}", INSTALL_STATUS_PREFIX) + "\n".join(list__R_calls) + "\n")
+    process = subprocess.run([r_start, "--vanilla", "--slave", "-f", path__script], cwd=path__build, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    bytes__output = process.stdout
+  except Exception as e:
+    error(f"R session failed to start: {e}")
+    bytes__output = b""
+
+  # outputs of R sessions running at the same time are not interleaved in the log
+  with lock__process_log:
+    with open(PATH_PROCESS_LOG, "ab") as log_file:
+      log_file.write(bytes__output)
+
+  dict__messages = {}
+  for str__line in bytes__output.decode("utf-8", errors="replace").splitlines():
+    list__fields = str__line.split("\t", 3)
+    if (len(list__fields) == 4) and (list__fields[0] == INSTALL_STATUS_PREFIX):
+      _, package_name, str__status, str__message = list__fields
+      dict__status[package_name] = (str__status == "ok")
+      dict__messages[package_name] = str__message
+
+  for package_name in list__package_names:
+    if dict__status.get(package_name) and (package_name in dict__build_keys):
+      path__built = os.path.join(path__build, get__build_file_name(package_name, dict__packages[package_name]["version"]))
+      if os.path.exists(path__built):
+        store__put__file(dict__build_keys[package_name], path__built, STORE_TTL__FOREVER)
+      else:
+        warning(f"binary build of {package_name} not found, it will be compiled again next time")
+    if dict__status.get(package_name):
+      success(f"  {package_name} @ {dict__packages[package_name]['version']} installed")
+    elif package_name in dict__messages:
+      error(f"{package_name} installation failed: {dict__messages[package_name]}, see {PATH_PROCESS_LOG}")
+    elif package_name not in dict__status: # not a failed download, already reported
+      dict__status[package_name] = False
+      error(f"{package_name} installation failed: no status reported by R, see {PATH_PROCESS_LOG}")
+
+  shutil.rmtree(path__build, ignore_errors=True)
+  return dict__status
+
+def install__packages__by_dependencies(dict__packages, dict__downloads={}):
+  # each package is installed as soon as all packages it depends on are, by up to `int__install_workers` R sessions at the same time,
+  # packages ready together are installed in batches of up to `int__install_batch_size` per session,
+  # packages depending (directly or not) on a failed one are skipped
+  # -> names of installed, failed, skipped packages
+  dict__waiting_for = {} # package name -> names of its dependencies not installed yet
+  dict__dependents = {}
+  for package_name, dict__package in dict__packages.items():
+    dict__waiting_for[package_name] = set([dependency for dependency in dict__package["dependencies"] if (dependency in dict__packages) and (dependency != package_name)])
+    for dependency in dict__waiting_for[package_name]:
+      dict__dependents.setdefault(dependency, []).append(package_name)
+
+  list__installed = []
+  list__failed = []
+  list__skipped = []
+
+  def skip__dependents__of(package_name):
+    list__to_skip = list(dict__dependents.get(package_name, []))
+    while len(list__to_skip) > 0:
+      dependent = list__to_skip.pop()
+      if dependent in dict__waiting_for:
+        del dict__waiting_for[dependent]
+        list__skipped.append(dependent)
+        warning(f"{dependent} skipped: depends on {package_name} which failed to install")
+        list__to_skip += dict__dependents.get(dependent, [])
+
+  with ThreadPoolExecutor(max_workers=int__install_workers) as executor:
+    dict__running = {} # future -> names of the packages installed by it
+    while (len(dict__waiting_for) > 0) or (len(dict__running) > 0):
+      # higher `priority` (deeper in the tree) first, so the longest chains start early
+      list__ready = sorted(
+        [package_name for package_name, set__waiting_for in dict__waiting_for.items() if len(set__waiting_for) == 0],
+        key=lambda package_name: (-dict__packages[package_name]["priority"], package_name)
+      )
+      if (len(list__ready) == 0) and (len(dict__running) == 0):
+        # only packages depending on each other are left, install the deepest one first
+        package_name = min(dict__waiting_for, key=lambda package_name: (-dict__packages[package_name]["priority"], package_name))
+        warning(f"dependency cycle among {sorted(dict__waiting_for)}, install {package_name} first")
+        list__ready = [package_name]
+
+      # ready packages are spread over the idle workers, the rest wait for the next idle one and may be joined by newly ready ones
+      int__idle_workers = int__install_workers - len(dict__running)
+      if (len(list__ready) > 0) and (int__idle_workers > 0):
+        int__batch_size = min(int__install_batch_size, -(-len(list__ready) // int__idle_workers))
+        for index in range(0, min(len(list__ready), int__batch_size * int__idle_workers), int__batch_size):
+          list__batch = list__ready[index:index + int__batch_size]
+          for package_name in list__batch:
+            del dict__waiting_for[package_name]
+          dict__running[executor.submit(install__packages__in__one_session, list__batch, dict__packages, dict__downloads)] = list__batch
+
+      set__done, _ = wait(dict__running, return_when=FIRST_COMPLETED)
+      for future in set__done:
+        dict__status = future.result()
+        for package_name in dict__running.pop(future):
+          if dict__status.get(package_name):
+            list__installed.append(package_name)
+            for dependent in dict__dependents.get(package_name, []):
+              if dependent in dict__waiting_for:
+                dict__waiting_for[dependent].discard(package_name)
+          else:
+            list__failed.append(package_name)
+            skip__dependents__of(package_name)
+
+  return list__installed, list__failed, list__skipped
+
+
+def install__packages(dict__packages):
+  global str__R_build_target
+  str__R_build_target = get__R_build_target()
+
+  # download every tarball not built before, in parallel, while packages whose tarballs arrived are installed
+  with ThreadPoolExecutor(max_workers=int__fetch_workers) as executor__downloads:
+    dict__downloads = {}
+    for package_name, dict__package in sorted(dict__packages.items(), key=lambda item: -item[1]["priority"]):
+      if (str__R_build_target == None) or (store__get__path(get__key__build(package_name, dict__package["version"])) == None):
+        dict__downloads[package_name] = executor__downloads.submit(
+          download__file_from__URL, dict__package["URL"], get__path__R_package(package_name, dict__package["version"])
+        )
+
+    list__installed, list__failed, list__skipped = install__packages__by_dependencies(dict__packages, dict__downloads)
+
+  success(f"{len(list__installed)} packages installed")
+  if len(list__failed) > 0:
+    error(f"{len(list__failed)} packages failed to install:")
+    print(f"  {list__failed}")
+  if len(list__skipped) > 0:
+    warning(f"{len(list__skipped)} packages skipped as their dependencies failed to install:")
+    print(f"  {list__skipped}")
 
 def command__add(list_str__package_name__and__version):
-  dict__dependencies_tree = command__tree(list_str__package_name__and__version)
+  dict__packages = command__tree(list_str__package_name__and__version)["packages"]
+  install__packages(dict__packages)
 
-  # turn dict into list sorted by priority from high to low
-  list__sorted = sorted(dict__dependencies_tree.items(), key=lambda x: x[1]["priority"], reverse=True)
+def command__auto():
+  # install exactly what the lockfile pins: no index is fetched, nothing is resolved
+  step(f"load lockfile:\n  {PATH_LOCKFILE}")
+  try:
+    with open(PATH_LOCKFILE, "r", encoding="utf-8") as f:
+      dict__lockfile = json.load(f)
+  except Exception as e:
+    error(f"failed to load {PATH_LOCKFILE}, run `tree` to create it:\n  {e}")
+    exit(1)
 
-  for element in list__sorted:
-    # print(element)
-    print(f"installing {element[0]} @ {element[1]['version']} ...")
-    
-    path__R_package = os.path.join(PATH_STORAGE, f"{element[0]}_v_{element[1]['version']}.tar.gz")
-    print(f"  from {path__R_package}")
-    
-    list__R_command = [
-      "R",
-      "-e",
-      f"install.packages('{path__R_package}', repos = NULL)"
-    ]
+  dict__packages = convert__lockfile__to__packages(dict__lockfile)
+  success(f"{len(dict__packages)} packages pinned for R {dict__lockfile.get('R', {}).get('Version')}")
+  install__packages(dict__packages)
+
+def get__path__in__snapshot(path__snapshot, str__URL):
+  # a tarball is kept at the same path under `src/contrib/` as in the repository it comes from
+  str__relative_path = unquote(urlsplit(str__URL).path).partition("/src/contrib/")[2]
+  return os.path.join(path__snapshot, "src", "contrib", *str__relative_path.split("/"))
+
+def write__PACKAGES_index(path__contrib):
+  # like `tools::write_PACKAGES`: dependency fields of the DESCRIPTION of every latest tarball, and its MD5sum;
+  # older versions of a package left by a previous `mirror` are moved into `Archive/`, as CRAN does
+  dict__tarballs = {} # package name -> (mtime, file name) of its tarballs
+  for entry in os.scandir(path__contrib):
+    if entry.is_file() and entry.name.endswith(".tar.gz"):
+      dict__tarballs.setdefault(entry.name.partition("_")[0], []).append((entry.stat().st_mtime, entry.name))
+
+  list__records = []
+  for package_name in sorted(dict__tarballs, key=str.lower):
+    list__files = sorted(dict__tarballs[package_name])
+    for _, file_name in list__files[:-1]:
+      path__archive = os.path.join(path__contrib, "Archive", package_name)
+      os.makedirs(path__archive, exist_ok=True)
+      os.replace(os.path.join(path__contrib, file_name), os.path.join(path__archive, file_name))
+
+    path__file = os.path.join(path__contrib, list__files[-1][1])
+    str__DESCRIPTION = read__DESCRIPTION__from__tar_file(path__file)
+    if str__DESCRIPTION == None:
+      continue
+    dict__record = next(parse__DCF(str__DESCRIPTION.splitlines()), {})
+    hash__MD5 = hashlib.md5()
+    with open(path__file, "rb") as f:
+      for bytes__chunk in iter(lambda: f.read(FETCH_CHUNK_SIZE), b""):
+        hash__MD5.update(bytes__chunk)
+    list__lines = [f"{field}: {dict__record[field]}" for field in ["Package", "Version", "Depends", "Imports", "LinkingTo"] if dict__record.get(field)]
+    list__lines.append(f"MD5sum: {hash__MD5.hexdigest()}")
+    list__records.append("\n".join(list__lines))
+
+  str__PACKAGES = "\n\n".join(list__records) + "\n"
+  with open(os.path.join(path__contrib, "PACKAGES"), "w", encoding="utf-8") as f:
+    f.write(str__PACKAGES)
+  with gzip.open(os.path.join(path__contrib, "PACKAGES.gz"), "wt", encoding="utf-8") as f:
+    f.write(str__PACKAGES)
+  success(f"PACKAGES index of {len(list__records)} latest packages written")
+
+def command__mirror(path__snapshot, list_str__package_name__and__version):
+  # tarballs of every package version read while solving (not only those to install) are copied into a local snapshot laid out as CRAN,
+  # dated as CRAN dates them, so `--repository=<snapshot>` resolves the same tree with no network
+  dict__result = command__tree(list_str__package_name__and__version)
+  dict__packages = {} # tarball URL -> resolved node
+  for dict__node in dict__result["versions_read"]:
+    if dict__node["URL"]:
+      dict__packages[dict__node["URL"]] = dict__node
+  step(f"mirror {len(dict__packages)} package versions into:\n  {path__snapshot}")
+
+  def mirror__package(str__URL):
+    dict__package = dict__packages[str__URL]
+    path__file = get__path__in__snapshot(path__snapshot, dict__package["URL"])
+    os.makedirs(os.path.dirname(path__file), exist_ok=True)
+    if not download__file_from__URL(dict__package["URL"], path__file):
+      return False
+    seconds__date = datetime.strptime(dict__package["date"], "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+    os.utime(path__file, (seconds__date, seconds__date))
+    return True
 
+  with ThreadPoolExecutor(max_workers=int__fetch_workers) as executor:
+    list__mirrored = list(executor.map(mirror__package, list(dict__packages)))
+  write__PACKAGES_index(os.path.join(path__snapshot, "src", "contrib"))
+
+  list__failed = [str__URL for str__URL, if__mirrored in zip(dict__packages, list__mirrored) if not if__mirrored]
+  success(f"{len(dict__packages) - len(list__failed)} package versions mirrored, use it by `--repository={path__snapshot}`")
+  if len(list__failed) > 0:
+    error(f"{len(list__failed)} packages failed to download:")
+    print(f"  {list__failed}")
+
+# -------- daemon
+
+def read__daemon_file():
+  # -> port, pid, token and repository of the `serve` process running from this directory, `None` if there is none
+  if not os.path.exists(PATH_DAEMON):
+    return None
+  try:
+    with open(PATH_DAEMON, "r", encoding="utf-8") as f:
+      return json.load(f)
+  except Exception:
+    return None
+
+def resolve__tree__by__daemon(list_str__package_name__and__version, dict__lockfile__previous):
+  # -> what `Resolver.resolve` returns, resolved by `serve` if it is running for the same repository, `None` if it is not
+  dict__daemon = read__daemon_file()
+  if (dict__daemon == None) or (dict__daemon.get("repository") != URL__CONTRIB):
+    return None
+
+  bytes__request = json.dumps({
+    "R_version": str__R_version,
+    "roots": list_str__package_name__and__version,
+    "lockfile": dict__lockfile__previous,
+    "quiet": if__quiet
+  }, ensure_ascii=False).encode("utf-8")
+  connection = http.client.HTTPConnection("127.0.0.1", dict__daemon["port"])
+  try:
+    connection.request("POST", "/tree", bytes__request, {"Content-Type": "application/json", "X-UPPAIR-Token": dict__daemon["token"]})
+    response = connection.getresponse()
+    int__status = response.status
+    dict__response = json.loads(response.read())
+  except (OSError, ValueError) as e:
+    warning(f"resolver daemon (pid {dict__daemon.get('pid')}) not reachable, resolve here instead:\n  {e}")
+    return None
+  finally:
+    connection.close()
+
+  step(f"resolved by the resolver daemon (pid {dict__daemon.get('pid')}):")
+  if dict__response.get("output"):
+    print(dict__response["output"], end="")
+  if int__status == 422: # no consistent choice of versions, conflicts reported in the output
+    exit(1)
+  if int__status == 502: # the repository failed the daemon, it would fail this run too
+    raise Error__fetch(dict__response.get("error"))
+  if int__status != 200:
+    warning(f"resolver daemon failed ({int__status}), resolve here instead:\n  {dict__response.get('error')}")
+    return None
+  return dict__response["result"]
+
+def forget__resolutions(backend, dict__indexes):
+  # metadata the backend read so far is dropped, only the indexes given are kept loaded
+  backend.dict__loaded_dicts.clear()
+  backend.dict__loaded_dicts.update(dict__indexes)
+
+def refresh__indexes(backend):
+  # indexes held by the backend whose stored copies expired are loaded again (conditionally, mostly answered by 304);
+  # if any of them changed, the metadata derived from them is dropped, between two resolutions
+  list__file_names = ["archive_rds_index", "PACKAGES_index", "contrib_listing", "latest_index", "archive_index"]
+  dict__held = {file_name: backend.dict__loaded_dicts[file_name] for file_name in list__file_names if file_name in backend.dict__loaded_dicts}
+  dict__refreshed = dict(dict__held)
+  with backend.activate():
+    for file_name, str__URL, func__load in [
+      ("archive_rds_index", backend.URL__ARCHIVE_RDS, load__archive_rds_index),
+      ("contrib_listing", backend.URL__CONTRIB, load__contrib_listing),
+      ("latest_index", backend.URL__LATEST_INDEX, load__latest_index),
+      ("archive_index", backend.URL__ARCHIVE_INDEX, load__archive_index)
+    ]:
+      if (file_name in dict__held) and store__if_expired(f"dict:{str__URL}"):
+        dict__index = func__load()
+        if len(dict__index) > 0: # kept as it is if it can not be fetched
+          dict__refreshed[file_name] = dict__index
+    if ("PACKAGES_index" in dict__held) and store__if_expired(f"dict:{backend.URL__PACKAGES}"):
+      dict__index = load__PACKAGES_index()
+      if len(dict__index) > 0:
+        dict__refreshed["PACKAGES_index"] = dict(dict__held["PACKAGES_index"], PACKAGES=dict__index)
+
+  list__changed = [file_name for file_name in dict__refreshed if dict__refreshed[file_name] != dict__held[file_name]]
+  if len(list__changed) == 0:
+    return
+  if "PACKAGES_index" in dict__refreshed: # dates of the latest packages come with it
+    dict__refreshed["PACKAGES_index"] = dict(dict__refreshed["PACKAGES_index"], contrib_listing=dict__refreshed.get("contrib_listing", {}))
+  with lock__daemon:
+    forget__resolutions(backend, dict__refreshed)
+  success(f"indexes changed: {list__changed}, metadata read from them dropped")
+
+def refresh__indexes__periodically(backend):
+  while True:
+    time.sleep(DAEMON_REFRESH_INTERVAL)
     try:
-      with open("./process.log", "a") as log_file:
-        subprocess.run(list__R_command, check=True, stdout=log_file, stderr=log_file)
-      success("  package installed")
+      refresh__indexes(backend)
     except Exception as e:
-      error(f"package installation failed: {e}")
+      warning(f"failed to refresh indexes, try again in {DAEMON_REFRESH_INTERVAL} seconds:\n  {e}")
+
+def resolve__tree__for__client(dict__request, backend):
+  # -> HTTP status, response to `POST /tree`: result of `Resolver.resolve` and what it printed
+  # what the resolution prints goes to the client only, the daemon and its refresh thread print as before
+  stream__output = io.StringIO()
+  with lock__daemon, output__to(stream__output, bool(dict__request.get("quiet"))):
+    try:
+      dict__result = Resolver(dict__request.get("R_version"), backend).resolve(dict__request["roots"], dict__request.get("lockfile"))
+    except Error__conflicts as e:
+      report__conflicts(e.list__conflicts)
+      return 422, {"error": str(e), "output": stream__output.getvalue()}
+    except Error__fetch as e:
+      return 502, {"error": str(e), "output": stream__output.getvalue()}
+    except (Exception, SystemExit) as e:
+      return 500, {"error": f"{type(e).__name__}: {e}", "output": stream__output.getvalue()}
+    finally:
+      if path__trace == None: # spans are only kept for the trace file, a daemon runs for long
+        with lock__trace:
+          list__trace_events.clear()
+  return 200, {"result": dict__result, "output": stream__output.getvalue()}
+
+class Handler__daemon(http.server.BaseHTTPRequestHandler):
+  # JSON API of `serve`, only for requests with the token written in `PATH_DAEMON`:
+  # `GET /status`, `POST /tree` with the R version, the roots (`pack@ver`), the previous lockfile (or `null`) and `quiet`
+  protocol_version = "HTTP/1.1"
+
+  def send__JSON(self, int__status, dict__content):
+    bytes__content = json.dumps(dict__content, ensure_ascii=False).encode("utf-8")
+    self.send_response(int__status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(bytes__content)))
+    self.end_headers()
+    self.wfile.write(bytes__content)
+
+  def if__authorized(self):
+    if self.headers.get("X-UPPAIR-Token") == self.server.str__token:
+      return True
+    self.send__JSON(403, {"error": "token missing or wrong"})
+    return False
+
+  def do_GET(self):
+    if not self.if__authorized():
+      return
+    if self.path != "/status":
+      self.send__JSON(404, {"error": f"unknown path: {self.path}"})
+      return
+    self.send__JSON(200, {
+      "pid": os.getpid(),
+      "repository": self.server.backend.URL__CONTRIB,
+      "loaded_dicts": len(self.server.backend.dict__loaded_dicts)
+    })
+
+  def do_POST(self):
+    bytes__request = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+    if not self.if__authorized():
+      return
+    if self.path != "/tree":
+      self.send__JSON(404, {"error": f"unknown path: {self.path}"})
+      return
+    try:
+      dict__request = json.loads(bytes__request)
+    except ValueError as e:
+      self.send__JSON(400, {"error": f"request can not be parsed: {e}"})
+      return
+    float__start = time.perf_counter()
+    int__status, dict__response = resolve__tree__for__client(dict__request, self.server.backend)
+    self.send__JSON(int__status, dict__response)
+    step(f"{dict__request.get('roots')} for R {dict__request.get('R_version')} resolved ({int__status}) in {time.perf_counter() - float__start:.2f}s")
+
+  def log_message(self, *args):
+    pass
+
+def command__serve(int__port):
+  # resolve `tree` and `add` of every uppair run from this directory, with the indexes and the metadata read kept in memory
+  server = http.server.ThreadingHTTPServer(("127.0.0.1", int__port), Handler__daemon)
+  server.daemon_threads = True
+  server.backend = Backend__repository() # unexpired caches are used without asking, they are refreshed in the background instead
+  server.str__token = secrets.token_hex(16)
+  dict__daemon = {"port": server.server_address[1], "pid": os.getpid(), "token": server.str__token, "repository": server.backend.URL__CONTRIB}
+  with open(os.open(PATH_DAEMON, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f: # token readable by its owner only
+    json.dump(dict__daemon, f)
+  threading.Thread(target=refresh__indexes__periodically, args=(server.backend,), daemon=True).start()
+  signal.signal(signal.SIGTERM, lambda *args: sys.exit(0)) # `kill` stops it as Ctrl+C does
+
+  success(f"resolver daemon listening on 127.0.0.1:{dict__daemon['port']} for {server.backend.URL__CONTRIB}, stop it by Ctrl+C")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    if (read__daemon_file() or {}).get("pid") == os.getpid(): # not replaced by another one
+      os.remove(PATH_DAEMON)
+  success("resolver daemon stopped")
+
+def get__repository_URLs(str__repository):
+  # -> `URL__LATEST_INDEX`, `URL__ARCHIVE_INDEX`, `URL__CONTRIB`, `URL__PACKAGES`, `URL__ARCHIVE_RDS` of a CRAN mirror by its URL,
+  # or a local snapshot by its directory (or `file://` URL),
+  # both laid out as CRAN: `src/contrib/` for latest packages, `src/contrib/Archive/` for archived ones
+  if "://" not in str__repository:
+    str__repository = "file://" + urllib.request.pathname2url(os.path.abspath(str__repository))
+  str__base = str__repository.rstrip("/") + "/"
+  return (
+    urljoin(str__base, "web/packages/available_packages_by_name.html"),
+    urljoin(str__base, "src/contrib/Archive/"),
+    urljoin(str__base, "src/contrib/"),
+    urljoin(str__base, "src/contrib/PACKAGES.gz"),
+    urljoin(str__base, "src/contrib/Meta/archive.rds")
+  )
+
+def set__repository(str__repository):
+  # the repository of the command line (`--repository`), before its backend is made
+  global URL__LATEST_INDEX, URL__ARCHIVE_INDEX, URL__CONTRIB, URL__PACKAGES, URL__ARCHIVE_RDS
+  URL__LATEST_INDEX, URL__ARCHIVE_INDEX, URL__CONTRIB, URL__PACKAGES, URL__ARCHIVE_RDS = get__repository_URLs(str__repository)
+
+def parse__options(list__args):
+  global int__fetch_workers, int__install_workers, int__install_batch_size, if__fresh, if__quiet, path__trace, if__daemon_allowed
+  list__rest = []
+  for arg in list__args:
+    if not arg.startswith("--"):
+      list__rest.append(arg)
+      continue
+
+    option, _, value = arg[2:].partition("=")
+    if (option == "fetch-workers") and value.isdigit() and (int(value) > 0):
+      int__fetch_workers = int(value)
+    elif (option == "install-workers") and value.isdigit() and (int(value) > 0):
+      int__install_workers = int(value)
+    elif (option == "install-batch") and value.isdigit() and (int(value) > 0):
+      int__install_batch_size = int(value)
+    elif (option == "repository") and (value != ""):
+      set__repository(value)
+    elif (option == "fresh") and (value == ""):
+      if__fresh = True
+    elif (option == "quiet") and (value == ""):
+      if__quiet = True
+    elif (option == "trace") and (value != ""):
+      path__trace = value
+    elif (option == "no-daemon") and (value == ""):
+      if__daemon_allowed = False
+    else:
+      error(f"unrecognized option: '{arg}'")
+      handle__command_error()
+  return list__rest
 
 def handle__command_error():
   error("input format can not be parsed")
   print(
     "\nusage:\n" + 
-    "  python uppair.py [command] [args separated by space]\n" + 
+    "  python uppair.py [command] [args separated by space] [...options]\n" + 
     "[command]\n" + 
-    "  auto\t| no args needed\t\t| parse ./renv.json , auto install to current R env\n" + 
-    "  add\t| [...pack@ver]\t\t\t| add package(s) to current R env\n" + 
-    "  tree\t| [R version] [...pack@ver]\t| parse dependencies of package(s) limited by R version"
+    f"  auto\t| no args needed\t\t| install packages pinned in {PATH_LOCKFILE} (written by `tree`) to current R env\n" + 
+    "  add\t| [R version] [...pack@ver]\t| add package(s) to current R env, of the R version given\n" + 
+    "  tree\t| [R version] [...pack@ver]\t| parse dependencies of package(s) limited by R version\n" + 
+    "  mirror\t| [directory] [R version] [...pack@ver]\t| copy package(s) and dependencies into a local CRAN snapshot\n" + 
+    "  serve\t| [port] (optional)\t\t| keep indexes in memory and resolve `tree` and `add` of other runs from this directory\n" + 
+    "[options]\n" + 
+    f"  --fetch-workers=N\t| max number of packages resolved at the same time, default {FETCH_MAX_WORKERS}\n" + 
+    f"  --install-workers=N\t| max number of R sessions installing packages at the same time, default {INSTALL_MAX_WORKERS}\n" + 
+    f"  --install-batch=N\t| max number of packages installed by one R session, default {INSTALL_BATCH_SIZE}\n" + 
+    "  --repository=URL|DIR\t| CRAN mirror, or local snapshot made by `mirror`, to resolve and install from, default CRAN\n" + 
+    f"  --fresh\t\t| resolve from scratch, instead of starting from the versions in {PATH_LOCKFILE}\n" + 
+    "  --quiet\t\t| print warnings, errors and results only, not the progress of each step\n" + 
+    "  --no-daemon\t\t| resolve in this run even if `serve` is running\n" + 
+    "  --trace=PATH\t\t| write the time, bytes and cache outcome of every fetch, parse, resolution and install step to PATH, as a Chrome trace"
   )
   exit(1)
 
 def route__command(command, params):
+  # a fetch given up ends the command, as it can not go on without it
+  try:
+    run__command(command, params)
+  except Error__fetch as e:
+    error(f"{e}, exit")
+    exit(1)
+
+def run__command(command, params):
   global str__R_version
   # print(f"\ncommand:\n  {command}\nparams:\n  {params}")
   if command == "auto":
-    # TODO
-    pass
+    if__task_confirmed = ask__user_confirm(f"confirm task: install R packages pinned in {PATH_LOCKFILE} ?")
+
+    if if__task_confirmed:
+      command__auto()
+    else:
+      warning("operation canceled")
+      exit(1)
   elif command == "add":
+    str__R_version = params[0].strip()
     list_str__package_name__and__version = params[1:]
     
     if__task_confirmed = ask__user_confirm(f"confirm task: add R packages: {list_str__package_name__and__version} ?")
@@ -793,26 +3392,52 @@ def route__command(command, params):
     else:
       warning("operation canceled")
       exit(1)
+  elif command == "mirror":
+    if len(params) < 3:
+      handle__command_error()
+    path__snapshot = params[0]
+    str__R_version = params[1].strip()
+    list_str__package_name__and__version = params[2:]
+
+    if__task_confirmed = ask__user_confirm(f"confirm task: mirror {list_str__package_name__and__version} and their dependencies into {path__snapshot} ?")
+
+    if if__task_confirmed:
+      command__mirror(path__snapshot, list_str__package_name__and__version)
+    else:
+      warning("operation canceled")
+      exit(1)
+  elif command == "serve":
+    if (len(params) > 1) or ((len(params) == 1) and (not params[0].isdigit())):
+      handle__command_error()
+    command__serve(int(params[0]) if len(params) == 1 else 0)
   else:
     error(f"unrecognized command: '{command}'")
     handle__command_error()
+  report__connections()
   success("all done!")
 
 if __name__ == "__main__":
-  print("checking directories...")
+  # handle **arguments input by command line**
+  args = [sys.argv[0]] + parse__options(sys.argv[1:])
+  if len(args) < 2: # `args[0]` is `"uppair.py"`
+    handle__command_error()
+
+  step("checking directories...")
   os.makedirs(PATH_CACHE, exist_ok=True)
   os.makedirs(PATH_STORAGE, exist_ok=True)
-  print("directories checked")
+  step("directories checked")
 
   formatted_date__when_start = get__fotmatted_date()
   initialize__RE()
 
-  # handle **arguments input by command line**
-  args = sys.argv
-  if len(args) < 2: # `args[0]` is `"uppair.py"`
-    handle__command_error()
-  route__command(args[1], args[2:])
+  try:
+    route__command(args[1], args[2:])
+  finally:
+    report__trace()
 
 # test code:
 # python ./uppair.py tree 4.2.1 NPCD@1.0-11 CDM@7.5-15 GDINA@2.8.8
-# python ./uppair.py add NPCD@1.0-11 CDM@7.5-15 GDINA@2.8.8
\ No newline at end of file
+# python ./uppair.py add 4.2.1 NPCD@1.0-11 CDM@7.5-15 GDINA@2.8.8
+# python ./uppair.py mirror ./cran_snapshot 4.2.1 NPCD@1.0-11 CDM@7.5-15 GDINA@2.8.8
+# python ./uppair.py tree 4.2.1 NPCD@1.0-11 CDM@7.5-15 GDINA@2.8.8 --repository=./cran_snapshot
+# python ./uppair.py serve --repository=./cran_snapshot
\ No newline at end of file